@@ -0,0 +1,100 @@
+import re
+import numpy as np
+import pandas as pd
+
+
+class AuthorAliasResolver():
+
+    def __init__(self, aliases):
+        """
+        maps the raw author strings of a chat (phone numbers, full names, renamed contacts) to canonical identities
+
+        the mapping is applied once to the unique author values and the result is recoded back onto every row, so the cost depends on the number of authors not the number of messages
+
+        aliases (dict): canonical_name<str>: list<str|int> of aliases. names are matched ignoring case and surrounding whitespace, phone numbers are matched on their digits only
+
+        e.g. AuthorAliasResolver({"Cath": ["Cath Jones", "+44 7700 900123"], "Chole": ["Chole Williams"]})
+        """
+        self.aliases = aliases
+        self.phone_number_regexp = re.compile(
+            r"^\+?[\d\s\-\(\)]+$"
+        )
+        self.non_digit_regexp = re.compile(
+            r"\D"
+        )
+        self.alias_table = {}
+        for canonical, canonical_aliases in aliases.items():
+            for alias in [canonical] + list(canonical_aliases):
+                self.alias_table[self.normalise_alias(alias)] = canonical
+        self.unresolved = []
+
+    def is_phone_number(self, alias):
+        return bool(self.phone_number_regexp.match(str(alias).strip()))
+
+    def normalise_alias(self, alias):
+        """
+        alias (str|int): an author name or phone number
+
+        return str
+        """
+        alias = str(alias).strip()
+        if self.is_phone_number(alias):
+            return self.non_digit_regexp.sub("", alias)
+        return alias.casefold()
+
+    def resolve_author(self, author):
+        """
+        author (str): a raw author string
+
+        return str|None (None when the author has no alias)
+        """
+        return self.alias_table.get(self.normalise_alias(author))
+
+    def resolve(self, authors, as_category=False):
+        """
+        resolves an author column. unresolved authors keep their raw value and are recorded in self.unresolved, nulls and the empty author of events are left as they are
+
+        authors (pd.Series<str>): the author column of a cleaned chat
+        as_category (bool): return a categorical series, defaults to False
+
+        return pd.Series
+        """
+        codes, uniques = pd.factorize(authors)
+        resolved = [self.resolve_author(a) if a != "" else a for a in uniques]
+        self.unresolved = sorted(a for a, r in zip(uniques, resolved) if r is None)
+        resolved_uniques = [a if r is None else r for a, r in zip(uniques, resolved)]
+
+        # several raw authors can resolve to one canonical author so the resolved uniques are factorized again before recoding
+        resolved_codes, canonical_authors = pd.factorize(pd.Index(resolved_uniques, dtype=object))
+        row_codes = np.where(codes >= 0, resolved_codes[codes] if len(resolved_codes) else codes, -1)
+        recoded = pd.Categorical.from_codes(row_codes, categories=canonical_authors)
+        if as_category:
+            return pd.Series(recoded, index=authors.index, name=authors.name)
+        resolved_authors = np.asarray(recoded, dtype=object)
+        # the categorical turns every null into nan, the nulls are put back as they were given (e.g. None)
+        resolved_authors[codes < 0] = authors.to_numpy(dtype=object)[codes < 0]
+        return pd.Series(resolved_authors, index=authors.index, name=authors.name)
+
+    def resolve_chat(self, cleaned_chat, as_category=False):
+        """
+        cleaned_chat (pd.DataFrame): the output of RawChatCleaner().clean()
+        as_category (bool): make the author column categorical, defaults to False
+
+        return pd.DataFrame (a copy with the author column resolved)
+        """
+        return cleaned_chat.assign(
+            author = self.resolve(cleaned_chat.author, as_category=as_category)
+        )
+
+    def contact_dict(self):
+        """
+        the phone number aliases in the format RawChatCleaner uses to substitute @number mentions with names
+
+        return dict (name<str>: list<str> of phone numbers)
+        """
+        contact_dict = {}
+        for canonical, canonical_aliases in self.aliases.items():
+            numbers = [self.normalise_alias(a) for a in canonical_aliases if self.is_phone_number(a)]
+            if len(numbers) > 0:
+                contact_dict[canonical] = numbers
+        return contact_dict
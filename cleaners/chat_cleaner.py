@@ -1,71 +1,198 @@
+import io
 import re
+from types import MappingProxyType
 from datetime import datetime
 import pandas as pd
 import emoji
+import numpy as np
+from cleaners.chat_reader import ChatExportReader, strip_marks
+from cleaners.message_dictionary import MessageDictionary, factorize_messages
+
+
+# event and message types are each matched by a single compiled pattern, the alternatives are anchored at the start of the message and tried in order so an earlier type wins
+# e.g. a subject change to "tom added" is a subject_change rather than added
+EVENT_TYPE_REGEXP = re.compile(
+    r"^(?:"
+    r"(?P<encryption_notice>.*\bend-to-end encrypted\b)|"
+    r"(?P<created_group>.*\bcreated (?:the )?group\b)|"
+    r"(?P<subject_change>.*\bchanged (?:the subject|the group name|this group's name)\b)|"
+    r"(?P<deleted_message>(?:This message was deleted|You deleted this message)\.?$)|"
+    r"(?P<joined>.*\bjoined\b)|"
+    r"(?P<left>.*\bleft$)|"
+    r"(?P<added>.*\badded\b)|"
+    r"(?P<removed>.*\bremoved\b)"
+    r")"
+)
+MESSAGE_TYPE_REGEXP = re.compile(
+    r"^\s*(?:"
+    r"(?P<media_omitted>(?:__Media_Omitted__|<Media omitted>)\s*$)|"
+    r"(?P<deleted_message>(?:This message was deleted|You deleted this message)\.?\s*$)"
+    r")"
+)
+EVENT_TYPES = [
+    "created_group",
+    "subject_change",
+    "joined",
+    "left",
+    "added",
+    "removed",
+    "encryption_notice",
+    "deleted_message",
+    "media_omitted",
+    "other_event",
+    "message"
+]
+
+def classify_event_types(messages, is_event):
+    """ 
+    classifies each row of a cleaned chat into one of the EVENT_TYPES. events that match no pattern are other_event and messages that are not media omitted or deleted are message
+
+    each unique message is matched once against the compiled pattern table and the result is recoded onto every row
+
+    messages (pd.Series<str>): the message column of RawChatCleaner().clean()
+    is_event (pd.Series<bool>): the is_event column of RawChatCleaner().clean()
+
+    return pd.Series<category>
+    """
+    message_codes, unique_messages = factorize_messages(messages)
+    # each row is keyed by its message code and is_event as one integer, so only the integer keys are factorized
+    codes, unique_keys = pd.factorize(message_codes * 2 + is_event.astype(bool).to_numpy())
+    unique_types = []
+    for key in unique_keys:
+        message, message_is_event = unique_messages[key // 2], bool(key % 2)
+        match = (EVENT_TYPE_REGEXP if message_is_event else MESSAGE_TYPE_REGEXP).match(message)
+        if match is not None:
+            unique_types.append(match.lastgroup)
+        else:
+            unique_types.append("other_event" if message_is_event else "message")
+
+    type_codes = np.array([EVENT_TYPES.index(t) for t in unique_types], dtype=np.int64)
+    return pd.Series(
+        pd.Categorical.from_codes(type_codes[codes], categories=EVENT_TYPES),
+        index = messages.index,
+        name = "event_type"
+    )
+
+
+# the cleaning rules are compiled once when the module is imported and shared, read only, by every RawChatCleaner
+CLEANING_RULES = MappingProxyType(
+    {
+        # TODO: need to check this, i think it should be \d{2} rather than \d{0,9}
+        "timestamp_regexp": re.compile(
+            r"(\d{0,9}\/\d{0,9}\/\d{0,9},\s\d{0,9}:\d{0,9})"
+        ),
+        "author_regexp": re.compile(
+            r"(^.*?(?=\:))"
+        ),
+        "quotation_regexp": re.compile(
+            r"\""
+        ),
+        "media_ommited_regexp": re.compile(
+            r"(?:<Media omitted>)"
+        ),
+        "newline_with_no_full_stop_and_space": re.compile(
+            r"(?:(?<![\.,\s])\n(?![\.,\s]))"
+        ), # -> replace with '. '
+        "newline_with_full_stop_no_space": re.compile(
+            r"(?:(?<=\.)\n(?!\s))"
+        ), # -> replace with ' '
+        "newline_with_full_stop_and_space": re.compile(
+            r"(?:(?<=\.)\n(?=\s))"
+        ), # -> replace with ''
+        "newline_with_full_stop_preceding_whitespace": re.compile(
+            r"(?:(?<=\.)\s+\n(?!\s))"
+        ), # -> replace with ' '
+        "newline_at_end": re.compile(
+            r"(?:\n(?=$))"
+        ), # replace with ''
+        "newline_": re.compile(
+            r"(?:\n)"
+        ) # replace with '. '
+    }
+)
+# the order substitute_strs applies the rules in, this has to be kept as the later newline rules match what the earlier ones leave behind
+SUBSTITUTION_RULES = (
+    ("media_ommited_regexp", "__Media_Omitted__"),
+    ("newline_at_end", ""),
+    ("newline_with_no_full_stop_and_space", ". "),
+    ("newline_with_full_stop_no_space", " "),
+    ("newline_with_full_stop_and_space", ""),
+    ("newline_with_full_stop_preceding_whitespace", " "),
+    ("newline_", ". ")
+)
 
 
 class RawChatCleaner():
 
+    timestamp_regexp = CLEANING_RULES["timestamp_regexp"]
+    author_regexp = CLEANING_RULES["author_regexp"]
+    quotation_regexp = CLEANING_RULES["quotation_regexp"]
+    media_ommited_regexp = CLEANING_RULES["media_ommited_regexp"]
+    newline_with_no_full_stop_and_space = CLEANING_RULES["newline_with_no_full_stop_and_space"]
+    newline_with_full_stop_no_space = CLEANING_RULES["newline_with_full_stop_no_space"]
+    newline_with_full_stop_and_space = CLEANING_RULES["newline_with_full_stop_and_space"]
+    newline_with_full_stop_preceding_whitespace = CLEANING_RULES["newline_with_full_stop_preceding_whitespace"]
+    newline_at_end = CLEANING_RULES["newline_at_end"]
+    newline_ = CLEANING_RULES["newline_"]
+
     def __init__(self, chat_loc, contact_dict = {}):
         """ 
         cleaner for the raw chat.txt exported from whatsapp
 
-        chat_loc (str): the absolute file path of the whatsapp chat.txt file
+        chat_loc (str|file): the absolute file path of the whatsapp chat.txt, .zip or .gz export, or an open text file
+        contact_dict (dict): see replace_user_phone_numbers_with_names
 
-        the clean() method 
+        construction is cheap, the regexps are the shared CLEANING_RULES and the chat is only read and demojized the first time it is needed, e.g. by clean(). use RawChatCleaner.from_text to clean a chat that is already in memory
 
-        TODO: remove media ommited messages and other events
+        media omitted messages and other events can be typed with clean(classify_events=True) and removed with ChatDataProcessor.drop_event_types
         """
         self.chat_loc = chat_loc
         self.contact_dict = contact_dict
-        self.chat_with_emojis = self.load_chat_file()
-        self.chat = self.translate_emojis(self.chat_with_emojis)
+        self._chat_with_emojis = None
+        self._chat = None
+
+        # the mention regexps only depend on the contact_dict so they are compiled once rather than for every message
+        self.contact_regexps = []
+        for name, number in contact_dict.items():
+            numbers = number if isinstance(number, (list, tuple)) else [number]
+            self.contact_regexps.append(
+                (name, re.compile(f"(?:@(?:{'|'.join(str(n) for n in numbers)}))"))
+            )
 
-        # TODO: need to check this, i think it should be \d{2} rather than \d{0,9}
-        self.timestamp_regexp = re.compile(
-            r"(\d{0,9}\/\d{0,9}\/\d{0,9},\s\d{0,9}:\d{0,9})"
-        )
-        self.author_regexp = re.compile(
-            r"(^.*?(?=\:))"
-        )
-        self.quotation_regexp = re.compile(
-            r"\""
-        )
-        self.media_ommited_regexp = re.compile(
-            r"(?:<Media omitted>)"
-        )
+    @classmethod
+    def from_text(cls, chat_text, contact_dict = {}):
+        """ 
+        a cleaner for a chat export that is already in memory
 
-        
-        self.newline_with_no_full_stop_and_space = re.compile(
-            r"(?:(?<![\.,\s])\n(?![\.,\s]))"
-        ) # -> replace with '. '
-        
-        self.newline_with_full_stop_no_space = re.compile(
-            r"(?:(?<=\.)\n(?!\s))"
-        ) # -> replace with ' '
+        chat_text (str): the contents of a whatsapp chat.txt file
+        contact_dict (dict): see replace_user_phone_numbers_with_names
 
-        self.newline_with_full_stop_and_space = re.compile(
-            r"(?:(?<=\.)\n(?=\s))"
-        ) # -> replace with ''
+        return RawChatCleaner
+        """
+        # newline=None translates \r\n line endings in the same way reading the export from a file does
+        return cls(io.StringIO(chat_text, newline=None), contact_dict)
 
-        self.newline_with_full_stop_preceding_whitespace = re.compile(
-            r"(?:(?<=\.)\s+\n(?!\s))"
-        ) # -> replace with ' '
+    @property
+    def chat_with_emojis(self):
+        if self._chat_with_emojis is None:
+            self._chat_with_emojis = self.load_chat_file()
+        return self._chat_with_emojis
 
-        self.newline_at_end = re.compile(
-            r"(?:\n(?=$))"
-        ) # replace with ''
+    @property
+    def chat(self):
+        if self._chat is None:
+            self._chat = self.translate_emojis(self.chat_with_emojis)
+        return self._chat
 
-        self.newline_ = re.compile(
-            r"(?:\n)"
-        ) # replace with '. '
     def load_chat_file(self):
         """ 
-        loads the chat
+        loads the chat, .txt, .zip and .gz exports are read with ChatExportReader which removes the byte order mark and directional marks as it decodes
 
         return str
         """
-        return open(self.chat_loc, "r").read()
+        if hasattr(self.chat_loc, "read"):
+            return strip_marks(self.chat_loc.read())
+        return ChatExportReader(self.chat_loc).read()
 
     def translate_emojis(self, encoded_chat):
         """ 
@@ -85,11 +212,10 @@ class RawChatCleaner():
         """ 
         uses a regexp to locate and replace the number of an chat member with their name. this data needs to be supplied by the user of the program as there is no reliable datasource for linking these user descriptors
 
-        contact_dict (dict): name<str>: phone_number<str|int>
+        contact_dict (dict): name<str>: phone_number<str|int> or list<str|int> of phone numbers, AuthorAliasResolver().contact_dict() can be used to build this
         """
 
-        for name, number in self.contact_dict.items():
-            regexp = re.compile(f"(?:@{number})")
+        for name, regexp in self.contact_regexps:
             if regexp.search(str_):
                 str_ = regexp.sub(name, str_)
         return str_
@@ -100,66 +226,29 @@ class RawChatCleaner():
 
         this has to be done after most of the cleaning as the \n char can be used for splitting messages
         """
-        str_ = self.media_ommited_regexp.sub(
-            "__Media_Omitted__",
-            str_
-        )
-
-        str_ = self.newline_at_end.sub(
-            "",
-            str_
-        )
-         
-        str_ = self.newline_with_no_full_stop_and_space.sub(
-            ". ",
-            str_
-        )
-
-        str_ = self.newline_with_full_stop_no_space.sub(
-            " ",
-            str_
-        )
-
-        str_ = self.newline_with_full_stop_and_space.sub(
-            "",
-            str_
-        )
-
-        str_ = self.newline_with_full_stop_preceding_whitespace.sub(
-            " ",
-            str_
-        )
-        
-        str_ = self.newline_.sub(
-            ". ",
-            str_
-        )
+        for rule_name, replacement in SUBSTITUTION_RULES:
+            str_ = getattr(self, rule_name).sub(
+                replacement,
+                str_
+            )
         if len(self.contact_dict) > 0:
             str_ = self.replace_user_phone_numbers_with_names(str_)
         return str_
     
-    def clean(self):
+    def clean(self, classify_events=False, encode_messages=False, message_dictionary=None):
         """ 
         returns a dataframe of the chat data with the following columns
 
-        timestamp (datetime), author (str), is_event (bool), message (str), time_since_previous_message (timedelta), previous_message_author (str)
+        timestamp (datetime), author (str), is_event (bool), message (str, or category when encoded)
+
+        classify_events (bool): also add a categorical event_type column, see classify_event_types
+        encode_messages (bool): store the message column as a categorical of integer codes into its unique messages, see encode_message_column
+        message_dictionary (MessageDictionary): encode the message column with a dictionary shared with other chats, implies encode_messages
 
         return pd.DataFrame
         """
-        splitted_chat = self.split_by_timestamps()
-        chat_matrix = []
-        for ts, raw_msg in self.zip_timestamp_n_messages(splitted_chat):
-            author, msg = self.attempt_split_message_into_author_and_content(raw_msg)
-            chat_matrix.append(
-                [
-                    self.format_timestamp(ts),
-                    self.str_cleaner(author, "author"),
-                    author=="",
-                    self.str_cleaner(msg, "event" if author=="" else "message")
-                ]
-            )
         chat_data = pd.DataFrame(
-            chat_matrix,
+            list(self.iter_messages()),
             columns = [
                 "timestamp",
                 "author",
@@ -167,9 +256,42 @@ class RawChatCleaner():
                 "message"
             ]
         )
+        if encode_messages or (message_dictionary is not None):
+            chat_data["message"] = self.encode_message_column(chat_data.message, message_dictionary)
+        if classify_events:
+            chat_data["event_type"] = classify_event_types(chat_data.message, chat_data.is_event)
 
         return chat_data
     
+    def encode_message_column(self, messages, message_dictionary=None):
+        """ 
+        dictionary encodes the message column, each row holds an integer code into the unique messages so a message repeated thousands of times is stored as one string
+
+        messages (pd.Series<str>): the message column
+        message_dictionary (MessageDictionary): a dictionary shared with other chats, defaults to one built from this chat alone
+
+        return pd.Series<category>
+        """
+        if message_dictionary is None:
+            message_dictionary = MessageDictionary()
+        return message_dictionary.categorical(messages)
+
+    def iter_messages(self):
+        """ 
+        yields the cleaned messages one at a time, this is the message stream clean() builds its dataframe from
+
+        yield list (timestamp<datetime>, author<str>, is_event<bool>, message<str>)
+        """
+        splitted_chat = self.split_by_timestamps()
+        for ts, raw_msg in self.zip_timestamp_n_messages(splitted_chat):
+            author, msg = self.attempt_split_message_into_author_and_content(raw_msg)
+            yield [
+                self.format_timestamp(ts),
+                self.str_cleaner(author, "author"),
+                author=="",
+                self.str_cleaner(msg, "event" if author=="" else "message")
+            ]
+
     def str_cleaner(self, str_, str_type):
         """ 
         removes the leading ' - ' from the author
@@ -0,0 +1,126 @@
+import re
+import unicodedata
+import pandas as pd
+from cleaners.message_dictionary import factorize_messages
+
+
+class ChatDeduplicator():
+
+    def __init__(self):
+        """
+        merges several exports of the same chat, each the output of RawChatCleaner().clean(), into a single timeline
+
+        messages are matched on a hash of (timestamp, author, normalised message). the normalisation removes the differences seen between exports of the same chat, e.g. unicode forms, zero width and directional marks, emoji variation selectors, spacing inside numbers and the whitespace left around demojized emojis
+
+        repeated messages inside one export are kept, a message sent twice in a minute is matched by its occurrence number so the merged chat contains it twice rather than once or four times
+        """
+        self.invisible_chars_regexp = re.compile(
+            r"[\u200b-\u200f\u202a-\u202e\u2066-\u2069\ufe0e\ufe0f\ufeff]"
+        )
+        self.number_separator_regexp = re.compile(
+            r"(?<=\d)[\s\-\.\u00a0](?=\d)"
+        )
+        self.whitespace_regexp = re.compile(
+            r"\s+"
+        )
+
+    def normalise_message(self, message):
+        """
+        message (str): a cleaned message
+
+        return str
+        """
+        message = unicodedata.normalize("NFKC", message)
+        message = self.invisible_chars_regexp.sub("", message)
+        message = self.number_separator_regexp.sub("", message)
+        message = self.whitespace_regexp.sub(" ", message)
+        return message.strip().casefold()
+
+    def normalise_messages(self, messages):
+        """
+        normalises each unique message once and maps the result back onto every row, a categorical column is normalised once per category
+
+        messages (pd.Series<str>): the message column of a cleaned chat
+
+        return pd.Series<str>
+        """
+        codes, uniques = factorize_messages(messages)
+        normalised = pd.Index([self.normalise_message(m) for m in uniques], dtype=object)
+        return pd.Series(normalised.take(codes), index=messages.index)
+
+    def hash_messages(self, cleaned_chat):
+        """
+        cleaned_chat (pd.DataFrame): the output of RawChatCleaner().clean()
+
+        return pd.Series<uint64>
+        """
+        return pd.util.hash_pandas_object(
+            pd.DataFrame(
+                {
+                    "timestamp": cleaned_chat.timestamp,
+                    "author": cleaned_chat.author.fillna(""),
+                    "message": self.normalise_messages(cleaned_chat.message)
+                }
+            ),
+            index = False
+        )
+
+    def keyed_exports(self, cleaned_chats):
+        """
+        stacks the exports with the columns used to match messages between them
+
+        export_id: the position of the export in cleaned_chats
+        position: the position of the message in its export
+        message_hash: see hash_messages
+        occurrence: how many times the message_hash has already appeared in its export
+
+        cleaned_chats (list<pd.DataFrame>): the outputs of RawChatCleaner().clean() for each export
+
+        return pd.DataFrame
+        """
+        keyed = pd.concat(
+            [
+                chat.assign(
+                    export_id = export_id,
+                    position = range(len(chat)),
+                    message_hash = self.hash_messages(chat).to_numpy()
+                )
+                for export_id, chat in enumerate(cleaned_chats)
+            ],
+            ignore_index = True
+        )
+        keyed["occurrence"] = keyed.groupby(["export_id", "message_hash"]).cumcount()
+        return keyed
+
+    def merge(self, cleaned_chats):
+        """
+        merges the exports into one canonical timeline. when a message is in several exports the row from the earliest export in cleaned_chats is kept. messages are ordered by timestamp, then by export and position for messages in the same minute
+
+        cleaned_chats (list<pd.DataFrame>): the outputs of RawChatCleaner().clean() for each export
+
+        return pd.DataFrame (in the format of RawChatCleaner().clean())
+        """
+        columns = list(cleaned_chats[0].columns)
+        keyed = self.keyed_exports(cleaned_chats)
+        merged = keyed.drop_duplicates(subset=["message_hash", "occurrence"], keep="first")
+        merged = merged.sort_values(["timestamp", "export_id", "position"], kind="stable")
+        return merged[columns].reset_index(drop=True)
+
+    def overlap_summary(self, cleaned_chats):
+        """
+        summarises how much each export overlaps with the merged chat
+
+        cleaned_chats (list<pd.DataFrame>): the outputs of RawChatCleaner().clean() for each export
+
+        return pd.DataFrame (indexed by export_id with message_count, shared_count and unique_count columns)
+        """
+        keyed = self.keyed_exports(cleaned_chats)
+        export_counts = keyed.groupby(["message_hash", "occurrence"]).export_id.transform("nunique")
+        return keyed.assign(
+            shared = export_counts > 1
+        ).groupby("export_id").agg(
+            message_count = ("shared", "size"),
+            shared_count = ("shared", "sum")
+        ).assign(
+            unique_count = lambda x: x.message_count - x.shared_count
+        )
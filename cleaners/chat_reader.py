@@ -0,0 +1,91 @@
+import io
+import gzip
+import zipfile
+
+
+# the byte order mark and the directional marks whatsapp adds around names, timestamps and attachments, e.g. "\u200e<attached: photo.jpg>". zero width joiners are kept as they are part of emoji sequences
+STRIPPED_MARKS = "\ufeff\u200e\u200f\u061c\u202a\u202b\u202c\u202d\u202e\u2066\u2067\u2068\u2069"
+STRIP_MARKS_TABLE = dict.fromkeys(map(ord, STRIPPED_MARKS))
+
+def strip_marks(text):
+    """
+    text (str): decoded chat text
+
+    return str (the text without the STRIPPED_MARKS)
+    """
+    return text.translate(STRIP_MARKS_TABLE)
+
+
+class ChatExportReader():
+
+    def __init__(self, chat_loc, encoding="utf-8", member=None, chunk_size=1 << 20):
+        """
+        reads a whatsapp export as a stream of decoded text, whether it is the chat.txt itself, the .zip whatsapp shares when exporting with media or a gzipped .gz file
+
+        archives are decompressed as they are read, nothing is extracted to disk. the text is decoded incrementally with universal newlines and the byte order mark and directional marks are removed from each decoded chunk, so the whole export is read in one pass
+
+        chat_loc (str): the file path of the .txt, .zip or .gz export
+        encoding (str): the encoding of the chat text, defaults to utf-8
+        member (str): the name of the chat file inside a .zip, defaults to the .txt file in the archive
+        chunk_size (int): the number of characters decoded at a time
+        """
+        self.chat_loc = chat_loc
+        self.encoding = encoding
+        self.member = member
+        self.chunk_size = chunk_size
+
+    def zip_member(self, archive):
+        """
+        the chat file inside a whatsapp zip export, the only .txt file or failing that the one named like a chat e.g. "WhatsApp Chat with x.txt" or "_chat.txt"
+
+        archive (zipfile.ZipFile): the opened export
+
+        return str
+        """
+        if self.member is not None:
+            return self.member
+        text_members = [name for name in archive.namelist() if name.lower().endswith(".txt")]
+        chat_members = [name for name in text_members if "chat" in name.lower()]
+        if len(text_members) == 1:
+            return text_members[0]
+        if len(chat_members) > 0:
+            return chat_members[0]
+        raise ValueError(f"could not find the chat .txt file in {self.chat_loc}, pass its name as member")
+
+    def open_binary(self):
+        """
+        return file (a binary stream of the chat text)
+        """
+        chat_loc = str(self.chat_loc)
+        if chat_loc.lower().endswith(".zip"):
+            archive = zipfile.ZipFile(chat_loc)
+            # the member stream keeps a reference to the archive, closing the stream is enough
+            return archive.open(self.zip_member(archive))
+        if chat_loc.lower().endswith(".gz"):
+            return gzip.open(chat_loc, "rb")
+        return open(chat_loc, "rb")
+
+    def iter_chunks(self):
+        """
+        yield str (decoded chunks of the chat text with the marks removed)
+        """
+        with io.TextIOWrapper(self.open_binary(), encoding=self.encoding, newline=None) as chat_text:
+            while True:
+                chunk = chat_text.read(self.chunk_size)
+                if chunk == "":
+                    return
+                yield strip_marks(chunk)
+
+    def iter_lines(self):
+        """
+        yield str (the lines of the chat text with the marks removed), e.g. to feed StreamingChatProcessor.run
+        """
+        with io.TextIOWrapper(self.open_binary(), encoding=self.encoding, newline=None) as chat_text:
+            for line in chat_text:
+                yield strip_marks(line)
+
+    def read(self):
+        """
+        return str (the whole chat text)
+        """
+        return "".join(self.iter_chunks())
@@ -0,0 +1,28 @@
+from cleaners.chat_cleaner import RawChatCleaner
+from cleaners.vectorized_chat_cleaner import VectorizedChatCleaner
+
+
+# the cleaning engines that can be used in place of RawChatCleaner. every engine takes the same arguments as RawChatCleaner and its clean() must return exactly the same dataframe, tests/test_cleaning_engine_equivalence.py checks every registered engine against the reference on randomly generated exports
+CLEANING_ENGINES = {
+    "reference": RawChatCleaner
+}
+
+def register_cleaning_engine(name, cleaner_class):
+    """ 
+    registers an alternative cleaning engine so it is included in the equivalence tests
+
+    name (str): the name of the engine
+    cleaner_class (class): a class with the RawChatCleaner constructor and a clean() method
+
+    return class
+    """
+    CLEANING_ENGINES[name] = cleaner_class
+    return cleaner_class
+
+def get_cleaning_engine(name="reference"):
+    """ 
+    return class
+    """
+    return CLEANING_ENGINES[name]
+
+register_cleaning_engine("vectorized", VectorizedChatCleaner)
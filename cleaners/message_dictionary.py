@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+def factorize_messages(messages, na_value=""):
+    """
+    the code of each message and the unique messages the codes index, so per message work (normalising, scoring, classifying) only has to be run over the unique messages
+
+    for a categorical message column, e.g. RawChatCleaner().clean(encode_messages=True), the codes are taken from the category codes without reading the string of each row
+
+    messages (pd.Series<str>): a message column, object or categorical
+    na_value (str): the unique message the nulls are given, it is appended last so a null, which pd.factorize codes as -1, indexes it
+
+    return np.ndarray<int> (the codes), np.ndarray<object> (the unique messages followed by na_value)
+    """
+    codes, uniques = pd.factorize(messages)
+    return codes, np.append(np.asarray(uniques, dtype=object), np.array([na_value], dtype=object))
+
+
+class MessageDictionary():
+
+    def __init__(self):
+        """
+        a table of unique message strings shared by any number of chats, each message column is stored as integer codes into the table rather than a python string per row
+
+        chats often repeat the same short messages ("Okkk ahahaha", "__Media_Omitted__", ":grimacing_face:") thousands of times, so the table grows with the vocabulary of the chats rather than their length. the codes of a message never change once it is in the table, so columns encoded with the same dictionary can be compared, counted and joined on their codes
+
+        e.g. dictionary = MessageDictionary()
+        first_chat = RawChatCleaner(first_loc).clean(message_dictionary=dictionary)
+        second_chat = RawChatCleaner(second_loc).clean(message_dictionary=dictionary)
+        """
+        self.values = pd.Index([], dtype=object)
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, messages):
+        """
+        the code of each message, adding the messages not yet in the table. only the unique messages are looked up in, and appended to, the table
+
+        messages (pd.Series<str>): a message column, object or categorical
+
+        return np.ndarray<int> (-1 for null messages)
+        """
+        codes, uniques = pd.factorize(messages)
+        uniques = pd.Index(np.asarray(uniques, dtype=object), dtype=object)
+        new_messages = uniques[self.values.get_indexer(uniques) == -1]
+        self.values = self.values.append(new_messages)
+        unique_codes = self.values.get_indexer(uniques)
+        return np.where(codes >= 0, unique_codes[codes] if len(unique_codes) else codes, -1)
+
+    def categorical(self, messages):
+        """
+        messages (pd.Series<str>): a message column, object or categorical
+
+        return pd.Series<category> (the messages with every message in the table as its categories)
+        """
+        return pd.Series(
+            pd.Categorical.from_codes(self.encode(messages), categories=self.values),
+            index = messages.index,
+            name = messages.name
+        )
+
+    def recode(self, messages):
+        """
+        brings a column encoded by this dictionary up to date with the messages added since, so columns of several chats share the same categories and can be concatenated without falling back to strings
+
+        messages (pd.Series<category>): a column built by categorical
+
+        return pd.Series<category>
+        """
+        return messages.cat.set_categories(self.values)
+
+    def decode(self, codes):
+        """
+        codes (np.ndarray<int>): codes from encode, -1 for nulls
+
+        return np.ndarray<object>
+        """
+        codes = np.asarray(codes)
+        return np.where(codes >= 0, self.values.to_numpy()[np.maximum(codes, 0)] if len(self.values) else None, None)
@@ -0,0 +1,84 @@
+import pandas as pd
+from cleaners.chat_cleaner import RawChatCleaner, SUBSTITUTION_RULES, classify_event_types
+
+
+class VectorizedChatCleaner(RawChatCleaner):
+
+    def __init__(self, chat_loc, contact_dict = {}):
+        """ 
+        a faster RawChatCleaner, the chat is split by timestamp in the same way but the author split, the str_cleaner slicing and the substitute_strs regexps are applied to whole columns with pandas string methods rather than to one message at a time
+
+        clean() must return exactly the same dataframe as RawChatCleaner.clean(), this is checked by tests/test_cleaning_engine_equivalence.py
+
+        chat_loc (str|file): the absolute file path of the whatsapp chat.txt file, or an open text file
+        contact_dict (dict): see RawChatCleaner.replace_user_phone_numbers_with_names
+        """
+        super().__init__(chat_loc, contact_dict)
+
+    def substitute_column(self, column):
+        """ 
+        column version of RawChatCleaner.substitute_strs, the regexps are applied in the same order
+
+        column (pd.Series<str>): the strings to substitute
+
+        return pd.Series<str>
+        """
+        for rule_name, replacement in SUBSTITUTION_RULES:
+            column = column.str.replace(getattr(self, rule_name), replacement, regex=True)
+
+        for name, regexp in self.contact_regexps:
+            column = column.str.replace(
+                regexp,
+                name.replace("\\", "\\\\"),
+                regex = True
+            )
+        return column
+
+    def clean(self, classify_events=False, encode_messages=False, message_dictionary=None):
+        """ 
+        see RawChatCleaner.clean
+
+        classify_events (bool): also add a categorical event_type column, see classify_event_types
+        encode_messages (bool): store the message column as a categorical, see RawChatCleaner.encode_message_column
+        message_dictionary (MessageDictionary): encode the message column with a dictionary shared with other chats, implies encode_messages
+
+        return pd.DataFrame
+        """
+        splitted_chat = self.split_by_timestamps()
+        if len(splitted_chat) == 0:
+            # an empty chat has no column dtypes to infer, the reference cleaner is used so both return the same empty frame
+            return super().clean(
+                classify_events = classify_events,
+                encode_messages = encode_messages,
+                message_dictionary = message_dictionary
+            )
+        timestamps = pd.Series(splitted_chat[::2], dtype=object)
+        raw_messages = pd.Series(splitted_chat[1::2], dtype=object)
+
+        raw_authors = raw_messages.str.extract(self.author_regexp, expand=False)
+        is_event = raw_authors.isnull() | raw_authors.str.contains(self.quotation_regexp, regex=True)
+        is_event = is_event.fillna(True).astype(bool)
+
+        # for messages the author is removed from the front of the raw message, the author_regexp only ever matches at the start
+        message_contents = raw_messages.str.replace(self.author_regexp, "", n=1, regex=True)
+
+        authors = pd.Series("", index=raw_messages.index, dtype=object)
+        authors[~is_event] = self.substitute_column(raw_authors[~is_event].str[3:])
+        messages = pd.Series(dtype=object, index=raw_messages.index)
+        messages[is_event] = self.substitute_column(raw_messages[is_event].str[3:])
+        messages[~is_event] = self.substitute_column(message_contents[~is_event].str[2:])
+
+        chat_data = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(timestamps, format="%d/%m/%Y, %H:%M"),
+                "author": authors,
+                "is_event": is_event,
+                "message": messages
+            }
+        )
+        if encode_messages or (message_dictionary is not None):
+            chat_data["message"] = self.encode_message_column(chat_data.message, message_dictionary)
+        if classify_events:
+            chat_data["event_type"] = classify_event_types(chat_data.message, chat_data.is_event)
+
+        return chat_data
@@ -1,142 +1,573 @@
+import datetime
 import pandas as pd
-from datetime import datetime
+import numpy as np
 from stop_words import get_stop_words
+import nltk
 from nltk.stem import WordNetLemmatizer
 from nltk.corpus import wordnet
 from feature_engineering.message_relationship import MessageRelationships
+from cleaners.chat_cleaner import classify_event_types
+from cleaners.message_dictionary import factorize_messages
+from data_processing.lazy_chat_query import LazyChatQuery
+from data_processing.sparse_timeseries import SparseTimeseries
+from data_processing.sampled_timeseries import stratified_sample, estimate_counts, top_authors
+
+# the days since the epoch of a date are its ordinal minus the ordinal of 1970-01-01
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
 
 class MessageTextPreprocessor():
-    def __init__(self, df):
+    def __init__(self, df, pipeline_order=["lowercase", "remove_stop_words"], download_nltk_data=False):
+        """ 
+        prepares the message column of a cleaned or grouped chat for text models, the steps in pipeline_order are applied in turn to build a processed_message column
+
+        each step is a method taking and returning a pd.Series<str>, and is only run over the unique messages
+
+        df (pd.DataFrame): the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages()
+        pipeline_order (list<str>): the names of the steps to run, in order
+        download_nltk_data (bool): download the nltk data a step needs (the wordnet corpus for lemmatization) when it is not installed, defaults to False which raises a LookupError instead
+        """
         self.df = df
-        self.pipeline_order = [
+        self.pipeline_order = list(pipeline_order)
+        self.download_nltk_data = download_nltk_data
+        self.stop_words = set(get_stop_words("english"))
 
-        ]
-    
-    def lemmatization(self):
-        pass
+    def lowercase(self, messages):
+        return messages.str.lower()
+
+    def remove_stop_words(self, messages):
+        return messages.map(
+            lambda message: " ".join(word for word in message.split() if word.lower() not in self.stop_words)
+        )
+
+    def load_lemmatizer(self):
+        """ 
+        the WordNetLemmatizer, the nltk wordnet corpus is only downloaded if it is not installed and download_nltk_data is True
+
+        return WordNetLemmatizer
+        """
+        try:
+            nltk.data.find("corpora/wordnet")
+        except LookupError:
+            if not self.download_nltk_data:
+                raise LookupError("the lemmatization step needs the nltk wordnet corpus, which is not installed. install it with python -m nltk.downloader wordnet (or nltk.download(\"wordnet\")), pass download_nltk_data=True or remove lemmatization from pipeline_order")
+            if not nltk.download("wordnet", quiet=True):
+                raise LookupError("the lemmatization step needs the nltk wordnet corpus, which could not be downloaded. install it with python -m nltk.downloader wordnet or remove lemmatization from pipeline_order")
+        return WordNetLemmatizer()
+
+    def lemmatization(self, messages):
+        """ 
+        lemmatizes each whitespace separated word, words are lemmatized as nouns as the messages are not part of speech tagged
+        """
+        lemmatizer = self.load_lemmatizer()
+        return messages.map(
+            lambda message: " ".join(lemmatizer.lemmatize(word) for word in message.split())
+        )
+
+    def run(self):
+        """ 
+        applies the pipeline_order steps to the message column
+
+        return pd.DataFrame (a copy of df with a processed_message column)
+        """
+        codes, uniques = factorize_messages(self.df.message)
+        processed = pd.Series(uniques, dtype=object).astype(str)
+        for step in self.pipeline_order:
+            processed = getattr(self, step)(processed)
+        return self.df.assign(
+            processed_message = processed.to_numpy()[codes] if len(codes) else []
+        )
 
 class ChatDataProcessor():
 
-    def __init__(self, cleaned_chat):
+    def __init__(self, cleaned_chat=None, store=None, chat_id=None):
         """ 
         takes the output of RawChatCleaner to process into various datasets ready for further text cleaning or timeseries analysis
 
+        when a ChatStore is supplied the grouping and default timeseries aggregations are pushed down into sql and the cleaned_chat is only read from the store if another method needs it
+
         cleaned_chat (pd.DataFrame): the output of RawChatCleaner().clean()
+        store (ChatStore): a store the chat has been loaded into
+        chat_id (str): the chat_id of the chat in the store, required with a store
+        """
+        if (cleaned_chat is None) and (store is None):
+            raise ValueError("either a cleaned_chat or a store must be supplied")
+        if (store is not None) and (chat_id is None):
+            raise ValueError("a chat_id must be supplied with a store, see ChatStore.chat_ids()")
+        self._cleaned_chat = cleaned_chat
+        self.store = store
+        self.chat_id = chat_id
+        self.period_key_cache = {}
+        # (processor, rows) when the cleaned_chat is a subset or grouping of another processors chat, see subset
+        self.key_source = None
+        # real hourly and minute timeseries are mostly empty periods, they are filled by position rather than joined
+        self.high_resolution_freqs = ["H", "T"]
+
+    @property
+    def cleaned_chat(self):
+        if self._cleaned_chat is None:
+            self._cleaned_chat = self.store.read_chat(chat_id=self.chat_id)
+        return self._cleaned_chat
+
+    @cleaned_chat.setter
+    def cleaned_chat(self, cleaned_chat):
+        self._cleaned_chat = cleaned_chat
+        self.period_key_cache = {}
+        self.key_source = None
+
+    def lazy(self):
+        """ 
+        starts a lazy query over the cleaned_chat, see LazyChatQuery
+
+        e.g. processor.lazy().filter(authors=["tom"]).group_messages().timeseries("d").collect()
+
+        return LazyChatQuery
         """
-        self.cleaned_chat = cleaned_chat
+        return LazyChatQuery(self)
 
-    def group_messages(self):
+    def subset(self, chat, rows):
+        """ 
+        a processor over a filtered or grouped version of the cleaned_chat, each row of chat takes its period keys from a row of the cleaned_chat rather than deriving them again. the keys are read from, and cached in, this processor so repeated queries over the same chat only derive them once
+
+        chat (pd.DataFrame): the filtered or grouped chat
+        rows (np.ndarray<int>): the position in the cleaned_chat of each row of chat, for a grouped chat the first message of each group
+
+        return ChatDataProcessor
+        """
+        processor = ChatDataProcessor(chat)
+        processor.key_source = (self, np.asarray(rows))
+        return processor
+
+    def group_messages(self, minute_threshold=1, separator=" "):
         """ 
         groups consecutive messages using the message_group_id
+
+        minute_threshold (int): see MessageRelationships.create_message_group_id
+        separator (str): the string the messages of a group are joined with, defaults to a space
+
+        return pd.DataFrame, see aggregate_message_groups
         """
+        if self.store is not None:
+            return self.store.group_messages(self.chat_id, minute_threshold=minute_threshold, separator=separator)
         feature_engine = MessageRelationships(self.cleaned_chat)
-        message_groups = feature_engine.create_feature("message_group_id")
-        grouped_chat = self.cleaned_chat.groupby(
-            message_groups
-        ).agg(
+        message_groups = feature_engine.create_message_group_id(minute_threshold=minute_threshold)
+        return self.aggregate_message_groups(self.cleaned_chat, message_groups, separator=separator)
+
+    def aggregate_message_groups(self, chat, message_groups, separator=" "):
+        """ 
+        aggregates the messages of a chat into their message groups
+
+        the rows are ordered by group, the message_group_ids of create_message_group_id already are, so each group is a contiguous slice found from the boundaries where the id changes. the messages of a slice are joined with a single str.join and the other columns are read from the first and last position of each slice
+
+        message (the joined messages), timestamp, author and is_event of the first message, last_timestamp, message_count and media_count (the number of media omitted messages)
+
+        chat (pd.DataFrame): the chat to aggregate, in the format of RawChatCleaner().clean()
+        message_groups (pd.Series<int>): the message_group_id of each message
+        separator (str): the string the messages of a group are joined with, defaults to a space
+
+        return pd.DataFrame (indexed by message_group_id)
+        """
+        group_ids = np.asarray(message_groups)
+        order = np.argsort(group_ids, kind="stable")
+        group_ids = group_ids[order]
+        message_codes, unique_messages = factorize_messages(chat.message)
+        messages = unique_messages[message_codes[order]]
+        timestamps = chat.timestamp.to_numpy()[order]
+
+        group_starts = np.flatnonzero(np.concatenate([[True], group_ids[1:] != group_ids[:-1]])) if len(group_ids) > 0 else np.array([], dtype=int)
+        group_ends = np.append(group_starts[1:], len(group_ids)).astype(int)
+        is_media = (messages == "__Media_Omitted__").astype(int)
+
+        grouped_chat = pd.DataFrame(
             {
-                "message":"sum",
-                "timestamp":"first",
-                "author":"first",
-                "is_event":"first",
-            }
+                "message": [
+                    messages[start] if end - start == 1 else separator.join(filter(None, messages[start:end]))
+                    for start, end in zip(group_starts, group_ends)
+                ],
+                "timestamp": timestamps[group_starts],
+                "author": chat.author.to_numpy()[order][group_starts],
+                "is_event": chat.is_event.to_numpy()[order][group_starts],
+                "last_timestamp": timestamps[group_ends - 1],
+                "message_count": group_ends - group_starts,
+                "media_count": np.add.reduceat(is_media, group_starts) if len(group_starts) > 0 else np.array([], dtype=int)
+            },
+            index = group_ids[group_starts]
         )
         return grouped_chat
 
+    def event_types(self):
+        """ 
+        the event_type column of the cleaned_chat, classified with classify_event_types if RawChatCleaner().clean() was not asked to add it
+
+        return pd.Series<category>
+        """
+        if "event_type" not in self.cleaned_chat.columns:
+            self.cleaned_chat["event_type"] = classify_event_types(
+                self.cleaned_chat.message,
+                self.cleaned_chat.is_event
+            )
+        return self.cleaned_chat.event_type
+
+    def count_event_types(self, by_author=False):
+        """ 
+        counts the rows of each event_type, the counts are done on the categorical codes so no strings are scanned
+
+        by_author (bool): count each author separately, defaults to False
+
+        return pd.Series<int>
+        """
+        if by_author:
+            return self.event_types().groupby(
+                [self.cleaned_chat.author, self.event_types()],
+                observed = True
+            ).size()
+        return self.event_types().value_counts(sort=False)
+
+    def drop_event_types(self, event_types=["media_omitted", "deleted_message", "other_event", "encryption_notice"]):
+        """ 
+        removes rows of the given event types from the cleaned_chat
+
+        event_types (list<str>): the event types to drop, see EVENT_TYPES in cleaners.chat_cleaner
+
+        return pd.DataFrame
+        """
+        return self.cleaned_chat[~self.event_types().isin(event_types)]
+
+    def create_session_features(self, gap_minutes=60):
+        """ 
+        adds the session_id, reply_to_author and response_latency features from MessageRelationships to a copy of the cleaned_chat
+
+        gap_minutes (int): the number of minutes of inactivity that ends a session
+
+        return pd.DataFrame
+        """
+        feature_engine = MessageRelationships(self.cleaned_chat.copy())
+        feature_engine.df["session_id"] = feature_engine.create_session_id(gap_minutes=gap_minutes).to_numpy()
+        feature_engine.build_required_features(
+            [
+                "reply_to_author",
+                "response_latency"
+            ]
+        )
+        return feature_engine.df
+
+    def summarise_sessions(self, gap_minutes=60):
+        """ 
+        summarises each conversation session, see MessageRelationships.create_session_id
+
+        gap_minutes (int): the number of minutes of inactivity that ends a session
+
+        return pd.DataFrame (indexed by session_id)
+        """
+        session_chat = self.create_session_features(gap_minutes=gap_minutes)
+        session_messages = session_chat[~session_chat.is_event.astype(bool)]
+
+        sessions = session_chat.groupby("session_id").agg(
+            start = ("timestamp", "min"),
+            end = ("timestamp", "max"),
+            event_count = ("is_event", "sum")
+        )
+        sessions["duration"] = sessions.end - sessions.start
+        sessions = sessions.join(
+            session_messages.groupby("session_id").agg(
+                message_count = ("message", "count"),
+                participant_count = ("author", "nunique"),
+                reply_count = ("reply_to_author", "count")
+            )
+        )
+        sessions["median_response_latency"] = session_messages.dropna(subset=["response_latency"]).groupby("session_id").response_latency.median()
+        # participants are built from the unique (session, author) pairs so the per session work is proportional to the participants not the messages
+        sessions["participants"] = session_messages[["session_id", "author"]].drop_duplicates().groupby("session_id").author.agg(tuple)
+
+        count_columns = ["message_count", "participant_count", "reply_count"]
+        sessions[count_columns] = sessions[count_columns].fillna(0).astype(int)
+        return sessions
+
+    def response_time_distribution(self, gap_minutes=60, quantiles=[0.25, 0.5, 0.75, 0.9]):
+        """ 
+        the distribution of how long each author takes to reply to someone else within a session, see MessageRelationships.create_response_latency
+
+        gap_minutes (int): the number of minutes of inactivity that ends a session
+        quantiles (list<float>): the quantiles of response latency to return
+
+        return pd.DataFrame (indexed by author, latencies are timedeltas)
+        """
+        session_chat = self.create_session_features(gap_minutes=gap_minutes)
+        latency_by_author = session_chat.dropna(subset=["response_latency"]).groupby("author").response_latency
+
+        distribution = latency_by_author.agg(["count", "mean", "min", "max"])
+        return distribution.join(
+            latency_by_author.quantile(quantiles).unstack().rename(columns=lambda q: f"q{int(q*100)}")
+        )
+
+    def range_freq(self, freq):
+        """ 
+        the freq the author ranges of a timeseries are held in, w, m and y ranges are held in days and bucketed once expanded
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return str
+        """
+        if freq in ["h"] + self.high_resolution_freqs:
+            return freq
+        return "d"
+
+    def author_period_ranges(self, freq):
+        """ 
+        the first and last period key of each author, in the keys of range_freq(freq). every author covers the full day for h
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return pd.DataFrame (indexed by author with freq_min and freq_max columns)
+        """
+        if freq == "h":
+            authors = self.store.authors(self.chat_id) if self.store is not None else self.cleaned_chat.author.unique()
+            authors = pd.Series(authors).dropna()
+            return pd.DataFrame(
+                {"freq_min": 0, "freq_max": 23},
+                index = pd.Index(authors.to_numpy(), name="author")
+            )
+
+        range_freq = self.range_freq(freq)
+        if self.store is not None:
+            author_ranges = self.store.author_ranges(self.chat_id, freq=range_freq).apply(
+                lambda x: self.create_period_keys(pd.to_datetime(x).to_numpy(), range_freq)
+            )
+        else:
+            author_ranges = pd.Series(
+                self.period_keys(self.cleaned_chat, range_freq),
+                index = self.cleaned_chat.index
+            ).groupby(self.cleaned_chat.author).agg(["min", "max"])
+        author_ranges.columns = ["freq_min", "freq_max"]
+        return author_ranges
+
+    def expand_period_ranges(self, author_ranges, freq):
+        """ 
+        every period key between each authors first and last period, built with a single arange rather than a date_range per author
+
+        author_ranges (pd.DataFrame): the output of author_period_ranges
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return pd.DataFrame (author and period_key columns, sorted)
+        """
+        range_lengths = (author_ranges.freq_max - author_ranges.freq_min + 1).to_numpy()
+        range_offsets = np.arange(range_lengths.sum()) - np.repeat(np.cumsum(range_lengths) - range_lengths, range_lengths)
+        range_keys = np.repeat(author_ranges.freq_min.to_numpy(), range_lengths) + range_offsets
+        if self.range_freq(freq) == "d":
+            range_keys = self.create_period_keys(range_keys.astype("datetime64[D]"), freq)
+        full_range = pd.DataFrame(
+            {
+                "author": np.repeat(author_ranges.index.to_numpy(), range_lengths),
+                "period_key": range_keys
+            }
+        )
+        if self.range_freq(freq) == "d":
+            full_range = full_range.drop_duplicates()
+        return full_range.sort_values(["author", "period_key"], kind="stable").reset_index(drop=True)
 
     def create_full_ts_range(self, freq):
         """ 
-        creates rows for days|hours where no events or messages exist
+        creates rows for the periods where no events or messages exist
 
-        freq (str): fills missing hours if 'h' else fills missing days
+        freq (str): fills every hour of the day if 'h', every real hour or minute between each authors first and last message if 'H' or 'T', else fills missing days and buckets them into the freq
 
         return pd.MultiIndex
         """
+        full_range = self.expand_period_ranges(self.author_period_ranges(freq), freq)
+        return self.decode_period_index(full_range.author, full_range.period_key, freq)
+
+    @staticmethod
+    def create_period_keys(timestamps, freq):
+        """ 
+        converts timestamps into compact integer period keys using datetime64 arithmetic
 
-        # first we create a table informing us on what the min, max of each author is over the requested freq
+        h: hour of the day (0-23)
+        H: hours since the epoch
+        T: minutes since the epoch
+        d: days since the epoch
+        w: year * 100 + isoweek, the calendar year is used alongside the iso week
+        m: months since the epoch
+        y: the year
+
+        timestamps (np.ndarray<datetime64>): the timestamps to convert
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return np.ndarray<int>
+        """
+        timestamps = np.asarray(timestamps)
         if freq == "h":
-            # we create this author_ranges var for hours just so that everything is semetrical and no vars are called without being created first
-            author_ranges = pd.DataFrame(
-                [[a,0,23] for a in self.cleaned_chat.author.unique()],
-                columns = ["author","freq_min", "freq_max"]
-            ).set_index("author")
-            
-            range_creator = lambda x: pd.date_range(
-                datetime.today().replace(
-                    hour=0, 
-                    minute=0,
-                    second=0, 
-                    microsecond=0
-                ),
-                periods=24,
-                freq="h"
-            )
+            return timestamps.astype("datetime64[h]").astype(np.int64) % 24
+        if freq == "H":
+            return timestamps.astype("datetime64[h]").astype(np.int64)
+        if freq == "T":
+            return timestamps.astype("datetime64[m]").astype(np.int64)
+        if freq == "d":
+            return timestamps.astype("datetime64[D]").astype(np.int64)
+        if freq == "w":
+            epoch_days = timestamps.astype("datetime64[D]").astype(np.int64)
+            # the epoch was a thursday, the iso week of a day is the week its weeks thursday falls in
+            thursdays = epoch_days - (epoch_days + 3) % 7 + 3
+            thursday_years = thursdays.astype("datetime64[D]").astype("datetime64[Y]")
+            isoweeks = (thursdays - thursday_years.astype("datetime64[D]").astype(np.int64)) // 7 + 1
+            years = timestamps.astype("datetime64[Y]").astype(np.int64) + 1970
+            return years * 100 + isoweeks
+        if freq == "m":
+            return timestamps.astype("datetime64[M]").astype(np.int64)
+        if freq == "y":
+            return timestamps.astype("datetime64[Y]").astype(np.int64) + 1970
+        raise ValueError(f"unsupported freq: {freq}")
+
+    @staticmethod
+    def create_period_key(timestamp, freq):
+        """ 
+        the period key of a single timestamp, the key create_period_keys gives it computed from the fields of the timestamp rather than a one element array. used by the streaming processors for each message
+
+        timestamp (datetime): the timestamp to convert
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return int
+        """
+        if freq == "h":
+            return timestamp.hour
+        if freq in ["H", "T", "d"]:
+            epoch_days = timestamp.toordinal() - EPOCH_ORDINAL
+            if freq == "d":
+                return epoch_days
+            epoch_hours = epoch_days * 24 + timestamp.hour
+            return epoch_hours if freq == "H" else epoch_hours * 60 + timestamp.minute
+        if freq == "w":
+            # the calendar year is used alongside the iso week
+            return timestamp.year * 100 + timestamp.isocalendar()[1]
+        if freq == "m":
+            return (timestamp.year - 1970) * 12 + timestamp.month - 1
+        if freq == "y":
+            return timestamp.year
+        raise ValueError(f"unsupported freq: {freq}")
+
+    def period_keys(self, df, freq):
+        """ 
+        the integer period keys of a dataframes timestamp column. the keys of the cleaned_chat are cached so that making timeseries over several freqs, or grouping and reindexing the same chat, only derives them once
+
+        df (pd.DataFrame): a dataframe with a timestamp column
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return np.ndarray<int>
+        """
+        if (df is self._cleaned_chat) and (freq in self.period_key_cache):
+            return self.period_key_cache[freq]
+
+        if (df is self._cleaned_chat) and (self.key_source is not None):
+            source, rows = self.key_source
+            keys = source.period_keys(source.cleaned_chat, freq)[rows]
         else:
-            author_ranges = self.cleaned_chat.groupby("author").agg(
-                {
-                    "timestamp":["min","max"]
-                }
-            ).apply(lambda x: x.dt.date)
-            author_ranges.columns = ["freq_min", "freq_max"]
-            range_creator = lambda x: pd.date_range(x["freq_min"], x["freq_max"], freq="d")
-        
-        # now for each author we reindex to fill in missing freq, we add a synthetic_row column to indicate which rows have been created during this process
-
-        exploded_range = author_ranges.apply(
-            range_creator, 
-            axis = 1
-        ).explode().to_frame().reset_index()
-        exploded_range.columns = ["author","timestamp"]
-        full_index_range = self.group_by_ts_freq(
-            freq = freq,
-            df_to_index=exploded_range
-        ).index
-
-        return full_index_range
-    
+            keys = self.create_period_keys(df.timestamp.to_numpy(), freq)
+
+        if df is self._cleaned_chat:
+            self.period_key_cache[freq] = keys
+        return keys
+
+    @staticmethod
+    def decode_period_index(authors, keys, freq):
+        """ 
+        converts author, period key pairs into the labelled index used by make_timeseries. only the unique keys are decoded, it needs no chat so can be called on the class, e.g. ChatDataProcessor.decode_period_index(authors, keys, "d")
+
+        h: (author, hour), H and T: (author, timestamp), d: (author, date), w: (author, year, isoweek), m: (author, year, month), y: (author, year)
+
+        authors (array-like<str>): the author of each row
+        keys (array-like<int>): the period key of each row, see create_period_keys
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return pd.MultiIndex
+        """
+        key_codes, unique_keys = pd.factorize(np.asarray(keys))
+        unique_keys = unique_keys.astype(np.int64)
+        if freq == "h":
+            labels = {"hour": unique_keys}
+        elif freq == "H":
+            labels = {"timestamp": unique_keys.astype("datetime64[h]").astype("datetime64[ns]")}
+        elif freq == "T":
+            labels = {"timestamp": unique_keys.astype("datetime64[m]").astype("datetime64[ns]")}
+        elif freq == "d":
+            labels = {"date": pd.to_datetime(unique_keys.astype("datetime64[D]")).date}
+        elif freq == "w":
+            labels = {"year": unique_keys // 100, "isoweek": unique_keys % 100}
+        elif freq == "m":
+            labels = {"year": unique_keys // 12 + 1970, "month": unique_keys % 12 + 1}
+        else:
+            labels = {"year": unique_keys}
+
+        index_frame = pd.DataFrame({"author": np.asarray(authors)})
+        for name, values in labels.items():
+            index_frame[name] = np.asarray(values)[key_codes]
+        return pd.MultiIndex.from_frame(index_frame)
+
+    def encode_period_index(self, index, freq):
+        """ 
+        the inverse of decode_period_index, converts a labelled timeseries index back into author, period key pairs
+
+        index (pd.MultiIndex): an index built by decode_period_index
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return np.ndarray<str>, np.ndarray<int> (the authors and period keys)
+        """
+        authors = index.get_level_values("author").to_numpy()
+        if freq == "h":
+            keys = index.get_level_values("hour").to_numpy()
+        elif freq in self.high_resolution_freqs:
+            keys = self.create_period_keys(index.get_level_values("timestamp").to_numpy(), freq)
+        elif freq == "d":
+            keys = self.create_period_keys(pd.to_datetime(index.get_level_values("date")).to_numpy(), freq)
+        elif freq == "w":
+            keys = index.get_level_values("year").to_numpy() * 100 + index.get_level_values("isoweek").to_numpy()
+        elif freq == "m":
+            keys = (index.get_level_values("year").to_numpy() - 1970) * 12 + index.get_level_values("month").to_numpy() - 1
+        else:
+            keys = index.get_level_values("year").to_numpy()
+        return authors, np.asarray(keys, dtype=np.int64)
+
     def group_by_ts_freq(self, freq, agg={}, df_to_index=None):
         """ 
         creates a timeseries using the freq the author is present in the data
 
-        freq (str): the frequency of the timeseries data, supports h, d, w, m, y
-        agg (dict): keys are the column name after aggregating, values are lambda functions
+        the grouping is done on the integer period keys from period_keys, which are only decoded into dates, weeks etc once the data has been aggregated
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        agg (dict): keys are the column name after aggregating, values are lambda functions of each group or the name of a pandas aggregation (e.g. "sum") of the column with the same name
         df_to_index (pd.DataFrame): a dataframe to group over ts freq, just aggregates using a 'count'. this is used to group the full range over the same frequency as the cleaned_chat
 
         return pd.DataFrame
         """
-        groupby_freq = {
-            "h": lambda x: [
-                    x.author, 
-                    x.timestamp.dt.hour.rename("hour")
-                ],
-            "d": lambda x: [
-                    x.author, 
-                    x.timestamp.dt.date.rename("date")
-                ],
-            "w": lambda x: [
-                    x.author, 
-                    x.timestamp.dt.year.rename("year"), 
-                    x.timestamp.dt.isocalendar().week.rename("isoweek")
-                ],
-            "m": lambda x: [
-                    x.author, 
-                    x.timestamp.dt.year.rename("year"), 
-                    x.timestamp.dt.month.rename("month")
-                ],
-            "y": lambda x: [
-                    x.author, 
-                    x.timestamp.dt.year.rename("year")
-                ]
-        }
-
-        if df_to_index is None:
-            return self.cleaned_chat.groupby(
-                groupby_freq[freq](self.cleaned_chat)
-            ).apply(self.ts_agg, agg = agg)
-        return df_to_index.groupby(
-                groupby_freq[freq](df_to_index)
-            )['timestamp'].count()
-        
+        if (df_to_index is None) and (self.store is not None) and (len(agg) == 0):
+            return self.store.group_by_ts_freq(self.chat_id, freq)
+
+        df = self.cleaned_chat if df_to_index is None else df_to_index
+        group_keys = [
+            df.author,
+            pd.Series(self.period_keys(df, freq), index=df.index, name="period_key")
+        ]
+
+        if df_to_index is not None:
+            grouped = df_to_index.groupby(group_keys)["timestamp"].count()
+        elif any(callable(agg_func) for agg_func in agg.values()):
+            # the columns are selected so the lambdas still see the author column, which pandas otherwise warns it will drop from apply as a grouping column
+            grouped = df.groupby(group_keys)[list(df.columns)].apply(self.ts_agg, agg = agg)
+        else:
+            # string aggregations of existing columns, e.g. {"word_count": "sum"}, run in the same vectorized groupby as the default counts
+            grouped = df.assign(
+                is_event = df.is_event.astype(bool),
+                message_count = df.message.notnull()
+            ).groupby(group_keys).agg(
+                **{col: (col, agg_func) for col, agg_func in agg.items()},
+                event_count = ("is_event", "sum"),
+                message_count = ("message_count", "sum")
+            )
+            grouped["message_count"] -= grouped["event_count"]
+
+        grouped.index = self.decode_period_index(
+            grouped.index.get_level_values("author"),
+            grouped.index.get_level_values("period_key"),
+            freq
+        )
+        return grouped
     
     def ts_agg(self, frame, agg={}):
         """ 
@@ -159,13 +590,89 @@ class ChatDataProcessor():
         """ 
         converts chat data into a timeseries grouped over authors and a frequency
 
-        freq (str): the frequency of the timeseries data, supports h, d, w, m, y
-        agg (dict): keys are the column name after aggregating, values are lambda functions
+        h is a histogram over the hour of the day, H and T are real hourly and minute timeseries across the full date range. a multi year chat has millions of author x minute periods that are almost all empty, make_sparse_timeseries keeps only the observed ones
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        agg (dict): see group_by_ts_freq, column sums such as {"word_count": "sum"} are much faster than lambdas
 
         return pd.DataFrame
         """
         incomplete_ts = self.group_by_ts_freq(freq=freq, agg=agg)
         complete_ts_range = self.create_full_ts_range(freq=freq)
+        return self.fill_timeseries(incomplete_ts, complete_ts_range, freq)
+
+    def make_sparse_timeseries(self, freq, agg={}):
+        """ 
+        the timeseries of make_timeseries with only the aggregated periods and the range of each author kept, see SparseTimeseries. the empty periods are only built when SparseTimeseries.to_dense() is called, so the observed (author, period) keys are the only ones ever grouped or stored
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        agg (dict): see group_by_ts_freq
+
+        return SparseTimeseries
+        """
+        return SparseTimeseries.from_grouped(self, self.group_by_ts_freq(freq=freq, agg=agg), freq)
+
+    def approximate_timeseries(self, freq, fraction=0.05, min_period_sample=30, confidence=0.95, seed=0):
+        """
+        estimates the message_count of each author and period from a sample of the messages rather than grouping every message, for a quick look at a large chat
+
+        the messages are sampled per period with stratified_sample and only the sampled messages are grouped. periods with fewer than min_period_sample messages are counted exactly. only the author and period pairs seen in the sample are returned, the empty periods are not filled
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        fraction (float): see stratified_sample
+        min_period_sample (int): see stratified_sample
+        confidence (float): the confidence level of the bounds, see estimate_counts
+        seed (int): the seed of the random generator
+
+        return pd.DataFrame (indexed like make_timeseries with sampled_count, message_count, message_count_lower and message_count_upper columns)
+        """
+        chat = self.cleaned_chat
+        is_message = (chat.message.notnull() & ~chat.is_event.astype(bool)).to_numpy()
+        keys = self.period_keys(chat, freq)[is_message]
+        authors = chat.author.to_numpy()[is_message]
+
+        sample_positions, population_sizes = stratified_sample(keys, fraction, min_period_sample, seed)
+        estimates = estimate_counts(
+            pd.DataFrame({"author": authors[sample_positions], "period_key": keys[sample_positions]}),
+            population_sizes,
+            confidence
+        )
+        estimates.index = self.decode_period_index(estimates.author, estimates.period_key, freq)
+        return estimates.drop(columns=["author", "period_key"])
+
+    def approximate_top_authors(self, freq, n=3, fraction=0.05, min_period_sample=30, confidence=0.95, seed=0):
+        """
+        the most active authors of each period from approximate_timeseries, e.g. the top 3 authors of each month
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        n (int): the number of authors kept per period
+        fraction, min_period_sample, confidence, seed: see approximate_timeseries
+
+        return pd.DataFrame, see top_authors
+        """
+        return top_authors(
+            self.approximate_timeseries(
+                freq,
+                fraction = fraction,
+                min_period_sample = min_period_sample,
+                confidence = confidence,
+                seed = seed
+            ),
+            n = n
+        )
+
+    def fill_timeseries(self, incomplete_ts, complete_ts_range, freq):
+        """ 
+        places the aggregated periods into the full range, marking the periods that had no events or messages as synthetic rows
+
+        incomplete_ts (pd.DataFrame): the output of group_by_ts_freq
+        complete_ts_range (pd.MultiIndex): the output of create_full_ts_range
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return pd.DataFrame
+        """
+        if freq in self.high_resolution_freqs:
+            return self.fill_timeseries_by_position(incomplete_ts, complete_ts_range)
 
         # create an empty dataframe with the full time range
         complete_ts = pd.DataFrame(
@@ -180,3 +687,23 @@ class ChatDataProcessor():
         #fill nulls
         complete_ts = complete_ts.fillna(0)
         return complete_ts
+
+    def fill_timeseries_by_position(self, incomplete_ts, complete_ts_range):
+        """ 
+        places the aggregated periods into the full range by their position, the same output as the join in fill_timeseries without aligning an empty frame of the full range
+
+        incomplete_ts (pd.DataFrame): the output of group_by_ts_freq
+        complete_ts_range (pd.MultiIndex): the output of create_full_ts_range
+
+        return pd.DataFrame
+        """
+        positions = complete_ts_range.get_indexer(incomplete_ts.index)
+        complete_ts = pd.DataFrame(index=complete_ts_range)
+        for col in incomplete_ts.columns:
+            values = np.zeros(len(complete_ts_range))
+            values[positions] = incomplete_ts[col].to_numpy(dtype=float)
+            complete_ts[col] = values
+        synthetic_row = np.ones(len(complete_ts_range), dtype=bool)
+        synthetic_row[positions] = False
+        complete_ts["synthetic_row"] = synthetic_row
+        return complete_ts
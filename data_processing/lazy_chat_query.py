@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from feature_engineering.message_relationship import MessageRelationships
+
+
+class LazyChatQuery():
+
+    def __init__(self, processor, plan=[]):
+        """
+        a lazy query over a ChatDataProcessor. each builder method returns a new query with the step added to the plan, nothing is computed until collect()
+
+        when the plan is collected the filters are combined into a single mask and applied before any aggregation. message groups are always identified on the full chat, so a filter never merges messages that ChatDataProcessor.group_messages would keep apart, and filters after group_messages are tested against the group rather than its individual messages. the timeseries reuses the period keys the processor has cached for the cleaned_chat, they are only derived once however many queries are collected
+
+        e.g. processor.lazy().filter(authors=["tom"]).group_messages().timeseries("d").collect()
+
+        processor (ChatDataProcessor): the processor holding the cleaned_chat to query
+        plan (list<tuple>): the (step, kwargs) steps of the query in the order they were added
+        """
+        self.processor = processor
+        self.plan = list(plan)
+
+    def add_step(self, step, **kwargs):
+        return LazyChatQuery(self.processor, self.plan + [(step, kwargs)])
+
+    def filter(self, authors=None, start=None, end=None, include_events=True):
+        """
+        authors (list<str>): only include these authors
+        start (datetime): only include messages at or after this timestamp
+        end (datetime): only include messages before this timestamp
+        include_events (bool): include events, defaults to True
+
+        return LazyChatQuery
+        """
+        return self.add_step(
+            "filter",
+            authors = authors,
+            start = start,
+            end = end,
+            include_events = include_events
+        )
+
+    def group_messages(self, minute_threshold=1, separator=" "):
+        """
+        minute_threshold (int): see MessageRelationships.create_message_group_id
+        separator (str): see ChatDataProcessor.aggregate_message_groups
+
+        return LazyChatQuery
+        """
+        return self.add_step("group_messages", minute_threshold=minute_threshold, separator=separator)
+
+    def timeseries(self, freq, agg={}):
+        """
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        agg (dict): keys are the column name after aggregating, values are lambda functions
+
+        return LazyChatQuery
+        """
+        return self.add_step("timeseries", freq=freq, agg=agg)
+
+    def optimize(self):
+        """
+        reorders the plan so the filters run first, followed by the grouping and then the timeseries. only one group_messages and one timeseries step are allowed
+
+        return list<tuple>
+        """
+        step_order = ["filter", "group_messages", "timeseries"]
+        for step in step_order[1:]:
+            if sum(1 for s, _ in self.plan if s == step) > 1:
+                raise ValueError(f"a LazyChatQuery can only contain one {step} step")
+
+        grouped_before = set()
+        optimized = []
+        for i, (step, kwargs) in enumerate(self.plan):
+            if step == "timeseries" and any(s == "filter" for s, _ in self.plan[i+1:]):
+                raise ValueError("filters can not be applied after a timeseries step")
+            if step == "filter" and any(s == "group_messages" for s, _ in self.plan[:i]):
+                grouped_before.add(i)
+            optimized.append((step_order.index(step), i, step, kwargs))
+        return [
+            (step, dict(kwargs, after_grouping = i in grouped_before) if step == "filter" else kwargs)
+            for _, i, step, kwargs in sorted(optimized, key = lambda x: x[:2])
+        ]
+
+    def explain(self):
+        """
+        return list<str> (the optimized plan in execution order)
+        """
+        return [
+            f"{step}({', '.join(f'{k}={v!r}' for k, v in kwargs.items())})" for step, kwargs in self.optimize()
+        ]
+
+    def filter_mask(self, chat, filters, group_timestamps=None):
+        """
+        combines every filter into one boolean mask over the chat
+
+        chat (pd.DataFrame): the chat being filtered
+        filters (list<dict>): the kwargs of each filter step
+        group_timestamps (pd.Series<datetime>): the first timestamp of each message's group, used by filters after group_messages
+
+        return np.ndarray<bool>
+        """
+        mask = pd.Series(True, index=chat.index)
+        for f in filters:
+            timestamps = group_timestamps if (f["after_grouping"] and group_timestamps is not None) else chat.timestamp
+            if f["authors"] is not None:
+                mask &= chat.author.isin(f["authors"])
+            if f["start"] is not None:
+                mask &= timestamps >= pd.Timestamp(f["start"])
+            if f["end"] is not None:
+                mask &= timestamps < pd.Timestamp(f["end"])
+            if not f["include_events"]:
+                mask &= ~chat.is_event.astype(bool)
+        return mask.to_numpy()
+
+    def collect(self):
+        """
+        executes the plan
+
+        return pd.DataFrame (the filtered chat, grouped chat or timeseries depending on the last step)
+        """
+        plan = self.optimize()
+        steps = dict((step, kwargs) for step, kwargs in plan if step != "filter")
+        filters = [kwargs for step, kwargs in plan if step == "filter"]
+        chat = self.processor.cleaned_chat
+
+        if "group_messages" in steps:
+            feature_engine = MessageRelationships(chat[["timestamp", "author", "is_event"]].copy())
+            message_groups = feature_engine.create_message_group_id(minute_threshold=steps["group_messages"]["minute_threshold"])
+            group_timestamps = chat.timestamp.groupby(message_groups.to_numpy()).transform("first")
+            mask = self.filter_mask(chat, filters, group_timestamps)
+            result = self.processor.aggregate_message_groups(
+                chat[mask],
+                message_groups[mask].to_numpy(),
+                separator = steps["group_messages"]["separator"]
+            )
+            # each group takes the period keys of its first message, the groups of aggregate_message_groups are in group id order
+            _, first_messages = np.unique(message_groups[mask].to_numpy(), return_index=True)
+            rows = np.flatnonzero(mask)[first_messages]
+        else:
+            mask = self.filter_mask(chat, filters)
+            result = chat[mask] if len(filters) > 0 else chat
+            rows = np.flatnonzero(mask)
+
+        if "timeseries" in steps:
+            return self.processor.subset(result.reset_index(drop=True), rows).make_timeseries(**steps["timeseries"])
+        return result
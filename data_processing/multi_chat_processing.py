@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+from data_processing.chat_processing import ChatDataProcessor
+
+
+class MultiChatProcessor():
+
+    def __init__(self, resolver=None):
+        """
+        processes many chats together, the authors of every chat share one author dimension so a person in several chats has one author_id
+
+        each chat is kept as a fact table of integer and datetime columns (timestamp, author_id, is_event, has_message), the author strings are only stored once in the dimension. the cross chat results are vectorized groupbys over the concatenated integer columns, no object columns are concatenated
+
+        events have no author and are given the author_id -1, they are labelled with an empty author like the output of RawChatCleaner().clean()
+
+        resolver (AuthorAliasResolver): resolves the raw authors of each chat before they are added to the dimension, defaults to the raw authors
+        """
+        self.resolver = resolver
+        self.author_names = pd.Index([], dtype=object)
+        self.chat_ids = []
+        self.processors = {}
+        # a processor over an empty fact table, stands in for the facts when no chat has been added
+        self.empty_processor = ChatDataProcessor(
+            pd.DataFrame(
+                {
+                    "timestamp": pd.Series(dtype="datetime64[ns]"),
+                    "author_id": pd.Series(dtype=np.int32),
+                    "is_event": pd.Series(dtype=bool),
+                    "has_message": pd.Series(dtype=bool)
+                }
+            )
+        )
+
+    def add_chat(self, chat_id, cleaned_chat):
+        """
+        adds a chat, replacing any chat already added under chat_id
+
+        chat_id (str): the identifier of the chat
+        cleaned_chat (pd.DataFrame): the output of RawChatCleaner().clean()
+
+        return MultiChatProcessor (self)
+        """
+        authors = cleaned_chat.author if self.resolver is None else self.resolver.resolve(cleaned_chat.author)
+        authors = authors.where(authors != "")
+
+        # only the unique authors of the chat are looked up in, and appended to, the dimension
+        codes, uniques = pd.factorize(authors)
+        new_authors = uniques[self.author_names.get_indexer(uniques) == -1]
+        self.author_names = self.author_names.append(pd.Index(new_authors, dtype=object))
+        unique_ids = self.author_names.get_indexer(uniques)
+        author_ids = np.where(codes >= 0, unique_ids[codes] if len(unique_ids) else codes, -1).astype(np.int32)
+
+        facts = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(cleaned_chat.timestamp).to_numpy(),
+                "author_id": author_ids,
+                "is_event": cleaned_chat.is_event.astype(bool).to_numpy(),
+                "has_message": cleaned_chat.message.notnull().to_numpy()
+            }
+        )
+        if chat_id not in self.chat_ids:
+            self.chat_ids.append(chat_id)
+        # the ChatDataProcessor derives and caches the period keys of the facts for each freq
+        self.processors[chat_id] = ChatDataProcessor(facts)
+        return self
+
+    def author_table(self):
+        """
+        return pd.DataFrame (the author dimension, indexed by author_id)
+        """
+        return pd.DataFrame(
+            {"author": self.author_names.to_numpy()},
+            index = pd.RangeIndex(len(self.author_names), name="author_id")
+        )
+
+    def facts(self, chat_id):
+        """
+        chat_id (str): the identifier of the chat
+
+        return pd.DataFrame (the fact table of the chat)
+        """
+        return self.processors[chat_id].cleaned_chat
+
+    def fact_columns(self, columns, freq=None):
+        """
+        concatenates columns of every fact table along with the chat_code (the position of the chat in chat_ids)
+
+        columns (list<str>): the fact columns to concatenate
+        freq (str): also concatenate the period_key for this freq, see ChatDataProcessor.create_period_keys
+
+        return dict (column name: np.ndarray)
+        """
+        processors = [self.processors[chat_id] for chat_id in self.chat_ids] or [self.empty_processor]
+        chat_codes = np.concatenate(
+            [np.full(len(processor.cleaned_chat), code, dtype=np.int32) for code, processor in enumerate(processors)]
+        )
+        fact_columns = {"chat_code": chat_codes}
+        for col in columns:
+            fact_columns[col] = np.concatenate([processor.cleaned_chat[col].to_numpy() for processor in processors])
+        if freq is not None:
+            fact_columns["period_key"] = np.concatenate(
+                [processor.period_keys(processor.cleaned_chat, freq) for processor in processors]
+            )
+        return fact_columns
+
+    def decode_authors(self, author_ids):
+        """
+        author_ids (np.ndarray<int>): author_ids from the dimension, -1 for events
+
+        return np.ndarray<str>
+        """
+        return np.append(self.author_names.to_numpy(), "")[np.asarray(author_ids)]
+
+    def timeseries(self, freq, by_chat=False):
+        """
+        the event and message counts of every author across every chat, only the periods an author was active in are returned. with no chats added the frame is empty but keeps the index names
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        by_chat (bool): keep a chat_id level rather than summing each author over every chat, defaults to False
+
+        return pd.DataFrame (indexed like ChatDataProcessor.group_by_ts_freq, with a leading chat_id level if by_chat)
+        """
+        fact_columns = self.fact_columns(["author_id", "is_event", "has_message"], freq=freq)
+        group_columns = (["chat_code"] if by_chat else []) + ["author_id", "period_key"]
+        grouped = pd.DataFrame(fact_columns).assign(
+            message_count = lambda x: x.has_message & ~x.is_event
+        ).groupby(group_columns).agg(
+            event_count = ("is_event", "sum"),
+            message_count = ("message_count", "sum")
+        )
+
+        index = ChatDataProcessor.decode_period_index(
+            self.decode_authors(grouped.index.get_level_values("author_id")),
+            grouped.index.get_level_values("period_key"),
+            freq
+        )
+        if by_chat:
+            index_frame = index.to_frame(index=False)
+            index_frame.insert(0, "chat_id", np.asarray(self.chat_ids, dtype=object)[grouped.index.get_level_values("chat_code")])
+            index = pd.MultiIndex.from_frame(index_frame)
+        grouped.index = index
+        return grouped
+
+    def memberships(self):
+        """
+        the unique (chat_code, author_id) pairs of every author that sent a message or event in a chat
+
+        return pd.DataFrame
+        """
+        fact_columns = self.fact_columns(["author_id"])
+        memberships = pd.DataFrame(fact_columns).drop_duplicates()
+        return memberships[memberships.author_id >= 0]
+
+    def co_membership(self):
+        """
+        the number of chats each pair of authors have both been active in, only pairs sharing at least one chat are returned
+
+        return pd.DataFrame (author, other_author and shared_chats columns)
+        """
+        memberships = self.memberships()
+        pairs = memberships.merge(memberships, on="chat_code", suffixes=("", "_other"))
+        pairs = pairs[pairs.author_id != pairs.author_id_other]
+        shared_chats = pairs.groupby(["author_id", "author_id_other"]).size()
+        return pd.DataFrame(
+            {
+                "author": self.decode_authors(shared_chats.index.get_level_values("author_id")),
+                "other_author": self.decode_authors(shared_chats.index.get_level_values("author_id_other")),
+                "shared_chats": shared_chats.to_numpy()
+            }
+        )
+
+    def author_activity(self):
+        """
+        a summary of each author across every chat: the number of chats, messages and active days, and their first and last message
+
+        return pd.DataFrame (indexed by author)
+        """
+        fact_columns = self.fact_columns(["timestamp", "author_id", "has_message"], freq="d")
+        facts = pd.DataFrame(fact_columns)
+        facts = facts[facts.author_id >= 0]
+        activity = facts.groupby("author_id").agg(
+            chat_count = ("chat_code", "nunique"),
+            message_count = ("has_message", "sum"),
+            active_days = ("period_key", "nunique"),
+            first_timestamp = ("timestamp", "min"),
+            last_timestamp = ("timestamp", "max")
+        )
+        activity.index = pd.Index(self.decode_authors(activity.index), name="author")
+        return activity
@@ -0,0 +1,79 @@
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+
+
+def stratified_sample(keys, fraction=0.05, min_period_sample=30, seed=0):
+    """
+    a bernoulli sample of rows stratified by period, every row of a period is kept with the same probability. small periods are sampled at a higher rate so each period keeps at least around min_period_sample rows, periods with fewer rows than that are kept whole and counted exactly
+
+    keys (np.ndarray<int>): the period key of each row, see ChatDataProcessor.create_period_keys
+    fraction (float): the share of rows sampled from the larger periods
+    min_period_sample (int): the expected number of rows sampled from each period
+    seed (int): the seed of the random generator
+
+    return np.ndarray<int> (the positions of the sampled rows), pd.Series (the number of rows in each period, indexed by period key)
+    """
+    unique_keys, stratum_codes, population_sizes = np.unique(keys, return_inverse=True, return_counts=True)
+    probabilities = np.minimum(1, np.maximum(fraction, min_period_sample / population_sizes))
+    sampled = np.random.default_rng(seed).random(len(keys)) < probabilities[stratum_codes]
+    return np.flatnonzero(sampled), pd.Series(population_sizes, index=unique_keys)
+
+
+def estimate_counts(sample, population_sizes, confidence=0.95):
+    """
+    estimates the number of messages of each author and period from a sample of the messages of each period
+
+    within a period the share of the sampled messages written by an author estimates the share of all its messages they wrote. a bernoulli sample conditioned on its size is a simple random sample, so both the stratified_sample and a reservoir of each period use the same estimator: the period size times the sampled share, with wilson score bounds that include the finite population correction. a bound is never below the sampled count nor above the period size
+
+    sample (pd.DataFrame): the author and period_key of each sampled message
+    population_sizes (pd.Series): the number of messages in each period, indexed by period key
+    confidence (float): the confidence level of the bounds
+
+    return pd.DataFrame (author, period_key, sampled_count, message_count, message_count_lower, message_count_upper columns for every author and period in the sample)
+    """
+    estimates = sample.groupby(["author", "period_key"]).size().rename("sampled_count").reset_index()
+    sample_sizes = sample.groupby("period_key").size()
+
+    sampled_count = estimates.sampled_count.to_numpy(dtype=float)
+    sample_size = sample_sizes.reindex(estimates.period_key).to_numpy(dtype=float)
+    population_size = population_sizes.reindex(estimates.period_key).to_numpy(dtype=float)
+
+    share = sampled_count / sample_size
+    # sampling without replacement from a finite period shrinks the variance, which is the same as a larger sample. a period sampled whole has no error
+    finite_population_correction = np.where(
+        population_size > 1,
+        (population_size - sample_size) / np.maximum(population_size - 1, 1),
+        0
+    )
+    with np.errstate(divide="ignore"):
+        effective_size = np.where(finite_population_correction > 0, sample_size / finite_population_correction, np.inf)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    # wilson score bounds on the share, unlike a normal approximation they hold up for authors with only a few sampled messages
+    z_share = z**2 / effective_size
+    centre = (share + z_share / 2) / (1 + z_share)
+    half_width = z / (1 + z_share) * np.sqrt(share * (1 - share) / effective_size + z_share / (4 * effective_size))
+
+    estimates["message_count"] = population_size * share
+    estimates["message_count_lower"] = np.maximum(population_size * (centre - half_width), sampled_count)
+    estimates["message_count_upper"] = np.minimum(population_size * (centre + half_width), population_size)
+    return estimates
+
+
+def top_authors(estimates, n=3):
+    """
+    the authors with the most estimated messages in each period
+
+    estimates (pd.DataFrame): the output of ChatDataProcessor.approximate_timeseries, indexed by author and period
+    n (int): the number of authors kept per period
+
+    return pd.DataFrame (the rows of the top n authors, sorted by period then message_count descending)
+    """
+    period_levels = [name for name in estimates.index.names if name != "author"]
+    ranked = estimates.reset_index().sort_values(
+        period_levels + ["message_count", "author"],
+        ascending = [True]*len(period_levels) + [False, True],
+        kind = "stable"
+    )
+    ranked = ranked.groupby(period_levels, sort=False).head(n)
+    return ranked.set_index(list(estimates.index.names))
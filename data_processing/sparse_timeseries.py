@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+
+
+class SparseTimeseries():
+
+    def __init__(self, entries, ranges, freq, processor):
+        """
+        a timeseries held as the periods that had events or messages (a coo table of author, period key and the aggregated columns) plus the first and last period of each author. the empty periods make_timeseries fills with synthetic rows are never stored, they are only built when to_dense() is called
+
+        rolling and resample work on the stored periods directly, so the result of a long, mostly empty chat never has to be densified to be smoothed or bucketed
+
+        entries (pd.DataFrame): author and period_key columns followed by the aggregated columns, sorted by author and period_key
+        ranges (pd.DataFrame): the output of ChatDataProcessor.author_period_ranges(freq)
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        processor (ChatDataProcessor): the processor used to encode, decode and expand the period keys
+        """
+        self.entries = entries
+        self.ranges = ranges
+        self.freq = freq
+        self.processor = processor
+
+        # freqs whose consecutive periods have consecutive keys, rolling windows are counted in these keys
+        self.contiguous_freqs = ["H", "T", "d", "m", "y"]
+        # a freq can only be resampled into a freq of a higher rank, w is not resampled as its weeks cross months and years
+        self.resample_ranks = {"T": 0, "H": 1, "d": 2, "w": 3, "m": 3, "y": 4}
+        # the length of each range_freq in minutes, used to convert the author ranges when resampling
+        self.range_minutes = {"T": 1, "H": 60, "d": 1440}
+
+    @classmethod
+    def from_grouped(cls, processor, incomplete_ts, freq):
+        """
+        processor (ChatDataProcessor): the processor the timeseries was grouped with
+        incomplete_ts (pd.DataFrame): the output of ChatDataProcessor.group_by_ts_freq(freq)
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return SparseTimeseries
+        """
+        authors, keys = processor.encode_period_index(incomplete_ts.index, freq)
+        entries = pd.concat(
+            [
+                pd.DataFrame({"author": authors, "period_key": keys}),
+                incomplete_ts.reset_index(drop=True)
+            ],
+            axis = 1
+        ).sort_values(["author", "period_key"], kind="stable").reset_index(drop=True)
+        return cls(entries, processor.author_period_ranges(freq), freq, processor)
+
+    @property
+    def columns(self):
+        return list(self.entries.columns.drop(["author", "period_key"]))
+
+    @property
+    def nnz(self):
+        """
+        return int (the number of stored periods)
+        """
+        return len(self.entries)
+
+    def key_ranges(self):
+        """
+        the first and last period key of each author in the keys of freq rather than range_freq
+
+        return pd.DataFrame (indexed by author with key_min and key_max columns)
+        """
+        key_ranges = self.ranges.rename(columns={"freq_min": "key_min", "freq_max": "key_max"})
+        if self.processor.range_freq(self.freq) == "d":
+            key_ranges = key_ranges.apply(
+                lambda x: self.processor.create_period_keys(x.to_numpy().astype("datetime64[D]"), self.freq)
+            )
+        return key_ranges
+
+    def period_starts(self):
+        """
+        the start of each stored period
+
+        return np.ndarray<datetime64>
+        """
+        keys = self.entries.period_key.to_numpy()
+        if self.freq == "y":
+            return (keys - 1970).astype("datetime64[Y]")
+        units = {"H": "datetime64[h]", "T": "datetime64[m]", "d": "datetime64[D]", "m": "datetime64[M]"}
+        if self.freq not in units:
+            raise ValueError(f"the periods of freq {self.freq} do not have a start timestamp")
+        return keys.astype(units[self.freq])
+
+    def to_coo(self):
+        """
+        the stored periods in the format of ChatDataProcessor.group_by_ts_freq
+
+        return pd.DataFrame
+        """
+        coo = self.entries[self.columns].copy()
+        coo.index = self.processor.decode_period_index(self.entries.author, self.entries.period_key, self.freq)
+        return coo
+
+    def to_dense(self):
+        """
+        fills the empty periods of every author, the same output as ChatDataProcessor.make_timeseries(freq)
+
+        return pd.DataFrame
+        """
+        full_range = self.processor.expand_period_ranges(self.ranges, self.freq)
+        complete_ts_range = self.processor.decode_period_index(full_range.author, full_range.period_key, self.freq)
+        return self.processor.fill_timeseries(self.to_coo(), complete_ts_range, self.freq)
+
+    def rolling(self, window, columns=None):
+        """
+        rolling sums over the last window periods of each author, the same values as a dense rolling(window, min_periods=1).sum() per author
+
+        only the periods inside the window of a stored period can be non zero, so those are the only ones computed. each sum is the difference of two positions in a cumulative sum of the stored periods
+
+        window (int): the number of periods in the window, including the current one
+        columns (list<str>): the columns to sum, defaults to every column
+
+        return SparseTimeseries
+        """
+        if self.freq not in self.contiguous_freqs:
+            raise ValueError(f"rolling is not supported for freq {self.freq}, use one of {self.contiguous_freqs}")
+        columns = self.columns if columns is None else columns
+
+        key_ranges = self.key_ranges()
+        author_codes = pd.Categorical(self.entries.author, categories=key_ranges.index).codes.astype(np.int64)
+        keys = self.entries.period_key.to_numpy()
+        order = np.lexsort((keys, author_codes))
+        author_codes, keys = author_codes[order], keys[order]
+
+        # every period inside the window of a stored period, up to the authors last period
+        candidate_codes = np.repeat(author_codes, window)
+        candidate_keys = np.repeat(keys, window) + np.tile(np.arange(window), len(keys))
+        in_range = candidate_keys <= key_ranges.key_max.to_numpy()[candidate_codes]
+        candidates = pd.DataFrame(
+            {"author_code": candidate_codes[in_range], "period_key": candidate_keys[in_range]}
+        ).drop_duplicates().sort_values(["author_code", "period_key"])
+
+        # author codes and keys are combined into one sorted position so that a window never crosses into another author
+        base = (keys.min() if len(keys) else 0) - window
+        span = (keys.max() - keys.min() if len(keys) else 0) + 2*window + 1
+        entry_positions = author_codes*span + keys - base
+        candidate_positions = candidates.author_code.to_numpy()*span + candidates.period_key.to_numpy() - base
+        upper = np.searchsorted(entry_positions, candidate_positions, side="right")
+        lower = np.searchsorted(entry_positions, candidate_positions - window, side="right")
+
+        rolled = pd.DataFrame(
+            {
+                "author": key_ranges.index.to_numpy()[candidates.author_code.to_numpy()],
+                "period_key": candidates.period_key.to_numpy()
+            }
+        )
+        for col in columns:
+            cumulative = np.concatenate([[0], np.cumsum(self.entries[col].to_numpy()[order])])
+            rolled[col] = cumulative[upper] - cumulative[lower]
+        return SparseTimeseries(rolled, self.ranges, self.freq, self.processor)
+
+    def resample(self, freq):
+        """
+        sums the stored periods into a lower frequency, e.g. T into H, H into d or d into w, m or y. only the stored periods are bucketed
+
+        freq (str): the frequency to resample into
+
+        return SparseTimeseries
+        """
+        if (self.freq not in self.resample_ranks) or (self.freq == "w") or (freq not in self.resample_ranks) or (self.resample_ranks[freq] <= self.resample_ranks[self.freq]):
+            raise ValueError(f"cannot resample freq {self.freq} into {freq}")
+
+        resampled = self.entries.assign(
+            period_key = self.processor.create_period_keys(self.period_starts(), freq)
+        ).groupby(["author", "period_key"], sort=True)[self.columns].sum().reset_index()
+
+        # the author ranges are converted into the range_freq of the new freq, w, m and y ranges stay in days
+        ranges = self.ranges
+        old_range_freq, new_range_freq = self.processor.range_freq(self.freq), self.processor.range_freq(freq)
+        if old_range_freq != new_range_freq:
+            ranges = ranges * self.range_minutes[old_range_freq] // self.range_minutes[new_range_freq]
+        return SparseTimeseries(resampled, ranges, freq, self.processor)
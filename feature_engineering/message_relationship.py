@@ -1,21 +1,81 @@
 import pandas as pd
 from datetime import timedelta
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
+
+def author_features_shard(author_codes, timestamps, previous_codes, previous_timestamps):
+    """ 
+    the per author features of the messages of a set of authors, kept at module level so shards can be sent to a process pool
+
+    the rows are stably sorted by author code, so each authors messages stay in chat order and the features are shifts and running counts within each run of equal codes
+
+    author_codes (np.ndarray<int>): the author code of each message, in chat order
+    timestamps (np.ndarray<datetime64>): the timestamp of each message
+    previous_codes (np.ndarray<int>): the author code of the message before each message in the whole chat, -1 for the first message
+    previous_timestamps (np.ndarray<datetime64>): the timestamp of the message before each message in the whole chat
+
+    return np.ndarray<timedelta64> (time_since_author_previous_message), np.ndarray<timedelta64> (author_reply_latency), np.ndarray<int> (author_streak_length)
+    """
+    order = np.argsort(author_codes, kind="stable")
+    codes = author_codes[order]
+    sorted_timestamps = timestamps[order]
+    positions = np.arange(len(codes))
+
+    same_author_before = np.concatenate([[False], codes[1:] == codes[:-1]])
+    shifted_timestamps = np.concatenate([sorted_timestamps[:1], sorted_timestamps[:-1]])
+    time_since_author_previous = np.where(
+        same_author_before,
+        sorted_timestamps - shifted_timestamps,
+        np.timedelta64("NaT")
+    )
+
+    # a turn starts when the message before it in the chat was from someone else, the first message of every author starts one
+    turn_starts = previous_codes[order] != codes
+    reply_latency = np.where(
+        turn_starts & (previous_codes[order] >= 0),
+        sorted_timestamps - previous_timestamps[order],
+        np.timedelta64("NaT")
+    )
+    streak_length = positions - np.maximum.accumulate(np.where(turn_starts, positions, 0)) + 1
+
+    outputs = []
+    for sorted_values in [time_since_author_previous, reply_latency, streak_length]:
+        values = np.empty_like(sorted_values)
+        values[order] = sorted_values
+        outputs.append(values)
+    return tuple(outputs)
+
+
 class MessageRelationships():
 
-    def __init__(self, df):
+    def __init__(self, df, n_workers=1, min_parallel_messages=1000000):
         """ 
         df is expected to be the output of RawChatCleaner.clean()
+
+        n_workers (int): the number of processes the per author features are sharded across, see create_author_features. 1 runs in the current process
+        min_parallel_messages (int): chats with fewer messages than this are run in the current process whatever n_workers is, the single pass takes well under a second below it so the shards cost more to send than they save
         """ 
 
         self.df = df
+        self.n_workers = n_workers
+        self.min_parallel_messages = min_parallel_messages
+        self.executor = None
+        self.author_features = None
         self.features = {
             "time_since_previous_message": self.create_time_since_previous_message,
             "time_to_next_message": self.create_time_to_next_message,
             "previous_message_author": self.create_previous_message_author,
             "next_message_author": self.create_next_message_author,
-            "message_group_id": self.create_message_group_id
+            "message_group_id": self.create_message_group_id,
+            "author_messages_past_hour": self.create_author_messages_past_hour,
+            "author_messages_past_week": self.create_author_messages_past_week,
+            "session_id": self.create_session_id,
+            "reply_to_author": self.create_reply_to_author,
+            "response_latency": self.create_response_latency,
+            "time_since_author_previous_message": self.create_time_since_author_previous_message,
+            "author_reply_latency": self.create_author_reply_latency,
+            "author_streak_length": self.create_author_streak_length
         }
         self.future_data_leak_features = [
             "time_to_next_message",
@@ -70,8 +130,6 @@ class MessageRelationships():
 
         minute_threshold (int): the number of minutes between consecutive messages of the same author that should have the same group_id
 
-        TODO: this feature could take a while to build as it doesnt use the pd.DataFrame.apply method. may need to optimize in the future
-
         return pd.Series<int>
         """
         required_features = [
@@ -86,15 +144,205 @@ class MessageRelationships():
             (self.df.time_to_next_message<=timedelta(minutes=minute_threshold))
         )
 
-        curr_join_bools, nxt_join_bools = join_bools, np.roll(join_bools, 1)
+        # a message starts a new group when the message before it did not join onto it, so the group_id is the number of group ends before each message
+        group_ends = (~join_bools).to_numpy().astype(int)
+        group_ids = np.cumsum(group_ends) - group_ends
 
-        group_id = 0
-        group_ids = []
-        for curr_join, nxt_join in zip(curr_join_bools, nxt_join_bools):
-            group_ids.append(group_id)
-            if curr_join and nxt_join:
-                continue
-            if not curr_join:
-                group_id += 1
-        
         return pd.Series(group_ids)
+
+    def create_session_id(self, gap_minutes=60):
+        """ 
+        splits the chat into conversation sessions, a new session starts whenever the chat has been inactive for longer than gap_minutes
+
+        gap_minutes (int): the number of minutes of inactivity that ends a session
+
+        return pd.Series<int>
+        """
+        required_features = [
+            "time_since_previous_message"
+        ]
+        self.build_required_features(required_features)
+
+        session_starts = (
+            self.df.time_since_previous_message.isnull()|
+            (self.df.time_since_previous_message>timedelta(minutes=gap_minutes))
+        ).to_numpy()
+        return pd.Series(np.cumsum(session_starts) - 1)
+
+    def create_reply_to_author(self):
+        """ 
+        a heuristic for who a message is replying to, the author of the previous message if it was someone else in the same session. messages following on from the same author, events and the first message of a session have no reply_to_author
+
+        return pd.Series<str>
+        """
+        required_features = [
+            "previous_message_author",
+            "session_id"
+        ]
+        self.build_required_features(required_features)
+
+        is_reply = (
+            self.df.previous_message_author.notnull()&
+            (self.df.author!=self.df.previous_message_author)&
+            (~self.df.is_event.astype(bool))&
+            (~self.df.is_event.astype(bool).shift(fill_value=True))&
+            (self.df.session_id==self.df.session_id.shift())
+        )
+        return self.df.previous_message_author.where(is_reply)
+
+    def create_response_latency(self):
+        """ 
+        the time taken to reply to another author, only defined for messages with a reply_to_author
+
+        return pd.Series<timedelta>
+        """
+        required_features = [
+            "time_since_previous_message",
+            "reply_to_author"
+        ]
+        self.build_required_features(required_features)
+
+        return self.df.time_since_previous_message.where(self.df.reply_to_author.notnull())
+
+    def create_rolling_author_message_counts(self, windows=["30min", "7d"]):
+        """ 
+        counts the messages each author has sent over trailing windows, evaluated at every message. the count includes the current message and only looks backwards so it does not leak future information
+
+        the messages are sorted once by author code then timestamp, so each authors messages are a contiguous block and the start of every window is found with np.searchsorted inside the block. the work is one O(n log n) sort rather than a pass over the chat per author
+
+        events are not counted and have a null count
+
+        windows (list<str>): the window lengths, any string accepted by pd.Timedelta e.g. 30min, 1h, 7d
+
+        return pd.DataFrame (one column per window named author_messages_past_<window>)
+        """
+        window_lengths = [pd.Timedelta(w).to_timedelta64() for w in windows]
+        counts = np.full((len(self.df), len(windows)), np.nan)
+
+        author_codes, _ = pd.factorize(self.df.author)
+        rows = np.flatnonzero((~self.df.is_event.astype(bool)).to_numpy() & (author_codes >= 0))
+        timestamps = self.df.timestamp.to_numpy()[rows]
+        # lexsort is stable so messages sent in the same minute keep their chat order
+        order = np.lexsort((timestamps, author_codes[rows]))
+        rows, timestamps, sorted_codes = rows[order], timestamps[order], author_codes[rows][order]
+
+        block_starts = np.flatnonzero(np.concatenate([[True], sorted_codes[1:] != sorted_codes[:-1]])) if len(rows) > 0 else np.array([], dtype=int)
+        block_ends = np.append(block_starts[1:], len(rows)).astype(int)
+        for start, end in zip(block_starts, block_ends):
+            author_timestamps = timestamps[start:end]
+            positions = np.arange(end - start)
+            for i, window_length in enumerate(window_lengths):
+                window_starts = np.searchsorted(
+                    author_timestamps,
+                    author_timestamps - window_length,
+                    side="right"
+                )
+                counts[rows[start:end], i] = positions - window_starts + 1
+
+        return pd.DataFrame(
+            counts,
+            index = self.df.index,
+            columns = [f"author_messages_past_{w}" for w in windows]
+        )
+
+    def create_author_messages_past_hour(self):
+        """ 
+        return pd.Series<float>
+        """
+        return self.create_rolling_author_message_counts(["1h"]).iloc[:, 0].rename(None)
+
+    def create_author_messages_past_week(self):
+        """ 
+        return pd.Series<float>
+        """
+        return self.create_rolling_author_message_counts(["7d"]).iloc[:, 0].rename(None)
+
+    def create_author_features(self):
+        """ 
+        per author versions of the message features, built for every author at once and cached for the df
+
+        time_since_author_previous_message: the time since the authors own previous message
+        author_reply_latency: for the message that starts an authors turn, the time since the message from another author before it. unlike response_latency it is not split by session
+        author_streak_length: the number of messages in a row the author has sent up to and including this message
+
+        events are skipped, they do not break a streak and their features are null. every feature only looks backwards so none leak future information
+
+        the authors are factorized to integer codes and the features are shifts within each authors rows, see author_features_shard. with n_workers > 1 and at least min_parallel_messages messages the authors are dealt across the workers in order of message count and each worker computes the features of its authors. the worker pool is started once and kept until close
+
+        return pd.DataFrame (time_since_author_previous_message, author_reply_latency and author_streak_length columns)
+        """
+        if (self.author_features is not None) and (self.author_features[0] is self.df):
+            return self.author_features[1]
+
+        author_codes, _ = pd.factorize(self.df.author.where(self.df.author != ""))
+        rows = np.flatnonzero((~self.df.is_event.astype(bool)).to_numpy() & (author_codes >= 0))
+        message_codes = author_codes[rows]
+        timestamps = self.df.timestamp.to_numpy()[rows]
+        previous_codes = np.concatenate([[-1], message_codes[:-1]])
+        previous_timestamps = np.concatenate([timestamps[:1], timestamps[:-1]])
+
+        if (self.n_workers <= 1) or (len(rows) < self.min_parallel_messages):
+            shards = [np.arange(len(rows))]
+            outputs = [author_features_shard(message_codes, timestamps, previous_codes, previous_timestamps)]
+        else:
+            author_order = np.argsort(-np.bincount(message_codes), kind="stable")
+            author_shards = np.empty(len(author_order), dtype=np.int64)
+            author_shards[author_order] = np.arange(len(author_order)) % self.n_workers
+            shards = [np.flatnonzero(author_shards[message_codes] == shard) for shard in range(self.n_workers)]
+            shards = [shard for shard in shards if len(shard) > 0]
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers = self.n_workers)
+            outputs = list(
+                self.executor.map(
+                    author_features_shard,
+                    [message_codes[shard] for shard in shards],
+                    [timestamps[shard] for shard in shards],
+                    [previous_codes[shard] for shard in shards],
+                    [previous_timestamps[shard] for shard in shards]
+                )
+            )
+
+        time_since_author_previous = np.full(len(self.df), np.timedelta64("NaT"), dtype="timedelta64[ns]")
+        reply_latency = np.full(len(self.df), np.timedelta64("NaT"), dtype="timedelta64[ns]")
+        streak_length = np.full(len(self.df), np.nan)
+        for shard, (shard_time_since, shard_latency, shard_streak) in zip(shards, outputs):
+            time_since_author_previous[rows[shard]] = shard_time_since
+            reply_latency[rows[shard]] = shard_latency
+            streak_length[rows[shard]] = shard_streak
+
+        author_features = pd.DataFrame(
+            {
+                "time_since_author_previous_message": time_since_author_previous,
+                "author_reply_latency": reply_latency,
+                "author_streak_length": streak_length
+            },
+            index = self.df.index
+        )
+        self.author_features = (self.df, author_features)
+        return author_features
+
+    def create_time_since_author_previous_message(self):
+        """ 
+        return pd.Series<timedelta>
+        """
+        return self.create_author_features()["time_since_author_previous_message"].rename(None)
+
+    def create_author_reply_latency(self):
+        """ 
+        return pd.Series<timedelta>
+        """
+        return self.create_author_features()["author_reply_latency"].rename(None)
+
+    def create_author_streak_length(self):
+        """ 
+        return pd.Series<float>
+        """
+        return self.create_author_features()["author_streak_length"].rename(None)
+
+    def close(self):
+        """ 
+        shuts down the worker pool of create_author_features, if one was started
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
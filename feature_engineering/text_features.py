@@ -0,0 +1,218 @@
+import re
+import importlib.util
+import numpy as np
+import pandas as pd
+from pipeline.message_batches import MessageCache, BatchWorkerPool, hash_message
+
+
+MEDIA_OMITTED = "__Media_Omitted__"
+
+# RawChatCleaner.translate_emojis writes emojis as :name: surrounded by whitespace, so a token has to be whitespace delimited to be an emoji
+EMOJI_TOKEN_REGEXP = re.compile(
+    r"(?<!\S):[^\s:]+:(?!\S)"
+)
+WORD_REGEXP = re.compile(
+    r"[^\W_]+(?:'[^\W_]+)*"
+)
+URL_REGEXP = re.compile(
+    r"(?:https?://|www\.)\S+",
+    re.IGNORECASE
+)
+TEXT_FEATURE_COLUMNS = [
+    "word_count",
+    "emoji_count",
+    "has_url",
+    "has_media",
+    "sentiment_polarity",
+    "sentiment_subjectivity"
+]
+
+
+def load_textblob_sentiment():
+    """
+    return function|None (message<str> -> (polarity, subjectivity), None when textblob is not installed)
+    """
+    try:
+        from textblob import TextBlob
+    except ImportError:
+        return None
+
+    def textblob_sentiment(message):
+        sentiment = TextBlob(message).sentiment
+        return sentiment.polarity, sentiment.subjectivity
+    return textblob_sentiment
+
+
+def compute_text_features(message, sentiment=None):
+    """
+    message (str): a cleaned or grouped message
+    sentiment (function): message<str> -> (polarity, subjectivity), see load_textblob_sentiment
+
+    return tuple (word_count, emoji_count, has_url, has_media, sentiment_polarity, sentiment_subjectivity)
+    """
+    emoji_count = len(EMOJI_TOKEN_REGEXP.findall(message))
+    text = URL_REGEXP.sub(" ", EMOJI_TOKEN_REGEXP.sub(" ", message.replace(MEDIA_OMITTED, " ")))
+    polarity, subjectivity = sentiment(text) if sentiment is not None else (np.nan, np.nan)
+    return (
+        len(WORD_REGEXP.findall(text)),
+        emoji_count,
+        URL_REGEXP.search(message) is not None,
+        MEDIA_OMITTED in message,
+        polarity,
+        subjectivity
+    )
+
+
+def text_features_batch(sentiment, messages):
+    return [compute_text_features(m, sentiment) for m in messages]
+
+
+class MessageTextFeatures():
+
+    def __init__(self, cache_loc=":memory:", batch_size=1000, n_workers=1, sentiment_factory=load_textblob_sentiment, sentiment_model=None):
+        """
+        per message text features for the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages()
+
+        word_count: the number of words, emojis, urls and media omitted markers are not words
+        emoji_count: the number of demojized :name: tokens
+        has_url: the message contains a link
+        has_media: the message is, or for grouped messages contains, a media omitted message
+        sentiment_polarity, sentiment_subjectivity: the textblob sentiment, null when textblob is not installed
+
+        identical messages are only scored once and events are skipped. the messages are scored in batches spread across n_workers processes, whose pool is kept until close, and stored in an sqlite cache keyed by a hash of the message, so re-running over a chat only scores new messages
+
+        the columns are numbers and bools so they can be summed by ChatDataProcessor().make_timeseries(freq, agg={"word_count": "sum"}) without a per group lambda
+
+        cache_loc (str): the file path of the sqlite cache, defaults to an in memory cache
+        batch_size (int): the number of messages in each batch
+        n_workers (int): the number of worker processes, 1 runs in the current process
+        sentiment_factory (function): called once per process to load a message<str> -> (polarity, subjectivity) function, or to return None to skip sentiment. must be picklable when n_workers > 1
+        sentiment_model (str): the name the cached rows of a custom sentiment_factory are stored under, required with a custom sentiment_factory as two lambdas or partials can not be told apart
+        """
+        if (sentiment_factory not in [None, load_textblob_sentiment]) and (sentiment_model is None):
+            raise ValueError("a sentiment_model name must be given with a custom sentiment_factory so its cached rows are kept apart from other models")
+        self.cache_loc = cache_loc
+        self.batch_size = batch_size
+        self.n_workers = n_workers
+        self.sentiment_factory = sentiment_factory
+        self.sentiment_model_name = sentiment_model
+        self.cache = MessageCache(
+            cache_loc,
+            "text_features",
+            ("sentiment_model", "TEXT NOT NULL"),
+            [
+                ("word_count", "INTEGER NOT NULL"),
+                ("emoji_count", "INTEGER NOT NULL"),
+                ("has_url", "INTEGER NOT NULL"),
+                ("has_media", "INTEGER NOT NULL"),
+                ("sentiment_polarity", "REAL"),
+                ("sentiment_subjectivity", "REAL")
+            ]
+        )
+        self.pool = BatchWorkerPool(text_features_batch, sentiment_factory, n_workers=n_workers)
+
+    @property
+    def sentiment_model(self):
+        """
+        the name the cached rows are stored under, rows scored without sentiment are kept apart from rows scored with it
+
+        return str
+        """
+        if self.sentiment_factory is None:
+            return "none"
+        if self.sentiment_model_name is not None:
+            return self.sentiment_model_name
+        return "textblob" if importlib.util.find_spec("textblob") is not None else "none"
+
+    def hash_message(self, message):
+        """
+        return str
+        """
+        return hash_message(message)
+
+    def read_cache(self, message_hashes):
+        """
+        message_hashes (list<str>): the hashes to look up
+
+        return dict<str, tuple> (message_hash: features)
+        """
+        return self.cache.read(message_hashes, self.sentiment_model)
+
+    def write_cache(self, features):
+        """
+        features (dict<str, tuple>): message_hash: features
+        """
+        self.cache.write(
+            {
+                message_hash: (int(w), int(e), int(u), int(m), None if p != p else p, None if s != s else s)
+                for message_hash, (w, e, u, m, p, s) in features.items()
+            },
+            self.sentiment_model
+        )
+
+    def run_batches(self, batches):
+        """
+        scores the batches, in this process if n_workers is 1 otherwise across a process pool that is kept for later calls, see BatchWorkerPool
+
+        batches (list<list<str>>): the batches to score
+
+        return list<list<tuple>>
+        """
+        return self.pool.run(batches)
+
+    def create_features(self, chat):
+        """
+        scores every message in the chat, only messages that are not already cached are scored
+
+        chat (pd.DataFrame): the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages()
+
+        return pd.DataFrame (the TEXT_FEATURE_COLUMNS, with 0, False and null for events)
+        """
+        to_score = (~chat.is_event.astype(bool) & chat.message.notnull()).to_numpy()
+        # a categorical message column is factorized on its codes, only the categories that are scored are hashed
+        codes, unique_messages = pd.factorize(chat.message.where(to_score))
+        unique_messages = np.asarray(unique_messages, dtype=object)
+        message_hashes = [self.hash_message(m) for m in unique_messages]
+
+        cached = self.read_cache(message_hashes)
+        new_messages = list(dict.fromkeys(m for m, h in zip(unique_messages, message_hashes) if h not in cached))
+        batches = [new_messages[i:i+self.batch_size] for i in range(0, len(new_messages), self.batch_size)]
+        scored = {}
+        if len(batches) > 0:
+            for batch, outputs in zip(batches, self.run_batches(batches)):
+                for message, output in zip(batch, outputs):
+                    scored[self.hash_message(message)] = output
+            self.write_cache(scored)
+        cached.update(scored)
+
+        unique_features = pd.DataFrame(
+            [cached[h] for h in message_hashes] + [(0, 0, False, False, np.nan, np.nan)],
+            columns = TEXT_FEATURE_COLUMNS
+        ).astype(
+            {
+                "word_count": np.int64,
+                "emoji_count": np.int64,
+                "has_url": bool,
+                "has_media": bool,
+                "sentiment_polarity": float,
+                "sentiment_subjectivity": float
+            }
+        )
+        # the unscored rows have a code of -1 which takes the last, empty, row
+        features = unique_features.iloc[codes].set_index(chat.index)
+        return features
+
+    def add_features(self, chat):
+        """
+        chat (pd.DataFrame): the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages()
+
+        return pd.DataFrame (a copy of chat with the TEXT_FEATURE_COLUMNS)
+        """
+        return chat.join(self.create_features(chat))
+
+    def close(self):
+        """
+        shuts down the worker pool, if one was started, and closes the cache
+        """
+        self.pool.close()
+        self.cache.close()
@@ -0,0 +1,249 @@
+import re
+import hashlib
+import numpy as np
+
+
+class CountMinSketch():
+
+    def __init__(self, width=2048, depth=4):
+        """
+        approximate token counts in a fixed width x depth table of counters. estimates never undercount and overcount by at most 2/width of the total count with probability 1 - 0.5^depth
+
+        the hashing is deterministic so sketches built in different processes or on different chunks of a chat can be merged
+
+        width (int): the number of counters in each row
+        depth (int): the number of rows, each with its own hash
+        """
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.total = 0
+
+    def hash_token(self, token):
+        """
+        the counter index of the token in each row, built from two 64 bit hashes as h1 + row * h2
+
+        token (str): the token to hash
+
+        return np.ndarray<int>
+        """
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return np.array([(h1 + row * h2) % self.width for row in range(self.depth)])
+
+    def add(self, token, count=1):
+        self.table[np.arange(self.depth), self.hash_token(token)] += count
+        self.total += count
+
+    def estimate(self, token):
+        """
+        return int
+        """
+        return int(self.table[np.arange(self.depth), self.hash_token(token)].min())
+
+    def merge(self, other):
+        """
+        adds the counts of another sketch with the same width and depth into this one
+
+        other (CountMinSketch): the sketch to merge
+
+        return CountMinSketch (self)
+        """
+        if (self.width != other.width) or (self.depth != other.depth):
+            raise ValueError("only sketches with the same width and depth can be merged")
+        self.table += other.table
+        self.total += other.total
+        return self
+
+
+class SpaceSaving():
+
+    def __init__(self, k=50):
+        """
+        the space saving heavy hitter algorithm, keeps at most k tokens with their counts. when a new token arrives and the summary is full it replaces the token with the lowest count and inherits that count as its error, so any token with a true count above total/k is always kept
+
+        k (int): the number of tokens to keep
+        """
+        self.k = k
+        self.counts = {}
+        self.errors = {}
+
+    def add(self, token, count=1):
+        if token in self.counts:
+            self.counts[token] += count
+        elif len(self.counts) < self.k:
+            self.counts[token] = count
+            self.errors[token] = 0
+        else:
+            evicted = min(self.counts, key=self.counts.get)
+            evicted_count = self.counts.pop(evicted)
+            del self.errors[evicted]
+            self.counts[token] = evicted_count + count
+            self.errors[token] = evicted_count
+
+    def top(self, n=10):
+        """
+        n (int): the number of tokens to return
+
+        return list<tuple> (token, count, error) sorted by count, the true count is between count - error and count
+        """
+        return [
+            (token, count, self.errors[token]) for token, count in sorted(self.counts.items(), key=lambda x: -x[1])[:n]
+        ]
+
+    def merge(self, other):
+        """
+        merges another summary into this one. tokens missing from one summary are given that summaries smallest count as a bound, then the k largest are kept
+
+        other (SpaceSaving): the summary to merge
+
+        return SpaceSaving (self)
+        """
+        self_floor = min(self.counts.values()) if len(self.counts) >= self.k else 0
+        other_floor = min(other.counts.values()) if len(other.counts) >= other.k else 0
+        counts = {}
+        errors = {}
+        for token in set(self.counts) | set(other.counts):
+            counts[token] = self.counts.get(token, self_floor) + other.counts.get(token, other_floor)
+            errors[token] = self.errors.get(token, self_floor) + other.errors.get(token, other_floor)
+        kept = sorted(counts, key=lambda t: -counts[t])[:self.k]
+        self.counts = {t: counts[t] for t in kept}
+        self.errors = {t: errors[t] for t in kept}
+        return self
+
+
+class AuthorTokenSketches():
+
+    def __init__(self, freq=None, ngram_range=(1, 2), width=2**15, depth=4, k=50):
+        """
+        streaming word, n-gram and emoji statistics per author and period, built in fixed memory with a CountMinSketch for point estimates and a SpaceSaving summary for the top tokens
+
+        it is fed the message stream of RawChatCleaner().iter_messages() (or the rows of a cleaned chat) one message at a time. demojized emojis (:grimacing_face:) are kept as single tokens
+
+        a single CountMinSketch is shared by every author and period, each token is counted under (author, period, token) and (author, token) keys so both the per period and the all time estimates are read from one counter. its table is width * depth * 8 bytes (1MB for the defaults) however many authors and periods the chat has, with estimates overcounting by at most 2/width of twice the number of tokens. the SpaceSaving summaries add at most k tokens per author and period
+
+        freq (str): the period to split the statistics by, supports d, w, m, y or None for a single period. weeks are labelled with the calendar year and iso week, e.g. 2024-W01 for 2024-12-31, the same convention as ChatDataProcessor.create_period_keys
+        ngram_range (tuple<int>): the smallest and largest n-grams to count
+        width (int): see CountMinSketch
+        depth (int): see CountMinSketch
+        k (int): see SpaceSaving
+        """
+        self.freq = freq
+        self.ngram_range = ngram_range
+        self.width = width
+        self.depth = depth
+        self.k = k
+        self.count_min = CountMinSketch(width, depth)
+        self.summaries = {}
+        self.token_regexp = re.compile(
+            r":[a-z0-9_\-&'’.!]+:|[a-z0-9']+"
+        )
+        self.period_formats = {
+            None: lambda ts: "all",
+            "d": lambda ts: ts.strftime("%Y-%m-%d"),
+            "w": lambda ts: "{}-W{:02d}".format(ts.year, ts.isocalendar()[1]),
+            "m": lambda ts: ts.strftime("%Y-%m"),
+            "y": lambda ts: ts.strftime("%Y")
+        }
+
+    def tokenize(self, message):
+        """
+        message (str): a cleaned message
+
+        return list<str> (words, emoji tokens and their n-grams)
+        """
+        words = self.token_regexp.findall(message.lower())
+        tokens = []
+        for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+            tokens.extend(" ".join(words[i:i+n]) for i in range(len(words) - n + 1))
+        return tokens
+
+    def count_min_key(self, author, token, period=None):
+        """
+        the key a token is counted under in the shared CountMinSketch, period None for the count across every period
+
+        return str
+        """
+        return "\x1f".join([str(author), "" if period is None else period, token])
+
+    def summary(self, author, period):
+        if (author, period) not in self.summaries:
+            self.summaries[(author, period)] = SpaceSaving(self.k)
+        return self.summaries[(author, period)]
+
+    def update(self, timestamp, author, message):
+        """
+        adds one message to its author and period sketches
+
+        timestamp (datetime): the time of the message
+        author (str): the author of the message
+        message (str): the cleaned message
+        """
+        period = self.period_formats[self.freq](timestamp)
+        space_saving = self.summary(author, period)
+        for token in self.tokenize(message):
+            self.count_min.add(self.count_min_key(author, token, period))
+            self.count_min.add(self.count_min_key(author, token))
+            space_saving.add(token)
+
+    def update_stream(self, messages):
+        """
+        adds every message in a stream, events and media omitted messages are skipped
+
+        messages (iterable<list>): (timestamp, author, is_event, message) e.g. RawChatCleaner().iter_messages() or cleaned_chat.itertuples(index=False)
+
+        return AuthorTokenSketches (self)
+        """
+        for timestamp, author, is_event, message, *_ in messages:
+            if is_event or (message is None) or (message != message) or (message == "__Media_Omitted__"):
+                continue
+            self.update(timestamp, author, message)
+        return self
+
+    def merged_summary(self, author, period=None):
+        """
+        the SpaceSaving summary of an author, merged across every period if period is None
+
+        return SpaceSaving
+        """
+        if period is not None:
+            return self.summary(author, period)
+        space_saving = SpaceSaving(self.k)
+        for (summary_author, _), other_space_saving in self.summaries.items():
+            if summary_author == author:
+                space_saving.merge(other_space_saving)
+        return space_saving
+
+    def top_k(self, author, period=None, k=10):
+        """
+        author (str): the author to query
+        period (str): the period to query, defaults to every period
+        k (int): the number of tokens to return
+
+        return list<tuple> (token, count, error), see SpaceSaving.top
+        """
+        return self.merged_summary(author, period).top(k)
+
+    def estimate(self, author, token, period=None):
+        """
+        author (str): the author to query
+        token (str): the word, emoji or n-gram to estimate
+        period (str): the period to query, defaults to every period
+
+        return int
+        """
+        return self.count_min.estimate(self.count_min_key(author, token, period))
+
+    def merge(self, other):
+        """
+        merges the sketches of another AuthorTokenSketches, e.g. built over another chat or chunk, into this one
+
+        other (AuthorTokenSketches): sketches with the same freq, width, depth and k
+
+        return AuthorTokenSketches (self)
+        """
+        self.count_min.merge(other.count_min)
+        for key, other_space_saving in other.summaries.items():
+            self.summary(*key).merge(other_space_saving)
+        return self
@@ -0,0 +1,246 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+import pandas as pd
+from cleaners.cleaning_engines import get_cleaning_engine
+from feature_engineering.message_relationship import MessageRelationships
+from data_processing.chat_processing import ChatDataProcessor, MessageTextPreprocessor
+
+
+class ChatPipeline():
+
+    def __init__(self, checkpoint_loc, config={}):
+        """
+        runs whatsapp exports through cleaning, relationship features, grouping, timeseries and text preprocessing as named stages, checkpointing the output of every stage of every chat to disk
+
+        each stage is given a fingerprint built from its config, its stage_versions entry and the fingerprints of the stages it reads from (the chat file itself for cleaning). a stage whose fingerprint matches the one in the chats manifest is skipped and its checkpoint is read instead, so a rerun after a crash resumes from the last completed stage and a config change only reruns the stages downstream of it
+
+        checkpoint_loc (str): the directory the checkpoints are written under, one directory per chat_id
+        config (dict): stage name: kwargs overriding the default_config of the stage
+
+        e.g. ChatPipeline("checkpoints", {"grouping": {"minute_threshold": 2}, "timeseries": {"freqs": ["d", "H"]}})
+        """
+        self.checkpoint_loc = checkpoint_loc
+        self.default_config = {
+            "cleaning": {"engine": "reference", "contact_dict": {}},
+            "relationships": {"features": None},
+            "grouping": {"minute_threshold": 1, "separator": " "},
+            "timeseries": {"freqs": ["d", "w", "m"]},
+            "text_preprocessing": {"pipeline_order": ["lowercase", "remove_stop_words"]}
+        }
+        self.config = {
+            stage: dict(stage_config, **config.get(stage, {})) for stage, stage_config in self.default_config.items()
+        }
+        # the stages in the order they run, with the stages whose outputs they read
+        self.stages = [
+            ("cleaning", [], self.run_cleaning),
+            ("relationships", ["cleaning"], self.run_relationships),
+            ("grouping", ["cleaning"], self.run_grouping),
+            ("timeseries", ["cleaning"], self.run_timeseries),
+            ("text_preprocessing", ["grouping"], self.run_text_preprocessing)
+        ]
+        # bump the version of a stage when a code change alters its output, its checkpoints and those downstream are then rebuilt
+        self.stage_versions = {
+            "cleaning": 1,
+            "relationships": 2,
+            "grouping": 1,
+            "timeseries": 2,
+            "text_preprocessing": 1
+        }
+        self.executed = []
+
+    def run_cleaning(self, chat_loc, inputs):
+        cleaner = get_cleaning_engine(self.config["cleaning"]["engine"])(
+            chat_loc,
+            contact_dict = self.config["cleaning"]["contact_dict"]
+        )
+        return {"cleaned_chat": cleaner.clean()}
+
+    def run_relationships(self, chat_loc, inputs):
+        feature_engine = MessageRelationships(inputs["cleaned_chat"].copy())
+        features = self.config["relationships"]["features"]
+        feature_engine.build_required_features(list(feature_engine.features) if features is None else features)
+        return {"relationship_features": feature_engine.df}
+
+    def run_grouping(self, chat_loc, inputs):
+        processor = ChatDataProcessor(inputs["cleaned_chat"])
+        return {"grouped_chat": processor.group_messages(**self.config["grouping"])}
+
+    def run_timeseries(self, chat_loc, inputs):
+        processor = ChatDataProcessor(inputs["cleaned_chat"])
+        timeseries = {}
+        for freq in self.config["timeseries"]["freqs"]:
+            # H and T are mostly empty periods, only their observed periods are checkpointed, see SparseTimeseries.to_coo
+            if freq in processor.high_resolution_freqs:
+                timeseries[f"timeseries_{freq}"] = processor.make_sparse_timeseries(freq).to_coo()
+            else:
+                timeseries[f"timeseries_{freq}"] = processor.make_timeseries(freq)
+        return timeseries
+
+    def run_text_preprocessing(self, chat_loc, inputs):
+        preprocessor = MessageTextPreprocessor(inputs["grouped_chat"], **self.config["text_preprocessing"])
+        return {"processed_chat": preprocessor.run()}
+
+    def file_fingerprint(self, chat_loc):
+        """
+        chat_loc (str): the file path of the whatsapp chat.txt file
+
+        return str (the sha256 of the file contents)
+        """
+        file_hash = hashlib.sha256()
+        with open(chat_loc, "rb") as chat_file:
+            for chunk in iter(lambda: chat_file.read(1 << 20), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    def stage_fingerprint(self, stage, input_fingerprints):
+        """
+        stage (str): the name of the stage
+        input_fingerprints (list<str>): the fingerprints of what the stage reads
+
+        return str
+        """
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    "stage": stage,
+                    "version": self.stage_versions[stage],
+                    "config": self.config[stage],
+                    "inputs": input_fingerprints
+                },
+                sort_keys = True,
+                default = str
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def chat_dir(self, chat_id):
+        return os.path.join(self.checkpoint_loc, chat_id)
+
+    def output_path(self, chat_id, output_name):
+        return os.path.join(self.chat_dir(chat_id), f"{output_name}.pkl")
+
+    def read_manifest(self, chat_id):
+        """
+        the completed stages of a chat with their fingerprints and outputs
+
+        return dict
+        """
+        manifest_path = os.path.join(self.chat_dir(chat_id), "manifest.json")
+        if not os.path.exists(manifest_path):
+            return {}
+        with open(manifest_path, "r") as manifest_file:
+            return json.load(manifest_file)
+
+    def write_manifest(self, chat_id, manifest):
+        def write(path):
+            with open(path, "w") as manifest_file:
+                json.dump(manifest, manifest_file, indent=2)
+
+        self.write_atomic(os.path.join(self.chat_dir(chat_id), "manifest.json"), write)
+
+    def write_atomic(self, path, write):
+        """
+        writes to a temporary file which then replaces path, so a crash never leaves a half written checkpoint
+
+        path (str): the file to write
+        write (function): writes to the temporary path it is given
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        write(temp_path)
+        os.replace(temp_path, path)
+
+    def is_completed(self, chat_id, manifest, stage, fingerprint):
+        entry = manifest.get(stage)
+        return (entry is not None) and (entry["fingerprint"] == fingerprint) and all(
+            os.path.exists(self.output_path(chat_id, output_name)) for output_name in entry["outputs"]
+        )
+
+    def load_output(self, chat_id, output_name, outputs):
+        if output_name not in outputs:
+            outputs[output_name] = pd.read_pickle(self.output_path(chat_id, output_name))
+        return outputs[output_name]
+
+    def required_stages(self, stages):
+        """
+        the requested stages along with every stage they read from
+
+        stages (list<str>): the requested stage names, None for every stage
+
+        return set<str>
+        """
+        if stages is None:
+            return set(name for name, _, _ in self.stages)
+        dependencies = dict((name, stage_dependencies) for name, stage_dependencies, _ in self.stages)
+        required = set()
+        to_visit = list(stages)
+        while len(to_visit) > 0:
+            stage = to_visit.pop()
+            if stage not in required:
+                required.add(stage)
+                to_visit.extend(dependencies[stage])
+        return required
+
+    def run(self, chat_loc, chat_id=None, stages=None):
+        """
+        runs the stages of one chat, skipping the stages already completed with the same fingerprint
+
+        chat_loc (str): the file path of the whatsapp chat.txt file
+        chat_id (str): the name of the chats checkpoint directory, defaults to the file name without its extension
+        stages (list<str>): only run these stages and the stages they read from, defaults to every stage
+
+        return dict (output name: pd.DataFrame for every output of the stages run or skipped)
+        """
+        chat_id = os.path.splitext(os.path.basename(chat_loc))[0] if chat_id is None else chat_id
+        required = self.required_stages(stages)
+        manifest = self.read_manifest(chat_id)
+        fingerprints = {}
+        outputs = {}
+        self.executed = []
+
+        for stage, dependencies, run_stage in self.stages:
+            if stage not in required:
+                continue
+            input_fingerprints = [fingerprints[d] for d in dependencies] if len(dependencies) > 0 else [self.file_fingerprint(chat_loc)]
+            fingerprints[stage] = self.stage_fingerprint(stage, input_fingerprints)
+            if self.is_completed(chat_id, manifest, stage, fingerprints[stage]):
+                continue
+
+            inputs = {}
+            for dependency in dependencies:
+                for output_name in manifest[dependency]["outputs"]:
+                    inputs[output_name] = self.load_output(chat_id, output_name, outputs)
+
+            stage_outputs = run_stage(chat_loc, inputs)
+            for output_name, output in stage_outputs.items():
+                self.write_atomic(self.output_path(chat_id, output_name), output.to_pickle)
+            outputs.update(stage_outputs)
+
+            # the manifest is only updated once every output of the stage is on disk
+            manifest[stage] = {
+                "fingerprint": fingerprints[stage],
+                "outputs": list(stage_outputs),
+                "completed_at": datetime.now().isoformat()
+            }
+            self.write_manifest(chat_id, manifest)
+            self.executed.append(stage)
+
+        return {
+            output_name: self.load_output(chat_id, output_name, outputs)
+            for stage, _, _ in self.stages if stage in required
+            for output_name in manifest[stage]["outputs"]
+        }
+
+    def run_archive(self, chat_locs, stages=None):
+        """
+        runs every chat of an archive, each chat is checkpointed on its own so a crash only loses the stage that was running
+
+        chat_locs (list<str>): the file paths of the whatsapp chat.txt files
+        stages (list<str>): see run
+
+        return dict (chat_id: the output of run)
+        """
+        return {
+            os.path.splitext(os.path.basename(chat_loc))[0]: self.run(chat_loc, stages=stages) for chat_loc in chat_locs
+        }
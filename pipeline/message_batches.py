@@ -0,0 +1,133 @@
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+
+def hash_message(message):
+    """
+    message (str): the message to hash
+
+    return str
+    """
+    return hashlib.sha1(message.encode("utf-8")).hexdigest()
+
+
+class MessageCache():
+
+    def __init__(self, cache_loc, table, variant_column, value_columns):
+        """
+        an sqlite cache of the outputs of a model for each message, keyed by a hash of the message and a variant (the style or model the output was made with) so re-running over a chat only runs new messages through the model
+
+        cache_loc (str): the file path of the sqlite cache, ":memory:" for an in memory cache
+        table (str): the name of the table
+        variant_column (tuple<str>): the name and sql type of the variant column
+        value_columns (list<tuple<str>>): the name and sql type of each output column
+
+        e.g. MessageCache(":memory:", "formalized_messages", ("style", "INTEGER NOT NULL"), [("formalized", "TEXT NOT NULL")])
+        """
+        self.table = table
+        self.variant_name = variant_column[0]
+        self.value_names = [name for name, _ in value_columns]
+        self.connection = sqlite3.connect(cache_loc)
+        columns = [("message_hash", "TEXT NOT NULL"), variant_column] + list(value_columns)
+        with self.connection:
+            self.connection.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {", ".join(f"{name} {sql_type}" for name, sql_type in columns)},
+                    PRIMARY KEY (message_hash, {self.variant_name})
+                )
+                """
+            )
+
+    def read(self, message_hashes, variant):
+        """
+        message_hashes (list<str>): the hashes to look up
+        variant (str|int): the variant to look up
+
+        return dict<str, tuple> (message_hash: the value columns)
+        """
+        cached = {}
+        for i in range(0, len(message_hashes), 500):
+            chunk = message_hashes[i:i+500]
+            for row in self.connection.execute(
+                f"SELECT message_hash, {', '.join(self.value_names)} FROM {self.table} WHERE {self.variant_name} = ? AND message_hash IN ({', '.join('?'*len(chunk))})",
+                [variant] + chunk
+            ):
+                cached[row[0]] = row[1:]
+        return cached
+
+    def write(self, values, variant):
+        """
+        values (dict<str, tuple>): message_hash: the value columns
+        variant (str|int): the variant the values were made with
+        """
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (message_hash, {self.variant_name}, {', '.join(self.value_names)}) VALUES ({', '.join('?'*(len(self.value_names) + 2))})",
+                [(message_hash, variant) + tuple(row) for message_hash, row in values.items()]
+            )
+
+    def close(self):
+        self.connection.close()
+
+
+worker_model = None
+
+def init_worker(model_factory, factory_args):
+    """
+    loads the model once per worker process
+    """
+    global worker_model
+    worker_model = model_factory(*factory_args) if model_factory is not None else None
+
+def run_worker_batch(batch_function, batch):
+    return batch_function(worker_model, batch)
+
+
+class BatchWorkerPool():
+
+    def __init__(self, batch_function, model_factory, factory_args=(), n_workers=1):
+        """
+        runs batches of messages through a model, in the current process if n_workers is 1 otherwise across a process pool. the model, or the pool and the model of each worker, is loaded on the first run and reused by every later run until close
+
+        batch_function (function): called with the model and a batch, returns the output of each message in the batch. must be a module level function when n_workers > 1
+        model_factory (function): called with factory_args to load the model, None runs the batch_function with a None model. must be picklable when n_workers > 1
+        factory_args (tuple): the arguments of model_factory
+        n_workers (int): the number of worker processes, 1 runs in the current process
+        """
+        self.batch_function = batch_function
+        self.model_factory = model_factory
+        self.factory_args = factory_args
+        self.n_workers = n_workers
+        self.model = None
+        self.model_loaded = False
+        self.executor = None
+
+    def run(self, batches):
+        """
+        batches (list<list<str>>): the batches to run
+
+        return list<list> (the outputs of each batch)
+        """
+        if self.n_workers <= 1:
+            if not self.model_loaded:
+                self.model = self.model_factory(*self.factory_args) if self.model_factory is not None else None
+                self.model_loaded = True
+            return [self.batch_function(self.model, batch) for batch in batches]
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                max_workers = self.n_workers,
+                initializer = init_worker,
+                initargs = (self.model_factory, self.factory_args)
+            )
+        return list(self.executor.map(partial(run_worker_batch, self.batch_function), batches))
+
+    def close(self):
+        """
+        shuts down the worker pool, if one was started
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
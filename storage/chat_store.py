@@ -0,0 +1,303 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+
+class ChatStore():
+
+    def __init__(self, db_loc=":memory:"):
+        """
+        embedded sqlite storage for the output of RawChatCleaner().clean()
+
+        many chats can be loaded into the same database, each one under its own chat_id. the messages table is indexed on (chat_id, timestamp) and (author, timestamp) so that the usual analyst queries (one chat over a date range, one author across chats) are index scans rather than full reads
+
+        the group_messages and group_by_ts_freq methods push the ChatDataProcessor aggregations down into sql so only the aggregated rows are loaded into pandas
+
+        db_loc (str): the file path of the sqlite database, defaults to an in memory database
+        """
+        self.db_loc = db_loc
+        self.connection = sqlite3.connect(db_loc)
+        self.create_schema()
+
+        # sql expressions used to bucket the timestamp column for each freq supported by ChatDataProcessor
+        # H and T are named period_start as sqlite would group by the timestamp column rather than an alias of the same name, they are renamed to timestamp once loaded
+        # w uses the calendar year alongside the iso week to match ChatDataProcessor.group_by_ts_freq
+        self.freq_columns = {
+            "h": [
+                ("hour", "CAST(strftime('%H', timestamp) AS INTEGER)")
+            ],
+            "H": [
+                ("period_start", "strftime('%Y-%m-%d %H:00:00', timestamp)")
+            ],
+            "T": [
+                ("period_start", "strftime('%Y-%m-%d %H:%M:00', timestamp)")
+            ],
+            "d": [
+                ("date", "date(timestamp)")
+            ],
+            "w": [
+                ("year", "CAST(strftime('%Y', timestamp) AS INTEGER)"),
+                ("isoweek", "(CAST(strftime('%j', date(timestamp, '-3 days', 'weekday 4')) AS INTEGER) - 1) / 7 + 1")
+            ],
+            "m": [
+                ("year", "CAST(strftime('%Y', timestamp) AS INTEGER)"),
+                ("month", "CAST(strftime('%m', timestamp) AS INTEGER)")
+            ],
+            "y": [
+                ("year", "CAST(strftime('%Y', timestamp) AS INTEGER)")
+            ]
+        }
+
+    def create_schema(self):
+        """
+        creates the messages table and its indexes if they dont already exist
+
+        seq is the position of the message in the cleaned chat, it keeps the original message order for messages sharing a timestamp
+        """
+        with self.connection:
+            self.connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS messages (
+                    chat_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    author TEXT,
+                    is_event INTEGER NOT NULL,
+                    message TEXT,
+                    PRIMARY KEY (chat_id, seq)
+                )
+                """
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_chat_timestamp ON messages (chat_id, timestamp)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_author_timestamp ON messages (author, timestamp)"
+            )
+
+    def load_chat(self, cleaned_chat, chat_id):
+        """
+        bulk loads a cleaned chat into the database, replacing any chat already stored under chat_id
+
+        cleaned_chat (pd.DataFrame): the output of RawChatCleaner().clean()
+        chat_id (str): the identifier the chat is stored under
+
+        return int (the number of rows loaded)
+        """
+        timestamps = pd.to_datetime(cleaned_chat.timestamp).dt.strftime("%Y-%m-%d %H:%M:%S")
+        rows = zip(
+            [chat_id]*len(cleaned_chat),
+            range(len(cleaned_chat)),
+            timestamps,
+            cleaned_chat.author.astype(object).where(cleaned_chat.author.notnull(), None),
+            cleaned_chat.is_event.astype(int),
+            cleaned_chat.message.astype(object).where(cleaned_chat.message.notnull(), None)
+        )
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM messages WHERE chat_id = ?",
+                (chat_id,)
+            )
+            self.connection.executemany(
+                "INSERT INTO messages (chat_id, seq, timestamp, author, is_event, message) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(cleaned_chat)
+
+    def chat_ids(self):
+        """
+        return list<str>
+        """
+        return [
+            row[0] for row in self.connection.execute("SELECT DISTINCT chat_id FROM messages ORDER BY chat_id")
+        ]
+
+    def build_filters(self, chat_id=None, authors=None, start=None, end=None):
+        """
+        builds a sql where clause and its parameters, the filters line up with the indexes on the messages table
+
+        chat_id (str): only include this chat
+        authors (list<str>): only include these authors
+        start (datetime): only include messages at or after this timestamp
+        end (datetime): only include messages before this timestamp
+
+        return str, list
+        """
+        clauses = []
+        params = []
+        if chat_id is not None:
+            clauses.append("chat_id = ?")
+            params.append(chat_id)
+        if authors is not None:
+            clauses.append(f"author IN ({', '.join('?'*len(authors))})")
+            params.extend(authors)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).strftime("%Y-%m-%d %H:%M:%S"))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(pd.Timestamp(end).strftime("%Y-%m-%d %H:%M:%S"))
+        if len(clauses) == 0:
+            return "", params
+        return "WHERE " + " AND ".join(clauses), params
+
+    def read_chat(self, chat_id=None, authors=None, start=None, end=None):
+        """
+        reads messages back out in the same format as RawChatCleaner().clean()
+
+        chat_id (str): only include this chat
+        authors (list<str>): only include these authors
+        start (datetime): only include messages at or after this timestamp
+        end (datetime): only include messages before this timestamp
+
+        return pd.DataFrame
+        """
+        where, params = self.build_filters(chat_id, authors, start, end)
+        chat_data = pd.read_sql_query(
+            f"SELECT timestamp, author, is_event, message FROM messages {where} ORDER BY chat_id, seq",
+            self.connection,
+            params = params
+        )
+        chat_data["timestamp"] = pd.to_datetime(chat_data.timestamp)
+        chat_data["is_event"] = chat_data.is_event.astype(bool)
+        # sqlite returns NULL as None, missing authors and messages are read back as NaN like a cleaned chat loaded with pandas
+        for col in ["author", "message"]:
+            chat_data[col] = chat_data[col].astype(object).where(chat_data[col].notnull(), np.nan)
+        return chat_data
+
+    def authors(self, chat_id):
+        """
+        return list<str>
+        """
+        return [
+            row[0] for row in self.connection.execute(
+                "SELECT DISTINCT author FROM messages WHERE chat_id = ? ORDER BY author",
+                (chat_id,)
+            )
+        ]
+
+    def author_ranges(self, chat_id, freq="d"):
+        """
+        the first and last period each author is present in the chat, in the same format ChatDataProcessor.create_full_ts_range builds them
+
+        chat_id (str): the chat to query
+        freq (str): d for the first and last date, H or T for the first and last hour or minute
+
+        return pd.DataFrame
+        """
+        period = self.freq_columns[freq][0][1].replace("timestamp", "{}")
+        author_ranges = pd.read_sql_query(
+            f"""
+            SELECT author, {period.format('MIN(timestamp)')} AS freq_min, {period.format('MAX(timestamp)')} AS freq_max
+            FROM messages
+            WHERE chat_id = ? AND author IS NOT NULL
+            GROUP BY author
+            """,
+            self.connection,
+            params = [chat_id]
+        ).set_index("author")
+        if freq == "d":
+            return author_ranges.apply(lambda x: pd.to_datetime(x).dt.date)
+        return author_ranges.apply(pd.to_datetime)
+
+    def group_by_ts_freq(self, chat_id, freq):
+        """
+        sql version of ChatDataProcessor.group_by_ts_freq with the default aggregations
+
+        chat_id (str): the chat to aggregate
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+
+        return pd.DataFrame
+        """
+        freq_columns = self.freq_columns[freq]
+        select_columns = ", ".join(f"{expression} AS {name}" for name, expression in freq_columns)
+        group_columns = ", ".join(["author"] + [name for name, _ in freq_columns])
+        grouped = pd.read_sql_query(
+            f"""
+            SELECT author, {select_columns}, SUM(is_event) AS event_count, COUNT(message) - SUM(is_event) AS message_count
+            FROM messages
+            WHERE chat_id = ? AND author IS NOT NULL
+            GROUP BY {group_columns}
+            ORDER BY {group_columns}
+            """,
+            self.connection,
+            params = [chat_id]
+        )
+        if freq == "d":
+            grouped["date"] = pd.to_datetime(grouped.date).dt.date
+        elif freq in ["H", "T"]:
+            grouped = grouped.rename(columns={"period_start": "timestamp"})
+            grouped["timestamp"] = pd.to_datetime(grouped.timestamp)
+        return grouped.set_index(["author"] + list(grouped.columns[1:-2]))
+
+    def group_messages(self, chat_id, minute_threshold=1, separator=" "):
+        """
+        sql version of ChatDataProcessor.group_messages, uses window functions to build the message_group_id in the same way as MessageRelationships.create_message_group_id
+
+        the author and is_event are the same for every message in a group and the timestamps only increase through a group, so the first message is read with MIN
+
+        chat_id (str): the chat to group
+        minute_threshold (int): the number of minutes between consecutive messages of the same author that should have the same group_id
+        separator (str): the string the messages of a group are joined with, defaults to a space
+
+        return pd.DataFrame
+        """
+        grouped_chat = pd.read_sql_query(
+            """
+            WITH ordered AS (
+                SELECT
+                    seq, timestamp, author, is_event, message,
+                    LEAD(author) OVER (ORDER BY seq) AS next_message_author,
+                    CAST(strftime('%s', LEAD(timestamp) OVER (ORDER BY seq)) AS INTEGER) - CAST(strftime('%s', timestamp) AS INTEGER) AS seconds_to_next_message
+                FROM messages
+                WHERE chat_id = ?
+            ),
+            breaks AS (
+                SELECT
+                    *,
+                    CASE
+                        WHEN author = next_message_author AND NOT is_event AND seconds_to_next_message <= ? THEN 0
+                        ELSE 1
+                    END AS ends_group
+                FROM ordered
+            ),
+            groups AS (
+                SELECT
+                    *,
+                    COALESCE(SUM(ends_group) OVER (ORDER BY seq ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING), 0) AS message_group_id
+                FROM breaks
+            ),
+            aggregated AS (
+                -- GROUP_CONCAT as an aggregate has no defined order before sqlite 3.44, as a window function ordered by seq it joins the messages in chat order
+                SELECT
+                    message_group_id,
+                    GROUP_CONCAT(NULLIF(message, ''), ?) OVER group_window AS message,
+                    timestamp,
+                    author,
+                    is_event,
+                    MAX(timestamp) OVER group_window AS last_timestamp,
+                    COUNT(*) OVER group_window AS message_count,
+                    SUM(message = '__Media_Omitted__') OVER group_window AS media_count,
+                    ROW_NUMBER() OVER (PARTITION BY message_group_id ORDER BY seq) AS group_position
+                FROM groups
+                WINDOW group_window AS (PARTITION BY message_group_id ORDER BY seq ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+            )
+            SELECT
+                message_group_id, message, timestamp, author, is_event, last_timestamp, message_count, media_count
+            FROM aggregated
+            WHERE group_position = 1
+            ORDER BY message_group_id
+            """,
+            self.connection,
+            params = [chat_id, minute_threshold*60, separator]
+        ).set_index("message_group_id")
+        grouped_chat["message"] = grouped_chat.message.fillna("")
+        grouped_chat["author"] = grouped_chat.author.astype(object).where(grouped_chat.author.notnull(), np.nan)
+        grouped_chat["timestamp"] = pd.to_datetime(grouped_chat.timestamp)
+        grouped_chat["last_timestamp"] = pd.to_datetime(grouped_chat.last_timestamp)
+        grouped_chat["is_event"] = grouped_chat.is_event.astype(bool)
+        grouped_chat.index.name = None
+        return grouped_chat
+
+    def close(self):
+        self.connection.close()
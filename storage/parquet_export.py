@@ -0,0 +1,125 @@
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class ParquetChatExporter():
+
+    def __init__(self, dataset_loc):
+        """
+        writes the outputs of ChatDataProcessor to parquet datasets partitioned by chat and year/month, and reads slices of them back
+
+        each freq of timeseries is its own dataset (timeseries_<freq>) alongside a grouped_chats dataset. the partitions are hive style directories (chat_id=x/year=y/month=z) so a reader filtering on chat_id, year or month only opens the matching files, and the author column is dictionary encoded
+
+        dataset_loc (str): the directory the datasets are written under
+        """
+        self.dataset_loc = dataset_loc
+
+    def dataset_path(self, dataset_name):
+        return os.path.join(self.dataset_loc, dataset_name)
+
+    def add_partition_columns(self, frame, chat_id):
+        """
+        adds the chat_id column along with year and month columns when they can be derived from a timestamp or date column
+
+        frame (pd.DataFrame): a flat frame with no index levels
+        chat_id (str): the chat the frame belongs to
+
+        return pd.DataFrame, list<str> (the frame and its partition columns)
+        """
+        frame = frame.assign(chat_id = chat_id)
+        if "timestamp" in frame.columns:
+            dates = pd.to_datetime(frame.timestamp)
+        elif "date" in frame.columns:
+            dates = pd.to_datetime(frame.date)
+        else:
+            dates = None
+
+        if dates is not None:
+            frame["year"] = dates.dt.year
+            frame["month"] = dates.dt.month
+        partition_cols = ["chat_id"] + [c for c in ["year", "month"] if c in frame.columns]
+        return frame, partition_cols
+
+    def write_frame(self, frame, dataset_name, chat_id):
+        """
+        writes a frame to a dataset, replacing anything already written for chat_id
+
+        frame (pd.DataFrame): the frame to write, its index is written as columns
+        dataset_name (str): the name of the dataset directory
+        chat_id (str): the chat the frame belongs to
+
+        return str (the dataset path)
+        """
+        frame, partition_cols = self.add_partition_columns(frame.reset_index(), chat_id)
+        frame["author"] = frame.author.astype("category")
+
+        path = self.dataset_path(dataset_name)
+        chat_partition = os.path.join(path, f"chat_id={chat_id}")
+        if os.path.exists(chat_partition):
+            shutil.rmtree(chat_partition)
+
+        pq.write_to_dataset(
+            pa.Table.from_pandas(frame, preserve_index=False),
+            root_path = path,
+            partition_cols = partition_cols,
+            use_dictionary = ["author"]
+        )
+        return path
+
+    def write_timeseries(self, timeseries, chat_id, freq):
+        """
+        timeseries (pd.DataFrame): the output of ChatDataProcessor().make_timeseries(freq)
+        chat_id (str): the chat the timeseries belongs to
+        freq (str): the freq the timeseries was made with
+
+        return str (the dataset path)
+        """
+        return self.write_frame(timeseries, f"timeseries_{freq}", chat_id)
+
+    def write_grouped_chat(self, grouped_chat, chat_id):
+        """
+        grouped_chat (pd.DataFrame): the output of ChatDataProcessor().group_messages()
+        chat_id (str): the chat the grouped messages belong to
+
+        return str (the dataset path)
+        """
+        return self.write_frame(grouped_chat.rename_axis("message_group_id"), "grouped_chats", chat_id)
+
+    def read_dataset(self, dataset_name, columns=None, filters=None):
+        """
+        reads a dataset, only the partitions matching the filters and the requested columns are loaded
+
+        dataset_name (str): the name of the dataset directory
+        columns (list<str>): the columns to load, defaults to every column
+        filters (list<tuple>): pyarrow filters e.g. [("chat_id", "=", "celebrations"), ("year", ">=", 2022)]
+
+        return pd.DataFrame
+        """
+        table = pq.read_table(
+            self.dataset_path(dataset_name),
+            columns = columns,
+            filters = filters
+        )
+        return table.to_pandas()
+
+    def read_timeseries(self, freq, columns=None, filters=None):
+        """
+        freq (str): the freq the timeseries was made with
+        columns (list<str>): the columns to load, defaults to every column
+        filters (list<tuple>): see read_dataset
+
+        return pd.DataFrame
+        """
+        return self.read_dataset(f"timeseries_{freq}", columns, filters)
+
+    def read_grouped_chats(self, columns=None, filters=None):
+        """
+        columns (list<str>): the columns to load, defaults to every column
+        filters (list<tuple>): see read_dataset
+
+        return pd.DataFrame
+        """
+        return self.read_dataset("grouped_chats", columns, filters)
@@ -0,0 +1,64 @@
+import time
+import socket
+from cleaners.chat_reader import strip_marks
+
+
+class FileTailSource():
+
+    def __init__(self, chat_loc, poll_interval=0.5, from_start=True, idle_timeout=None):
+        """
+        yields the lines of a chat.txt file as they are appended to it, a local stand in for a live feed of messages
+
+        only complete lines are yielded, a line still being written is held back until its newline arrives. the byte order mark and directional marks are removed as in ChatExportReader
+
+        chat_loc (str): the file path of the chat.txt file to follow
+        poll_interval (float): the seconds to wait before checking the file again when there is nothing new
+        from_start (bool): yield the lines already in the file before following it, defaults to True
+        idle_timeout (float): stop after this many seconds without a new line, defaults to following the file forever
+        """
+        self.chat_loc = chat_loc
+        self.poll_interval = poll_interval
+        self.from_start = from_start
+        self.idle_timeout = idle_timeout
+
+    def __iter__(self):
+        with open(self.chat_loc, "r", encoding="utf-8") as chat_file:
+            if not self.from_start:
+                chat_file.seek(0, 2)
+            partial_line = ""
+            last_line_time = time.monotonic()
+            while True:
+                line = chat_file.readline()
+                if line == "":
+                    if (self.idle_timeout is not None) and (time.monotonic() - last_line_time > self.idle_timeout):
+                        if partial_line != "":
+                            yield strip_marks(partial_line)
+                        return
+                    time.sleep(self.poll_interval)
+                    continue
+                partial_line += line
+                if partial_line.endswith("\n"):
+                    yield strip_marks(partial_line)
+                    partial_line = ""
+                    last_line_time = time.monotonic()
+
+
+class SocketSource():
+
+    def __init__(self, host, port, encoding="utf-8"):
+        """
+        yields the lines sent to a tcp socket, e.g. a relay forwarding messages as they arrive. the lines are expected in the format of the chat.txt export and the source ends when the sender closes the connection
+
+        host (str): the host to connect to
+        port (int): the port to connect to
+        encoding (str): the encoding of the lines, defaults to utf-8
+        """
+        self.host = host
+        self.port = port
+        self.encoding = encoding
+
+    def __iter__(self):
+        with socket.create_connection((self.host, self.port)) as connection:
+            with connection.makefile("r", encoding=self.encoding) as lines:
+                for line in lines:
+                    yield strip_marks(line)
@@ -0,0 +1,87 @@
+import random
+import numpy as np
+import pandas as pd
+from data_processing.chat_processing import ChatDataProcessor
+from data_processing.sampled_timeseries import estimate_counts, top_authors
+
+
+class ReservoirTimeseriesSampler():
+
+    def __init__(self, freq="m", size=1000, confidence=0.95, seed=0):
+        """
+        approximate message counts of each author and period over a stream whose length is not known up front, e.g. StreamingChatProcessor or RawChatCleaner().iter_messages()
+
+        each period keeps a reservoir of up to size messages, a uniform sample of its messages stored as their author labels, alongside the number of messages it has seen. memory is bounded by size per period rather than by the length of the stream, and periods with at most size messages are counted exactly. the estimates are built with estimate_counts so they have the same format and bounds as ChatDataProcessor.approximate_timeseries
+
+        freq (str): the frequency of the timeseries data, supports h, H, T, d, w, m, y
+        size (int): the number of messages kept per period
+        confidence (float): the confidence level of the bounds
+        seed (int): the seed of the random generator
+        """
+        self.freq = freq
+        self.size = size
+        self.confidence = confidence
+        self.random = random.Random(seed)
+        self.reservoirs = {}
+        self.seen = {}
+
+    def update(self, timestamp, author):
+        """
+        adds one message to the reservoir of its period, replacing a kept message with probability size / seen once the reservoir is full
+
+        timestamp (datetime): the time of the message
+        author (str): the author of the message
+        """
+        period_key = ChatDataProcessor.create_period_key(timestamp, self.freq)
+        reservoir = self.reservoirs.setdefault(period_key, [])
+        self.seen[period_key] = self.seen.get(period_key, 0) + 1
+        if len(reservoir) < self.size:
+            reservoir.append(author)
+            return
+        position = self.random.randrange(self.seen[period_key])
+        if position < self.size:
+            reservoir[position] = author
+
+    def update_stream(self, messages):
+        """
+        adds every message in a stream, events are skipped as they are not counted in message_count
+
+        messages (iterable<list>): (timestamp, author, is_event, message) e.g. RawChatCleaner().iter_messages() or cleaned_chat.itertuples(index=False)
+
+        return ReservoirTimeseriesSampler (self)
+        """
+        for timestamp, author, is_event, message, *_ in messages:
+            if is_event or (message is None) or (message != message):
+                continue
+            self.update(timestamp, author)
+        return self
+
+    def estimate(self):
+        """
+        return pd.DataFrame (in the format of ChatDataProcessor.approximate_timeseries)
+        """
+        period_keys = sorted(self.reservoirs)
+        sample = pd.DataFrame(
+            {
+                "author": [author for key in period_keys for author in self.reservoirs[key]],
+                "period_key": np.repeat(
+                    np.array(period_keys, dtype=np.int64),
+                    [len(self.reservoirs[key]) for key in period_keys]
+                )
+            }
+        )
+        estimates = estimate_counts(
+            sample,
+            pd.Series([self.seen[key] for key in period_keys], index=period_keys, dtype=np.int64),
+            self.confidence
+        )
+        estimates.index = ChatDataProcessor.decode_period_index(estimates.author, estimates.period_key, self.freq)
+        return estimates.drop(columns=["author", "period_key"])
+
+    def top_authors(self, n=3):
+        """
+        n (int): the number of authors kept per period
+
+        return pd.DataFrame, see top_authors
+        """
+        return top_authors(self.estimate(), n=n)
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+from cleaners.chat_cleaner import RawChatCleaner
+from feature_engineering.message_relationship import MessageRelationships
+from data_processing.chat_processing import ChatDataProcessor
+
+
+class StreamingChatParser():
+
+    def __init__(self, contact_dict={}):
+        """
+        incremental version of RawChatCleaner, text is fed in as it arrives and each message is returned once the timestamp of the next message shows it is complete
+
+        only the text of the open message is buffered, it is split with the same timestamp_regexp and cleaned with the same RawChatCleaner methods so a fed export parses into the same messages as RawChatCleaner().clean()
+
+        contact_dict (dict): see RawChatCleaner.replace_user_phone_numbers_with_names
+        """
+        self.cleaner = RawChatCleaner.from_text("", contact_dict)
+        self.buffer = ""
+
+    def parse_message(self, ts, raw_msg):
+        """
+        return list (timestamp<datetime>, author<str>, is_event<bool>, message<str>), see RawChatCleaner.iter_messages
+        """
+        author, msg = self.cleaner.attempt_split_message_into_author_and_content(raw_msg)
+        return [
+            self.cleaner.format_timestamp(ts),
+            self.cleaner.str_cleaner(author, "author"),
+            author=="",
+            self.cleaner.str_cleaner(msg, "event" if author=="" else "message")
+        ]
+
+    def feed(self, text):
+        """
+        text (str): the next chunk of the export, usually one line
+
+        return list<list> (the messages completed by the text)
+        """
+        self.buffer += self.cleaner.translate_emojis(text)
+        splitted_chat = self.cleaner.timestamp_regexp.split(self.buffer)
+        if len(splitted_chat) < 3:
+            # no timestamp has been seen yet, the text before the first timestamp is dropped as it is in split_by_timestamps
+            return []
+        complete = list(self.cleaner.zip_timestamp_n_messages(splitted_chat[1:-2]))
+        self.buffer = "".join(splitted_chat[-2:])
+        return [self.parse_message(ts, raw_msg) for ts, raw_msg in complete]
+
+    def flush(self):
+        """
+        completes the open message, used when the stream ends
+
+        return list<list>
+        """
+        splitted_chat = self.cleaner.timestamp_regexp.split(self.buffer)
+        self.buffer = ""
+        if len(splitted_chat) < 3:
+            return []
+        return [self.parse_message(splitted_chat[1], splitted_chat[2])]
+
+
+class StreamingChatProcessor():
+
+    def __init__(self, freq="d", minute_threshold=1, gap_minutes=60, windows=["1h", "7d"], separator=" ", contact_dict={}):
+        """
+        applies the MessageRelationships features and the ChatDataProcessor counters to a live stream of messages, one message at a time
+
+        only the state the features need is kept: the previous message, the current session, the open message group, the timestamps of each author inside the largest window and the counts of each author and period. the features that need the next message (MessageRelationships.future_data_leak_features) cannot be known when a message arrives and are never produced
+
+        message features: time_since_previous_message, previous_message_author, message_group_id, session_id, reply_to_author, response_latency, author_messages_past_<window>
+
+        freq (str): the period of the author counters, supports h, H, T, d, w, m, y
+        minute_threshold (int): see MessageRelationships.create_message_group_id
+        gap_minutes (int): see MessageRelationships.create_session_id
+        windows (list<str>): see MessageRelationships.create_rolling_author_message_counts
+        separator (str): see ChatDataProcessor.aggregate_message_groups
+        contact_dict (dict): see RawChatCleaner.replace_user_phone_numbers_with_names
+        """
+        self.parser = StreamingChatParser(contact_dict)
+        self.freq = freq
+        self.minute_threshold = pd.Timedelta(minutes=minute_threshold)
+        self.gap_minutes = pd.Timedelta(minutes=gap_minutes)
+        self.windows = windows
+        self.window_lengths = [pd.Timedelta(w) for w in windows]
+        self.separator = separator
+
+        self.features = [
+            "time_since_previous_message",
+            "previous_message_author",
+            "message_group_id",
+            "session_id",
+            "reply_to_author",
+            "response_latency"
+        ] + [f"author_messages_past_{w}" for w in windows]
+        self.excluded_features = MessageRelationships(pd.DataFrame()).future_data_leak_features
+        if any(f in self.excluded_features for f in self.features):
+            raise ValueError("future leaking features cannot be computed on a stream")
+
+        self.previous_message = None
+        self.session_id = -1
+        self.message_group_id = -1
+        self.open_group = None
+        self.author_timestamps = {}
+        self.author_window_starts = {}
+        self.counters = {}
+
+    def rolling_counts(self, author, timestamp):
+        """
+        adds the message to its authors timestamps and counts the authors messages in each window, the window starts only move forwards so each timestamp is passed over once per window
+
+        return list<int>
+        """
+        timestamps = self.author_timestamps.setdefault(author, [])
+        window_starts = self.author_window_starts.setdefault(author, [0]*len(self.window_lengths))
+        timestamps.append(timestamp)
+        counts = []
+        for i, window_length in enumerate(self.window_lengths):
+            while timestamps[window_starts[i]] <= timestamp - window_length:
+                window_starts[i] += 1
+            counts.append(len(timestamps) - window_starts[i])
+
+        # the timestamps before every window are dropped once enough have built up
+        oldest_start = min(window_starts)
+        if oldest_start > 1024:
+            del timestamps[:oldest_start]
+            self.author_window_starts[author] = [s - oldest_start for s in window_starts]
+        return counts
+
+    def update_counters(self, timestamp, author, is_event, message):
+        period_key = ChatDataProcessor.create_period_key(timestamp, self.freq)
+        counter = self.counters.setdefault((author, period_key), [0, 0])
+        if is_event:
+            counter[0] += 1
+        elif message is not None:
+            counter[1] += 1
+
+    def update_group(self, features):
+        """
+        adds the message to the open message group, returning the group it closes if it starts a new one
+
+        return dict|None (the closed group, in the format of a ChatDataProcessor.group_messages row)
+        """
+        if (self.open_group is not None) and (self.open_group["message_group_id"] == features["message_group_id"]):
+            self.open_group["messages"].append(features["message"])
+            self.open_group["last_timestamp"] = features["timestamp"]
+            self.open_group["message_count"] += 1
+            self.open_group["media_count"] += int(features["message"] == "__Media_Omitted__")
+            return None
+
+        closed_group = self.close_group()
+        self.open_group = {
+            "message_group_id": features["message_group_id"],
+            "messages": [features["message"]],
+            "timestamp": features["timestamp"],
+            "author": features["author"],
+            "is_event": features["is_event"],
+            "last_timestamp": features["timestamp"],
+            "message_count": 1,
+            "media_count": int(features["message"] == "__Media_Omitted__")
+        }
+        return closed_group
+
+    def close_group(self):
+        if self.open_group is None:
+            return None
+        group = dict(self.open_group)
+        group["message"] = self.separator.join(m for m in group.pop("messages") if m)
+        self.open_group = None
+        return group
+
+    def process_message(self, timestamp, author, is_event, message):
+        """
+        computes the features of one cleaned message and updates the state
+
+        timestamp (datetime): the time of the message
+        author (str): the author, empty for events
+        is_event (bool): whether the message is an event
+        message (str): the cleaned message
+
+        return dict (the message and its features), dict|None (the message group closed by the message)
+        """
+        timestamp = pd.Timestamp(timestamp)
+        previous = self.previous_message
+        features = {"timestamp": timestamp, "author": author, "is_event": is_event, "message": message}
+
+        features["time_since_previous_message"] = None if previous is None else timestamp - previous["timestamp"]
+        features["previous_message_author"] = None if previous is None else previous["author"]
+
+        # a message joins the group of the previous message under the same rule as create_message_group_id, which only needs the previous message
+        joins_group = (
+            (previous is not None) and
+            (previous["author"] == author) and
+            (not previous["is_event"]) and
+            (features["time_since_previous_message"] <= self.minute_threshold)
+        )
+        if not joins_group:
+            self.message_group_id += 1
+        features["message_group_id"] = self.message_group_id
+
+        starts_session = (previous is None) or (features["time_since_previous_message"] > self.gap_minutes)
+        if starts_session:
+            self.session_id += 1
+        features["session_id"] = self.session_id
+
+        is_reply = (
+            (previous is not None) and
+            (not starts_session) and
+            (author != previous["author"]) and
+            (not is_event) and
+            (not previous["is_event"])
+        )
+        features["reply_to_author"] = previous["author"] if is_reply else None
+        features["response_latency"] = features["time_since_previous_message"] if is_reply else None
+
+        counts = [None]*len(self.windows) if is_event else self.rolling_counts(author, timestamp)
+        for w, count in zip(self.windows, counts):
+            features[f"author_messages_past_{w}"] = count
+
+        self.update_counters(timestamp, author, is_event, message)
+        closed_group = self.update_group(features)
+        self.previous_message = features
+        return features, closed_group
+
+    def emit(self, messages):
+        """
+        yields ("message", features) for each message and ("group", group) for each message group closed
+        """
+        for message in messages:
+            features, closed_group = self.process_message(*message)
+            if closed_group is not None:
+                yield "group", closed_group
+            yield "message", features
+
+    def feed(self, text):
+        """
+        text (str): the next chunk of the export, usually one line
+
+        yield tuple (kind<str>, record<dict>), see emit
+        """
+        yield from self.emit(self.parser.feed(text))
+
+    def flush(self):
+        """
+        completes the open message and closes the open message group, used when the stream ends
+
+        yield tuple (kind<str>, record<dict>), see emit
+        """
+        yield from self.emit(self.parser.flush())
+        closed_group = self.close_group()
+        if closed_group is not None:
+            yield "group", closed_group
+
+    def run(self, source):
+        """
+        processes every line of a source, e.g. a FileTailSource or SocketSource, flushing when the source ends
+
+        source (iterable<str>): the lines of the export
+
+        yield tuple (kind<str>, record<dict>), see emit
+        """
+        for line in source:
+            yield from self.feed(line)
+        yield from self.flush()
+
+    def counts(self):
+        """
+        the event and message counts of each author and period so far
+
+        return pd.DataFrame (in the format of ChatDataProcessor.group_by_ts_freq)
+        """
+        keys = sorted(self.counters)
+        counts = pd.DataFrame(
+            [self.counters[key] for key in keys],
+            columns = ["event_count", "message_count"],
+            dtype = np.int64
+        )
+        counts.index = ChatDataProcessor.decode_period_index(
+            [author for author, _ in keys],
+            np.array([period_key for _, period_key in keys], dtype=np.int64),
+            self.freq
+        )
+        return counts
@@ -0,0 +1,184 @@
+import pandas as pd
+from pipeline.message_batches import MessageCache, BatchWorkerPool, hash_message
+
+
+MEDIA_OMITTED = "__Media_Omitted__"
+
+# the prompt prefix Styleformer gives its T5 model for each style
+STYLEFORMER_PREFIXES = {
+    0: ("ctf", "transfer Casual to Formal: "),
+    1: ("ftc", "transfer Formal to Casual: "),
+    2: ("atp", "transfer Active to Passive: "),
+    3: ("pta", "transfer Passive to Active: ")
+}
+
+
+class StyleformerBatchModel():
+
+    def __init__(self, style=0, max_length=64):
+        """
+        runs the T5 model inside Styleformer over a batch of padded messages on the cpu
+
+        Styleformer.transfer only takes a single sentence, so this calls its tokenizer and model directly. the adequacy ranking of candidates that Styleformer.transfer does is skipped
+
+        style (int): the Styleformer style, 0 casual to formal, 1 formal to casual, 2 active to passive, 3 passive to active
+        max_length (int): the maximum number of tokens to generate for each message
+        """
+        import torch
+        from styleformer import Styleformer
+
+        # each worker process gets its own model, one thread each stops the workers competing for cores
+        torch.set_num_threads(1)
+        self.torch = torch
+        self.styleformer = Styleformer(style=style)
+        model_prefix, self.prompt = STYLEFORMER_PREFIXES[style]
+        self.tokenizer = getattr(self.styleformer, f"{model_prefix}_tokenizer")
+        self.model = getattr(self.styleformer, f"{model_prefix}_model")
+        self.max_length = max_length
+
+    def transfer_batch(self, messages):
+        """
+        messages (list<str>): the messages to transfer, these should be of similar length to limit padding
+
+        return list<str>
+        """
+        inputs = self.tokenizer(
+            [self.prompt + m for m in messages],
+            return_tensors = "pt",
+            padding = True,
+            truncation = True
+        )
+        with self.torch.no_grad():
+            outputs = self.model.generate(
+                **inputs,
+                max_length = self.max_length
+            )
+        return self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+
+
+def load_styleformer_model(style):
+    return StyleformerBatchModel(style=style)
+
+
+def transfer_batch(model, messages):
+    return model.transfer_batch(messages)
+
+
+class ChatFormalizer():
+
+    def __init__(self, cache_loc=":memory:", style=0, batch_size=16, n_workers=1, model_factory=load_styleformer_model):
+        """
+        formalizes the messages of a chat with Styleformer in batches, the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages() can be used
+
+        identical messages are only formalized once and events and media omitted messages are skipped. the remaining messages are sorted by length so each batch is padded as little as possible and the batches are spread across n_workers processes. the model, or the worker pool and the model of each worker, is loaded on the first call to formalize and reused by every later call until close. results are stored in an sqlite cache keyed by a hash of the message so re-running over a chat only formalizes new messages
+
+        cache_loc (str): the file path of the sqlite cache, defaults to an in memory cache
+        style (int): the Styleformer style, see StyleformerBatchModel
+        batch_size (int): the number of messages in each batch
+        n_workers (int): the number of worker processes, 1 runs in the current process
+        model_factory (function): called with the style to load a model with a transfer_batch(list<str>) method, must be picklable when n_workers > 1
+        """
+        self.cache_loc = cache_loc
+        self.style = style
+        self.batch_size = batch_size
+        self.n_workers = n_workers
+        self.model_factory = model_factory
+        self.cache = MessageCache(cache_loc, "formalized_messages", ("style", "INTEGER NOT NULL"), [("formalized", "TEXT NOT NULL")])
+        self.pool = BatchWorkerPool(transfer_batch, model_factory, factory_args=(style,), n_workers=n_workers)
+
+    @property
+    def model(self):
+        """
+        the model loaded in this process when n_workers is 1, None until the first batch is run
+        """
+        return self.pool.model
+
+    def hash_message(self, message):
+        """
+        return str
+        """
+        return hash_message(message)
+
+    def messages_to_formalize(self, chat):
+        """
+        the messages worth formalizing, events, media omitted and empty messages are skipped
+
+        chat (pd.DataFrame): the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages()
+
+        return pd.Series<bool>
+        """
+        messages = chat.message.astype(object)
+        return (
+            (~chat.is_event.astype(bool))&
+            messages.notnull()&
+            (messages.str.strip() != "")&
+            (messages.str.strip() != MEDIA_OMITTED)
+        )
+
+    def read_cache(self, message_hashes):
+        """
+        message_hashes (list<str>): the hashes to look up
+
+        return dict<str, str> (message_hash: formalized)
+        """
+        return {message_hash: row[0] for message_hash, row in self.cache.read(message_hashes, self.style).items()}
+
+    def write_cache(self, formalized):
+        """
+        formalized (dict<str, str>): message_hash: formalized
+        """
+        self.cache.write({message_hash: (f,) for message_hash, f in formalized.items()}, self.style)
+
+    def create_batches(self, messages):
+        """
+        sorts messages by length and splits them into batches of batch_size
+
+        messages (list<str>): the messages to batch
+
+        return list<list<str>>
+        """
+        messages = sorted(messages, key=len)
+        return [messages[i:i+self.batch_size] for i in range(0, len(messages), self.batch_size)]
+
+    def run_batches(self, batches):
+        """
+        runs the model over the batches, in this process if n_workers is 1 otherwise across a process pool that is kept for later calls, see BatchWorkerPool
+
+        batches (list<list<str>>): the batches to transfer
+
+        return list<list<str>>
+        """
+        return self.pool.run(batches)
+
+    def formalize(self, chat):
+        """
+        formalizes every message in the chat, only messages that are not already cached are run through the model
+
+        chat (pd.DataFrame): the output of RawChatCleaner().clean() or ChatDataProcessor().group_messages()
+
+        return pd.Series<str> (null for skipped messages)
+        """
+        to_formalize = self.messages_to_formalize(chat)
+        unique_messages = pd.unique(chat.message[to_formalize].astype(object))
+        message_hashes = {m: self.hash_message(m) for m in unique_messages}
+
+        cached = self.read_cache(list(message_hashes.values()))
+        new_messages = [m for m, h in message_hashes.items() if h not in cached]
+
+        batches = self.create_batches(new_messages)
+        formalized = {}
+        for batch, outputs in zip(batches, self.run_batches(batches)):
+            for message, output in zip(batch, outputs):
+                formalized[message_hashes[message]] = output
+        self.write_cache(formalized)
+        cached.update(formalized)
+
+        formalized_messages = {m: cached[h] for m, h in message_hashes.items()}
+        return chat.message.astype(object).where(to_formalize).map(formalized_messages).rename("formalized_message")
+
+    def close(self):
+        """
+        shuts down the worker pool, if one was started, and closes the cache
+        """
+        self.pool.close()
+        self.cache.close()
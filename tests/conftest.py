@@ -0,0 +1,47 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-performance",
+        action = "store_true",
+        default = False,
+        help = "run the tests marked performance, these are also run when selected with -m performance"
+    )
+    parser.addoption(
+        "--performance-tolerance",
+        action = "store",
+        type = float,
+        default = 0.5,
+        help = "the fraction a performance measurement may exceed its baseline by, defaults to 0.5"
+    )
+    parser.addoption(
+        "--update-performance-baseline",
+        action = "store_true",
+        default = False,
+        help = "write the performance measurements to tests/performance_baseline.json rather than checking them"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "performance: time and peak memory budgets on generated chats, kept out of the default run"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # the performance tier only runs when asked for, so the default run stays fast
+    if config.getoption("--run-performance") or ("performance" in (config.getoption("-m") or "")):
+        return
+    skip_performance = pytest.mark.skip(reason="performance tier, run with -m performance or --run-performance")
+    for item in items:
+        if "performance" in item.keywords:
+            item.add_marker(skip_performance)
+
+
+@pytest.fixture(autouse=True)
+def performance_options(request):
+    if (request.cls is not None) and (request.node.get_closest_marker("performance") is not None):
+        request.cls.tolerance = request.config.getoption("--performance-tolerance")
+        request.cls.update_baseline = request.config.getoption("--update-performance-baseline")
@@ -0,0 +1,46 @@
+import unittest
+from cleaners.author_aliases import AuthorAliasResolver
+from cleaners.chat_cleaner import RawChatCleaner
+import pandas as pd
+
+class TestAuthorAliasResolver(unittest.TestCase):
+
+    def test_resolve_maps_aliases_to_canonical_authors(self):
+        """ 
+        tests that names, renamed contacts and phone numbers resolve to the same author and unresolved authors are reported
+        """
+        resolver = AuthorAliasResolver(
+            {
+                "Cath": ["Cath Jones", "+44 7700 900123"],
+                "Chole": ["Chole Williams"]
+            }
+        )
+        authors = pd.Series(["Cath Jones", "cath", "+447700900123", "Chole Williams", "Will", "", None])
+
+        output = resolver.resolve(authors)
+        expected = pd.Series(["Cath", "Cath", "Cath", "Chole", "Will", "", None], dtype=object)
+        pd.testing.assert_series_equal(output, expected)
+        self.assertEqual(resolver.unresolved, ["Will"], "expected Will to be reported as unresolved")
+
+    def test_resolve_as_category(self):
+        """ 
+        tests that the resolved authors can be returned as a categorical with one category per canonical author
+        """
+        resolver = AuthorAliasResolver({"Cath": ["Cath Jones"]})
+
+        output = resolver.resolve(pd.Series(["Cath Jones", "Cath", "tom"]), as_category=True)
+        self.assertEqual(list(output.cat.categories), ["Cath", "tom"])
+
+    def test_contact_dict_substitutes_mentions(self):
+        """ 
+        tests that the phone number aliases can be used by RawChatCleaner to substitute mentions
+        """
+        resolver = AuthorAliasResolver({"tom": ["5678", "+44 1234"], "Caroline": ["Caroline Smith"]})
+        self.assertEqual(resolver.contact_dict(), {"tom": ["5678", "441234"]})
+
+        cleaner = RawChatCleaner(
+            chat_loc = "tests/test_data/txt_with_nothing.txt",
+            contact_dict = resolver.contact_dict()
+        )
+        output = cleaner.replace_user_phone_numbers_with_names("@5678 and @441234 are here")
+        self.assertEqual(output, "tom and tom are here")
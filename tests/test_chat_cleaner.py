@@ -1,6 +1,8 @@
 import unittest
 from unittest import mock
-from cleaners.chat_cleaner import RawChatCleaner
+from cleaners.chat_cleaner import RawChatCleaner, CLEANING_RULES, classify_event_types
+from cleaners.vectorized_chat_cleaner import VectorizedChatCleaner
+from cleaners.message_dictionary import MessageDictionary
 import pandas as pd
 
 class TestRawChatCleaner(unittest.TestCase):
@@ -572,3 +574,90 @@ class TestRawChatCleaner(unittest.TestCase):
 
         pd.testing.assert_frame_equal(output, expected)
 
+
+    def test_classify_event_types(self):
+        """ 
+        tests that events and special messages are classified into their types
+        """
+        messages = pd.Series(
+            [
+                "Messages and calls are end-to-end encrypted. No one outside of this chat, not even WhatsApp, can read or listen to them. Tap to learn more.",
+                'You created group "celebrations"',
+                'You changed the subject from "celebrations" to "tom added"',
+                "tom added Ezmay",
+                "Caroline left",
+                "Ezmay joined using this group's invite link",
+                "You removed Caroline",
+                "You started a call",
+                "__Media_Omitted__",
+                "This message was deleted",
+                "Caroline left"
+            ]
+        )
+        is_event = pd.Series([True]*8 + [False]*3)
+
+        expected = [
+            "encryption_notice",
+            "created_group",
+            "subject_change",
+            "added",
+            "left",
+            "joined",
+            "removed",
+            "other_event",
+            "media_omitted",
+            "deleted_message",
+            "message"
+        ]
+        output = classify_event_types(messages, is_event)
+        self.assertEqual(list(output), expected)
+        self.assertEqual(output.dtype, "category")
+
+    def test_construction_is_lazy(self):
+        """ 
+        checks that the cleaning rules are shared between instances and the chat is not read until it is needed
+        """
+        cleaner = RawChatCleaner(
+            chat_loc = "tests/test_data/file_that_does_not_exist.txt"
+        )
+        other_cleaner = RawChatCleaner(
+            chat_loc = "tests/test_data/txt_chat_test.txt"
+        )
+        self.assertIs(cleaner.timestamp_regexp, other_cleaner.timestamp_regexp)
+        self.assertIs(cleaner.timestamp_regexp, CLEANING_RULES["timestamp_regexp"])
+        with self.assertRaises(TypeError):
+            CLEANING_RULES["timestamp_regexp"] = None
+        with self.assertRaises(FileNotFoundError):
+            cleaner.clean()
+
+    def test_clean_from_text_and_file_object(self):
+        """ 
+        checks that a chat in memory or in an open file cleans the same as the chat on disk
+        """
+        chat_loc = "tests/test_data/txt_chat_test.txt"
+        expected = RawChatCleaner(chat_loc = chat_loc).clean()
+
+        with open(chat_loc, "r") as chat_file:
+            chat_text = chat_file.read()
+        pd.testing.assert_frame_equal(RawChatCleaner.from_text(chat_text).clean(), expected)
+        pd.testing.assert_frame_equal(RawChatCleaner.from_text(chat_text.replace("\n", "\r\n")).clean(), expected)
+        with open(chat_loc, "r") as chat_file:
+            pd.testing.assert_frame_equal(RawChatCleaner(chat_loc = chat_file).clean(), expected)
+
+    def test_clean_encode_messages(self):
+        """ 
+        checks that an encoded message column holds the same messages as a categorical and that chats cleaned with a shared dictionary share its codes
+        """
+        chat_loc = "tests/test_data/txt_chat_test.txt"
+        expected = RawChatCleaner(chat_loc = chat_loc).clean()
+
+        output = RawChatCleaner(chat_loc = chat_loc).clean(encode_messages=True)
+        self.assertEqual(output.message.dtype, "category")
+        pd.testing.assert_frame_equal(output.assign(message=output.message.astype(object)), expected)
+        pd.testing.assert_frame_equal(VectorizedChatCleaner(chat_loc = chat_loc).clean(encode_messages=True), output)
+
+        dictionary = MessageDictionary()
+        first_chat = RawChatCleaner(chat_loc = chat_loc).clean(message_dictionary=dictionary)
+        second_chat = RawChatCleaner.from_text("27/09/2021, 08:54 - tom: where tho?\n27/09/2021, 08:55 - Caroline: __Media_Omitted__").clean(message_dictionary=dictionary)
+        self.assertEqual(len(dictionary), first_chat.message.cat.categories.size + 1)
+        self.assertEqual(second_chat.message.cat.codes[1], list(dictionary.values).index("__Media_Omitted__"))
@@ -0,0 +1,53 @@
+import unittest
+from cleaners.chat_deduplicator import ChatDeduplicator
+import pandas as pd
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+class TestChatDeduplicator(unittest.TestCase):
+
+    def test_normalise_message(self):
+        """ 
+        tests that rendering differences between exports are normalised away
+        """
+        deduplicator = ChatDeduplicator()
+
+        self.assertEqual(
+            deduplicator.normalise_message("Call me on 0770 090\u00a00123 \u200e :grimacing_face:  "),
+            deduplicator.normalise_message("call me on 07700900123 :grimacing_face:")
+        )
+
+    def test_merge_overlapping_exports(self):
+        """ 
+        tests that two overlapping exports merge into one timeline without duplicates
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        first_export = df_data.iloc[:6].reset_index(drop=True)
+        second_export = df_data.iloc[3:].reset_index(drop=True)
+        second_export.loc[0, "message"] = second_export.loc[0, "message"].replace("!!", "!!\u200e")
+
+        deduplicator = ChatDeduplicator()
+        output = deduplicator.merge([first_export, second_export])
+        pd.testing.assert_frame_equal(output, df_data)
+
+        summary = deduplicator.overlap_summary([first_export, second_export])
+        self.assertEqual(list(summary.shared_count), [3, 3])
+        self.assertEqual(list(summary.unique_count), [3, 2])
+
+    def test_merge_keeps_repeated_messages(self):
+        """ 
+        tests that a message sent twice in the same minute is kept twice
+        """
+        df_data = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(["2021-10-23 15:50"]*2),
+                "author": ["tom", "tom"],
+                "is_event": [False, False],
+                "message": ["ok", "ok"]
+            }
+        )
+        output = ChatDeduplicator().merge([df_data, df_data.iloc[:1]])
+        self.assertEqual(len(output), 2)
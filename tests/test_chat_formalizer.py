@@ -0,0 +1,78 @@
+import unittest
+from style_transfer.chat_formalizer import ChatFormalizer
+import pandas as pd
+
+class UpperCaseModel():
+    def __init__(self):
+        self.batches = []
+
+    def transfer_batch(self, messages):
+        self.batches.append(messages)
+        return [m.upper() for m in messages]
+
+def load_upper_case_model(style):
+    return UpperCaseModel()
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+class TestChatFormalizer(unittest.TestCase):
+
+    def test_formalize_skips_events_and_media(self):
+        """ 
+        tests that events and media omitted messages are not formalized
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        formalizer = ChatFormalizer(model_factory=load_upper_case_model)
+
+        output = formalizer.formalize(df_data)
+        self.assertTrue(output[[0, 4, 7]].isnull().all(), "expected events and media omitted to be skipped")
+        self.assertEqual(output[5], "WHERE THO?")
+
+    def test_formalize_deduplicates_and_batches_by_length(self):
+        """ 
+        tests that repeated messages are only run once and batches are sorted by length
+        """
+        df_data = pd.DataFrame(
+            {
+                "is_event": [False]*5,
+                "message": ["ok", "a longer message", "ok", "hello", "a longer message"]
+            }
+        )
+        formalizer = ChatFormalizer(batch_size=2, model_factory=load_upper_case_model)
+
+        output = formalizer.formalize(df_data)
+        self.assertEqual(list(output), ["OK", "A LONGER MESSAGE", "OK", "HELLO", "A LONGER MESSAGE"])
+        self.assertEqual(formalizer.model.batches, [["ok", "hello"], ["a longer message"]])
+
+    def test_formalize_uses_cache(self):
+        """ 
+        tests that a second run only formalizes messages that are not already cached
+        """
+        formalizer = ChatFormalizer(model_factory=load_upper_case_model)
+        formalizer.formalize(pd.DataFrame({"is_event": [False], "message": ["ok"]}))
+
+        output = formalizer.formalize(pd.DataFrame({"is_event": [False, False], "message": ["ok", "new"]}))
+        self.assertEqual(list(output), ["OK", "NEW"])
+        self.assertEqual(formalizer.model.batches, [["ok"], ["new"]])
+
+    def test_formalize_reuses_worker_pool(self):
+        """ 
+        tests that with several workers the pool is started once and reused by later calls
+        """
+        formalizer = ChatFormalizer(batch_size=1, n_workers=2, model_factory=load_upper_case_model)
+        try:
+            output = formalizer.formalize(pd.DataFrame({"is_event": [False, False], "message": ["ok", "hello"]}))
+            executor = formalizer.pool.executor
+            output_second = formalizer.formalize(pd.DataFrame({"is_event": [False, False], "message": ["ok", "new"]}))
+            executor_second = formalizer.pool.executor
+        finally:
+            formalizer.close()
+
+        self.assertEqual(list(output), ["OK", "HELLO"])
+        self.assertEqual(list(output_second), ["OK", "NEW"])
+        self.assertIsNotNone(executor)
+        self.assertIs(executor_second, executor)
+        self.assertIsNone(formalizer.pool.executor)
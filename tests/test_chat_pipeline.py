@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pipeline.chat_pipeline import ChatPipeline
+from data_processing.chat_processing import MessageTextPreprocessor
+import pandas as pd
+
+class TestChatPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.checkpoint_loc = tempfile.mkdtemp()
+        self.chat_loc = os.path.join(self.checkpoint_loc, "chat.txt")
+        shutil.copy("tests/test_data/txt_chat_test.txt", self.chat_loc)
+
+    def tearDown(self):
+        shutil.rmtree(self.checkpoint_loc)
+
+    def test_run_checkpoints_every_stage(self):
+        """ 
+        tests that a first run executes and checkpoints every stage and a rerun only reads the checkpoints
+        """
+        pipeline = ChatPipeline(self.checkpoint_loc)
+        output = pipeline.run(self.chat_loc)
+        self.assertEqual(pipeline.executed, ["cleaning", "relationships", "grouping", "timeseries", "text_preprocessing"])
+        self.assertEqual(
+            sorted(output),
+            ["cleaned_chat", "grouped_chat", "processed_chat", "relationship_features", "timeseries_d", "timeseries_m", "timeseries_w"]
+        )
+        self.assertIn("processed_message", output["processed_chat"].columns)
+
+        output_rerun = ChatPipeline(self.checkpoint_loc)
+        rerun = output_rerun.run(self.chat_loc)
+        self.assertEqual(output_rerun.executed, [])
+        pd.testing.assert_frame_equal(rerun["grouped_chat"], output["grouped_chat"])
+
+    def test_config_and_input_changes_rerun_downstream_stages(self):
+        """ 
+        tests that only the stages downstream of a changed config or chat file are rerun
+        """
+        ChatPipeline(self.checkpoint_loc).run(self.chat_loc)
+
+        pipeline = ChatPipeline(self.checkpoint_loc, {"grouping": {"separator": "\n"}})
+        pipeline.run(self.chat_loc)
+        self.assertEqual(pipeline.executed, ["grouping", "text_preprocessing"])
+
+        with open(self.chat_loc, "a") as chat_file:
+            chat_file.write("\n24/10/2021, 10:00 - tom: one more message")
+        pipeline.run(self.chat_loc, stages=["timeseries"])
+        self.assertEqual(pipeline.executed, ["cleaning", "timeseries"])
+
+    def test_resume_after_failed_stage(self):
+        """ 
+        tests that a run which crashes resumes from the stage that failed
+        """
+        pipeline = ChatPipeline(self.checkpoint_loc)
+        with mock.patch.object(MessageTextPreprocessor, "run", side_effect=RuntimeError("crash")):
+            with self.assertRaises(RuntimeError):
+                pipeline.run(self.chat_loc)
+        self.assertEqual(pipeline.executed, ["cleaning", "relationships", "grouping", "timeseries"])
+
+        pipeline.run(self.chat_loc)
+        self.assertEqual(pipeline.executed, ["text_preprocessing"])
@@ -0,0 +1,254 @@
+import unittest
+from unittest import mock
+from data_processing.chat_processing import ChatDataProcessor, MessageTextPreprocessor
+from data_processing.sparse_timeseries import SparseTimeseries
+import pandas as pd
+import numpy as np
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+class TestChatDataProcessor(unittest.TestCase):
+
+    def test_summarise_sessions(self):
+        """ 
+        tests that each session is summarised with its participants and reply counts
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        output = processor.summarise_sessions(gap_minutes=60*24*30)
+        self.assertEqual(list(output.index), [0, 1], "expected two sessions")
+        self.assertEqual(list(output.message_count), [6, 0])
+        self.assertEqual(list(output.event_count), [1, 1])
+        self.assertEqual(list(output.reply_count), [3, 0])
+        self.assertEqual(output.participants[0], ("Caroline", "Ezmay", "tom"))
+        self.assertEqual(output.median_response_latency[0], pd.Timedelta("7 days 23:20:00"))
+
+    def test_response_time_distribution(self):
+        """ 
+        tests that response latencies are summarised per author
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        output = processor.response_time_distribution(gap_minutes=60*24*30, quantiles=[0.5])
+        self.assertEqual(list(output.index), ["Caroline", "Ezmay", "tom"])
+        self.assertEqual(list(output["count"]), [1, 1, 1])
+        self.assertEqual(output.q50["tom"], pd.Timedelta("0 days 19:49:00"))
+
+    def test_lazy_query_matches_eager(self):
+        """ 
+        tests that a lazy plan gives the same timeseries as filtering the grouped chat and making the timeseries eagerly
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        output = processor.lazy().group_messages().filter(authors=["tom", "Caroline"]).timeseries("d").collect()
+
+        grouped_chat = ChatDataProcessor(df_data.copy()).group_messages()
+        grouped_chat = grouped_chat[grouped_chat.author.isin(["tom", "Caroline"])].reset_index(drop=True)
+        expected = ChatDataProcessor(grouped_chat).make_timeseries("d")
+        pd.testing.assert_frame_equal(output, expected)
+
+    def test_lazy_query_pushes_filters_first(self):
+        """ 
+        tests that filters are moved ahead of the grouping and timeseries steps
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        output = [
+            step for step, _ in processor.lazy().group_messages().filter(include_events=False).timeseries("w").optimize()
+        ]
+        expected = ["filter", "group_messages", "timeseries"]
+        self.assertEqual(output, expected)
+
+    def test_period_keys_cached_for_cleaned_chat(self):
+        """ 
+        tests that the period keys of the cleaned_chat are only derived once
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        first = processor.period_keys(processor.cleaned_chat, "w")
+        second = processor.period_keys(processor.cleaned_chat, "w")
+        self.assertIs(first, second, "expected the cached week keys to be reused")
+
+    def test_create_period_keys(self):
+        """ 
+        tests the integer period keys against the pandas datetime components, including iso weeks that cross a year
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+        timestamps = pd.to_datetime(["2021-01-01 13:30", "2021-12-31 00:10", "2024-12-30 23:59"]).to_numpy()
+
+        self.assertEqual(list(processor.create_period_keys(timestamps, "h")), [13, 0, 23])
+        self.assertEqual(list(processor.create_period_keys(timestamps, "d")), [18628, 18992, 20087])
+        self.assertEqual(list(processor.create_period_keys(timestamps, "w")), [202153, 202152, 202401])
+        self.assertEqual(list(processor.create_period_keys(timestamps, "m")), [612, 623, 659])
+        self.assertEqual(list(processor.create_period_keys(timestamps, "y")), [2021, 2021, 2024])
+
+    def test_count_and_drop_event_types(self):
+        """ 
+        tests that events are classified into their types and can be counted or dropped
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        output = processor.count_event_types()
+        self.assertEqual(output["encryption_notice"], 1)
+        self.assertEqual(output["subject_change"], 1)
+        self.assertEqual(output["media_omitted"], 1)
+        self.assertEqual(output["message"], 5)
+
+        output_dropped = processor.drop_event_types(["media_omitted", "encryption_notice"])
+        self.assertEqual(len(output_dropped), 6)
+
+    def test_make_timeseries_high_resolution(self):
+        """ 
+        tests that H and T timeseries keep real dates, are dense frames like the other freqs and have a sparse form storing only the observed periods
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        output_sparse = processor.make_sparse_timeseries("T")
+        self.assertIsInstance(output_sparse, SparseTimeseries)
+        self.assertEqual(output_sparse.nnz, 6)
+
+        output_minutes = processor.make_timeseries("T").loc["tom"]
+        self.assertEqual(list(output_minutes.index), list(pd.date_range("2021-10-23 15:49", "2021-10-23 15:55", freq="min")))
+        self.assertEqual(list(output_minutes.message_count), [1, 1, 0, 0, 0, 0, 1])
+        self.assertEqual(list(output_minutes.synthetic_row), [False, False, True, True, True, True, False])
+        self.assertEqual(output_minutes.message_count.dtype, np.float64)
+        self.assertEqual(output_minutes.synthetic_row.dtype, bool)
+
+        output_hours = processor.make_timeseries("H")
+        self.assertEqual(len(output_hours.loc["Caroline"]), 18*24 + 1)
+        self.assertEqual(output_hours.loc[("tom", pd.Timestamp("2021-10-23 15:00")), "message_count"], 3)
+
+    def test_make_timeseries_sparse(self):
+        """ 
+        tests that the sparse timeseries only stores the real periods, densifies to make_timeseries and rolls and resamples without densifying
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+
+        for freq in ["h", "T", "d", "w", "m"]:
+            output_sparse = processor.make_sparse_timeseries(freq)
+            pd.testing.assert_frame_equal(output_sparse.to_dense(), processor.make_timeseries(freq))
+        self.assertEqual(output_sparse.nnz, 3)
+
+        output_rolling = processor.make_sparse_timeseries("T").rolling(3).to_dense().loc["tom"]
+        self.assertEqual(list(output_rolling.message_count), [1, 2, 2, 1, 0, 0, 1])
+
+        output_resampled = processor.make_sparse_timeseries("T").resample("d")
+        pd.testing.assert_frame_equal(output_resampled.to_dense(), processor.make_timeseries("d"), check_dtype=False)
+        with self.assertRaises(ValueError):
+            output_resampled.resample("H")
+
+    def test_group_messages_aggregates(self):
+        """ 
+        tests that grouped messages are joined with the separator and carry the per group aggregates
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_to_group.csv")
+
+        output = ChatDataProcessor(df_data).group_messages()
+        self.assertEqual(list(output.message), ["__Media_Omitted__ Where tho? Im heading with haste!"])
+        self.assertEqual(output.message_count[0], 3)
+        self.assertEqual(output.media_count[0], 1)
+        self.assertEqual(output.timestamp[0], pd.Timestamp("2021-10-23 15:49"))
+        self.assertEqual(output.last_timestamp[0], pd.Timestamp("2021-10-23 15:51"))
+
+        output_separator = ChatDataProcessor(df_data).group_messages(separator="\n")
+        self.assertEqual(output_separator.message[0], "__Media_Omitted__\nWhere tho?\nIm heading with haste!")
+
+        output_threshold = ChatDataProcessor(df_data).group_messages(minute_threshold=0)
+        self.assertEqual(list(output_threshold.message_count), [1, 1, 1])
+
+    def test_message_text_preprocessor_run(self):
+        """ 
+        tests that the pipeline_order steps build the processed_message column
+        """
+        df_data = pd.DataFrame({"message": ["Where ARE you guys", "Where ARE you guys", None]})
+
+        output = MessageTextPreprocessor(df_data).run()
+        self.assertEqual(list(output.processed_message), ["guys", "guys", ""])
+
+        output_lowercase = MessageTextPreprocessor(df_data, pipeline_order=["lowercase"]).run()
+        self.assertEqual(output_lowercase.processed_message[0], "where are you guys")
+
+    def test_approximate_timeseries(self):
+        """ 
+        tests that sampled message counts are exact for periods smaller than min_period_sample, their bounds cover the real counts otherwise, and the top authors are ranked per period
+        """
+        rng = np.random.default_rng(1)
+        df_data = pd.DataFrame(
+            {
+                "timestamp": pd.Timestamp("2021-09-27") + pd.to_timedelta(np.sort(rng.integers(0, 90*24*60, 6000)), unit="m"),
+                "author": rng.choice(["tom", "Caroline", "mo"], 6000, p=[0.6, 0.3, 0.1]),
+                "is_event": False,
+                "message": "Where tho?"
+            }
+        )
+        processor = ChatDataProcessor(df_data)
+        message_counts = processor.make_timeseries("m").message_count
+
+        output_exact = processor.approximate_timeseries("m", min_period_sample=10000)
+        pd.testing.assert_series_equal(
+            output_exact.message_count,
+            message_counts.loc[output_exact.index],
+            check_dtype = False
+        )
+        self.assertTrue((output_exact.message_count_lower == output_exact.message_count_upper).all())
+
+        output = processor.approximate_timeseries("m", fraction=0.1, min_period_sample=0, confidence=0.99)
+        self.assertLess(output.sampled_count.sum(), 1000)
+        real_counts = message_counts.loc[output.index]
+        self.assertTrue(((output.message_count_lower <= real_counts) & (real_counts <= output.message_count_upper)).all())
+
+        output_top = processor.approximate_top_authors("m", n=2, fraction=0.1, min_period_sample=0)
+        self.assertEqual(list(output_top.loc["tom"].index), [(2021, 9), (2021, 10), (2021, 11), (2021, 12)])
+        self.assertEqual(list(output_top.xs((2021, 10), level=["year", "month"]).index), ["tom", "Caroline"])
+
+    def test_message_text_preprocessor_lemmatization(self):
+        """ 
+        tests that the lemmatization step lemmatizes each word, and that the wordnet corpus is only downloaded when download_nltk_data is set
+        """
+        df_data = pd.DataFrame({"message": ["cats are heading", None]})
+        preprocessor = MessageTextPreprocessor(df_data, pipeline_order=["lemmatization"])
+
+        lemmatizer = mock.Mock()
+        lemmatizer.lemmatize.side_effect = lambda word: {"cats": "cat"}.get(word, word)
+        with mock.patch.object(preprocessor, "load_lemmatizer", return_value=lemmatizer):
+            output = preprocessor.run()
+        self.assertEqual(list(output.processed_message), ["cat are heading", ""])
+
+        with mock.patch("nltk.data.find", side_effect=LookupError), mock.patch("nltk.download") as download:
+            with self.assertRaisesRegex(LookupError, "nltk.downloader wordnet"):
+                preprocessor.run()
+            download.assert_not_called()
+
+        downloading_preprocessor = MessageTextPreprocessor(df_data, pipeline_order=["lemmatization"], download_nltk_data=True)
+        with mock.patch("nltk.data.find", side_effect=LookupError), mock.patch("nltk.download", return_value=False) as download:
+            with self.assertRaisesRegex(LookupError, "could not be downloaded"):
+                downloading_preprocessor.run()
+            download.assert_called_once_with("wordnet", quiet=True)
+
+    def test_lazy_query_reuses_cached_period_keys(self):
+        """ 
+        tests that collecting lazy timeseries reads the period keys cached for the cleaned_chat instead of deriving them for every query
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        processor = ChatDataProcessor(df_data)
+        expected = processor.lazy().filter(authors=["tom"]).timeseries("d").collect()
+
+        with mock.patch.object(ChatDataProcessor, "create_period_keys", wraps=processor.create_period_keys) as create_period_keys:
+            output = processor.lazy().filter(authors=["tom"]).timeseries("d").collect()
+            processor.lazy().group_messages().timeseries("d").collect()
+        # only the day ranges between each authors first and last message are bucketed, never the message timestamps
+        self.assertTrue(all(call.args[0].dtype == np.dtype("datetime64[D]") for call in create_period_keys.call_args_list))
+        self.assertIn("d", processor.period_key_cache)
+        pd.testing.assert_frame_equal(output, expected)
@@ -0,0 +1,63 @@
+import os
+import gzip
+import tempfile
+import unittest
+import zipfile
+from cleaners.chat_reader import ChatExportReader, strip_marks
+from cleaners.chat_cleaner import RawChatCleaner
+import pandas as pd
+
+class TestChatExportReader(unittest.TestCase):
+
+    def setUp(self):
+        self.chat_loc = "tests/test_data/txt_chat_test.txt"
+        with open(self.chat_loc, "r", encoding="utf-8") as chat_file:
+            self.chat_text = chat_file.read()
+        self.export_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.export_dir.cleanup()
+
+    def export_path(self, name):
+        return os.path.join(self.export_dir.name, name)
+
+    def test_strip_marks(self):
+        """ 
+        tests that the byte order mark and directional marks are removed and emoji joiners are kept
+        """
+        output = strip_marks("\ufeff23/10/2021, 15:49 - \u200etom: \u202a+44 1234\u202c \U0001F469\u200d\U0001F4BB")
+        self.assertEqual(output, "23/10/2021, 15:49 - tom: +44 1234 \U0001F469\u200d\U0001F4BB")
+
+    def test_read_txt_zip_and_gz(self):
+        """ 
+        tests that the zipped and gzipped exports, with a bom, windows newlines and directional marks, read as the plain chat
+        """
+        marked_text = "\ufeff" + self.chat_text.replace(" - ", " - \u200e").replace("\n", "\r\n")
+        encoded_text = marked_text.encode("utf-8")
+
+        with open(self.export_path("chat.txt"), "wb") as chat_file:
+            chat_file.write(encoded_text)
+        with zipfile.ZipFile(self.export_path("chat.zip"), "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("WhatsApp Chat with celebrations.txt", encoded_text)
+            archive.writestr("IMG-20211023-WA0001.jpg", b"\xff\xd8")
+        with gzip.open(self.export_path("chat.txt.gz"), "wb") as chat_file:
+            chat_file.write(encoded_text)
+
+        for name in ["chat.txt", "chat.zip", "chat.txt.gz"]:
+            self.assertEqual(ChatExportReader(self.export_path(name), chunk_size=7).read(), self.chat_text, name)
+            self.assertEqual("".join(ChatExportReader(self.export_path(name)).iter_lines()), self.chat_text, name)
+
+        expected = RawChatCleaner(chat_loc = self.chat_loc).clean()
+        pd.testing.assert_frame_equal(RawChatCleaner(chat_loc = self.export_path("chat.zip")).clean(), expected)
+
+    def test_zip_without_chat_member(self):
+        """ 
+        tests that a zip with several text files and no chat asks for the member name
+        """
+        with zipfile.ZipFile(self.export_path("chat.zip"), "w") as archive:
+            archive.writestr("notes.txt", "a")
+            archive.writestr("other.txt", self.chat_text)
+
+        with self.assertRaises(ValueError):
+            ChatExportReader(self.export_path("chat.zip")).read()
+        self.assertEqual(ChatExportReader(self.export_path("chat.zip"), member="other.txt").read(), self.chat_text)
@@ -0,0 +1,121 @@
+import unittest
+from storage.chat_store import ChatStore
+from data_processing.chat_processing import ChatDataProcessor
+import pandas as pd
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+class TestChatStore(unittest.TestCase):
+
+    def test_read_chat_round_trip(self):
+        """
+        tests that a loaded chat is read back in the same format as RawChatCleaner().clean()
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        store = ChatStore()
+        store.load_chat(df_data, "test")
+
+        output = store.read_chat(chat_id="test")
+        pd.testing.assert_frame_equal(output, df_data)
+
+    def test_read_chat_filters(self):
+        """
+        tests that the author and time range filters are applied in sql
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        store = ChatStore()
+        store.load_chat(df_data, "test")
+        store.load_chat(df_data, "other")
+
+        output = store.read_chat(
+            chat_id="test",
+            authors=["tom"],
+            start="2021-10-23 15:50:00"
+        )
+        expected = ["Where tho?", "Im heading with haste!"]
+        self.assertEqual(list(output.message), expected, "expected only toms messages after the start timestamp")
+
+    def test_load_chat_replaces_existing_chat(self):
+        """
+        tests that reloading a chat_id does not duplicate its rows
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        store = ChatStore()
+        store.load_chat(df_data, "test")
+        store.load_chat(df_data, "test")
+
+        self.assertEqual(len(store.read_chat(chat_id="test")), len(df_data), "expected the chat to be replaced")
+
+    def test_indexes_are_used(self):
+        """
+        tests that chat and author queries over a time range use the indexes
+        """
+        store = ChatStore()
+        chat_plan = " ".join(
+            str(row) for row in store.connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM messages WHERE chat_id = 'a' AND timestamp >= '2021'"
+            )
+        )
+        author_plan = " ".join(
+            str(row) for row in store.connection.execute(
+                "EXPLAIN QUERY PLAN SELECT * FROM messages WHERE author = 'a' AND timestamp >= '2021'"
+            )
+        )
+        self.assertIn("idx_messages_chat_timestamp", chat_plan)
+        self.assertIn("idx_messages_author_timestamp", author_plan)
+
+    def test_pushdown_matches_pandas(self):
+        """
+        tests that the sql group_messages and make_timeseries match the pandas versions
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        store = ChatStore()
+        store.load_chat(df_data, "test")
+
+        pandas_processor = ChatDataProcessor(df_data.copy())
+        sql_processor = ChatDataProcessor(store=store, chat_id="test")
+
+        pd.testing.assert_frame_equal(
+            sql_processor.group_messages(),
+            pandas_processor.group_messages(),
+            check_dtype=False
+        )
+        for freq in ["h", "d", "w", "m", "y"]:
+            pd.testing.assert_frame_equal(
+                sql_processor.make_timeseries(freq),
+                pandas_processor.make_timeseries(freq),
+                check_dtype=False,
+                check_index_type=False
+            )
+
+    def test_store_requires_chat_id(self):
+        """
+        tests that a processor over a store needs the chat_id of the chat rather than querying no chat
+        """
+        store = ChatStore()
+        store.load_chat(read_csv_with_timestamps("tests/test_data/clean_chat_test.csv"), "test")
+        with self.assertRaisesRegex(ValueError, "chat_id"):
+            ChatDataProcessor(store=store)
+
+    def test_group_messages_keeps_message_order(self):
+        """
+        tests that the messages of a group are joined in chat order rather than the order sqlite reads them in
+        """
+        df_data = pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(["2021-10-23 15:49"]*3 + ["2021-10-23 15:50"]),
+                "author": ["tom", "tom", "tom", "Caroline"],
+                "is_event": False,
+                "message": ["zebra", "apple", "", "mango"]
+            }
+        )
+        store = ChatStore()
+        store.load_chat(df_data, "test")
+
+        output = store.group_messages("test", separator="|")
+        self.assertEqual(list(output.message), ["zebra|apple", "mango"])
+        self.assertEqual(list(output.message_count), [3, 1])
+        pd.testing.assert_frame_equal(output, ChatDataProcessor(df_data).group_messages(separator="|"), check_dtype=False)
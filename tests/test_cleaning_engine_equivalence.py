@@ -0,0 +1,89 @@
+import unittest
+from cleaners.cleaning_engines import CLEANING_ENGINES
+import pandas as pd
+try:
+    from hypothesis import given, settings, strategies as st
+except ImportError:
+    st = None
+
+CONTACT_DICT = {
+    "tom": "5678"
+}
+
+if st is not None:
+    text_fragments = st.one_of(
+        st.text(
+            alphabet = "abcXYZ019 .,!?:\"'@-_\n😬😭👍🏽",
+            min_size = 1,
+            max_size = 12
+        ),
+        st.sampled_from(
+            [
+                "<Media omitted>",
+                "@5678",
+                "@1234",
+                "\n",
+                ".\n",
+                ". \n",
+                " \nnext line",
+                "https://example.com",
+                ":",
+                "\"quoted\": "
+            ]
+        )
+    )
+    message_text = st.lists(text_fragments, max_size=6).map("".join)
+    author_names = st.text(
+        alphabet = "abcXYZ019 '\"-😬",
+        max_size = 10
+    )
+    timestamps = st.tuples(
+        st.datetimes(
+            min_value = pd.Timestamp("2015-01-01").to_pydatetime(),
+            max_value = pd.Timestamp("2030-12-31").to_pydatetime()
+        ),
+        st.booleans()
+    ).map(
+        lambda x: f"{x[0].day if x[1] else format(x[0].day, '02d')}/{x[0].month:02d}/{x[0].year}, {x[0].hour:02d}:{x[0].minute:02d}"
+    )
+    export_lines = st.one_of(
+        st.tuples(timestamps, author_names, message_text).map(lambda x: f"{x[0]} - {x[1]}: {x[2]}"),
+        st.tuples(timestamps, message_text).map(lambda x: f"{x[0]} - {x[1]}")
+    )
+    whatsapp_exports = st.lists(export_lines, max_size=8).map("\n".join)
+else:
+    whatsapp_exports = None
+
+def clean_export(engine, export):
+    """ 
+    cleans the export in memory with the engine
+    """
+    return engine.from_text(export, contact_dict=CONTACT_DICT).clean(classify_events=True)
+
+@unittest.skipIf(st is None, "hypothesis is not installed")
+class TestCleaningEngineEquivalence(unittest.TestCase):
+
+    def assert_engines_equivalent(self, export):
+        expected = clean_export(CLEANING_ENGINES["reference"], export)
+        for name, engine in CLEANING_ENGINES.items():
+            if name == "reference":
+                continue
+            output = clean_export(engine, export)
+            pd.testing.assert_frame_equal(output, expected, obj=f"{name} engine output")
+
+    def test_engines_match_reference_on_fixtures(self):
+        """ 
+        tests every registered engine against the reference cleaner on the exported test chats
+        """
+        for chat_loc in ["tests/test_data/txt_chat_test.txt", "exported_chat_data/message_exports/celebrations.txt"]:
+            with open(chat_loc, "r") as chat_file:
+                self.assert_engines_equivalent(chat_file.read())
+
+    if st is not None:
+        @settings(max_examples=300, deadline=None)
+        @given(whatsapp_exports)
+        def test_engines_match_reference_on_generated_exports(self, export):
+            """ 
+            tests every registered engine against the reference cleaner on randomly generated exports, hypothesis shrinks any failure down to a minimal export
+            """
+            self.assert_engines_equivalent(export)
@@ -0,0 +1,63 @@
+import unittest
+from cleaners.message_dictionary import MessageDictionary, factorize_messages
+from cleaners.chat_cleaner import RawChatCleaner
+from cleaners.chat_deduplicator import ChatDeduplicator
+from data_processing.chat_processing import ChatDataProcessor, MessageTextPreprocessor
+from feature_engineering.text_features import MessageTextFeatures
+import pandas as pd
+import numpy as np
+
+class TestMessageDictionary(unittest.TestCase):
+
+    def test_encode_keeps_codes_stable(self):
+        """ 
+        tests that each unique message is stored once, nulls are -1 and codes do not change as other chats are encoded
+        """
+        dictionary = MessageDictionary()
+
+        output = dictionary.encode(pd.Series(["Okkk ahahaha", "__Media_Omitted__", None, "Okkk ahahaha"]))
+        self.assertEqual(list(output), [0, 1, -1, 0])
+
+        output_second = dictionary.encode(pd.Series([":grimacing_face:", "Okkk ahahaha"], dtype="category"))
+        self.assertEqual(list(output_second), [2, 0])
+        self.assertEqual(list(dictionary.decode(output)), ["Okkk ahahaha", "__Media_Omitted__", None, "Okkk ahahaha"])
+
+    def test_recode_concatenates_as_categorical(self):
+        """ 
+        tests that columns encoded with the same dictionary concatenate without falling back to strings once recoded
+        """
+        dictionary = MessageDictionary()
+        first = dictionary.categorical(pd.Series(["Okkk ahahaha", None]))
+        second = dictionary.categorical(pd.Series(["__Media_Omitted__", "Okkk ahahaha"]))
+
+        output = pd.concat([dictionary.recode(first), second], ignore_index=True)
+        self.assertEqual(output.dtype, "category")
+        self.assertEqual(list(output.cat.codes), [0, -1, 1, 0])
+
+    def test_factorize_messages(self):
+        """ 
+        tests that nulls take the code of the appended na_value for object and categorical columns
+        """
+        for dtype in [object, "category"]:
+            codes, uniques = factorize_messages(pd.Series(["a", None, "b", "a"], dtype=dtype))
+            self.assertEqual(list(uniques[codes]), ["a", "", "b", "a"])
+
+    def test_downstream_matches_strings(self):
+        """ 
+        tests that grouping, timeseries, deduplication hashes, text features and preprocessing give the same output for an encoded chat
+        """
+        chat_loc = "tests/test_data/txt_chat_test.txt"
+        expected = RawChatCleaner(chat_loc = chat_loc).clean()
+        encoded = RawChatCleaner(chat_loc = chat_loc).clean(encode_messages=True)
+
+        pd.testing.assert_frame_equal(ChatDataProcessor(encoded).group_messages(), ChatDataProcessor(expected).group_messages())
+        pd.testing.assert_frame_equal(ChatDataProcessor(encoded).make_timeseries("d"), ChatDataProcessor(expected).make_timeseries("d"))
+        pd.testing.assert_series_equal(ChatDeduplicator().hash_messages(encoded), ChatDeduplicator().hash_messages(expected))
+        pd.testing.assert_frame_equal(
+            MessageTextFeatures(sentiment_factory=None).create_features(encoded),
+            MessageTextFeatures(sentiment_factory=None).create_features(expected)
+        )
+        np.testing.assert_array_equal(
+            MessageTextPreprocessor(encoded).run().processed_message.to_numpy(),
+            MessageTextPreprocessor(expected).run().processed_message.to_numpy()
+        )
@@ -3,6 +3,7 @@ import unittest
 from unittest import mock
 from feature_engineering.message_relationship import MessageRelationships
 import pandas as pd
+import numpy as np
 
 def read_csv_with_timestamps(
     df_loc, 
@@ -145,3 +146,83 @@ class TestMessageRelationships(unittest.TestCase):
                 create_feature()
             )
             self.assertEquals(output_type, expected_type, f"expected pd.Series type for feature: {feature_name}. Instead is {output_type} type")
+
+    def test_create_rolling_author_message_counts(self):
+        """ 
+        tests that the trailing window counts only include the author's own earlier messages inside the window
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        engine = MessageRelationships(df_data)
+
+        output = engine.create_rolling_author_message_counts(["2min", "30d"])
+        expected = pd.DataFrame(
+            {
+                "author_messages_past_2min": [None, 1, 1, 1, 1, 2, 1, None],
+                "author_messages_past_30d": [None, 1, 1, 2, 1, 2, 3, None]
+            },
+            dtype = float
+        )
+        pd.testing.assert_frame_equal(output, expected)
+
+    def test_create_session_features(self):
+        """ 
+        tests that sessions are split on inactivity and replies are only found between different authors in the same session
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        engine = MessageRelationships(df_data)
+
+        expected_session_id = pd.Series([0,0,0,0,0,0,0,1])
+        output_session_id = engine.create_session_id(gap_minutes=60*24*30)
+        pd.testing.assert_series_equal(output_session_id, expected_session_id)
+
+        engine.df["session_id"] = output_session_id
+        expected_reply_to_author = pd.Series(
+            [np.nan, np.nan, "Caroline", "Ezmay", "Caroline", np.nan, np.nan, np.nan],
+            dtype = object,
+            name = "previous_message_author"
+        )
+        output_reply_to_author = engine.create_reply_to_author()
+        pd.testing.assert_series_equal(output_reply_to_author, expected_reply_to_author, check_names=False)
+
+        expected_response_latency = pd.to_timedelta(
+            pd.Series([None, None, "10 days 00:21:00", "7 days 23:20:00", "0 days 19:49:00", None, None, None])
+        )
+        output_response_latency = engine.create_response_latency()
+        pd.testing.assert_series_equal(output_response_latency, expected_response_latency, check_names=False)
+
+    def test_create_author_features(self):
+        """ 
+        tests that the per author features follow each authors own messages, skip events and match when sharded across processes
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        engine = MessageRelationships(df_data)
+
+        expected_time_since = pd.to_timedelta(
+            pd.Series([None, None, None, "17 days 23:41:00", None, "0 days 00:01:00", "0 days 00:05:00", None])
+        )
+        pd.testing.assert_series_equal(engine.create_time_since_author_previous_message(), expected_time_since)
+
+        expected_latency = pd.to_timedelta(
+            pd.Series([None, None, "10 days 00:21:00", "7 days 23:20:00", "0 days 19:49:00", None, None, None])
+        )
+        pd.testing.assert_series_equal(engine.create_author_reply_latency(), expected_latency)
+
+        expected_streak = pd.Series([None, 1, 1, 1, 1, 2, 3, None], dtype=float)
+        pd.testing.assert_series_equal(engine.create_author_streak_length(), expected_streak)
+
+        small_engine = MessageRelationships(df_data, n_workers=2)
+        pd.testing.assert_frame_equal(small_engine.create_author_features(), engine.create_author_features())
+        self.assertIsNone(small_engine.executor, "expected a small chat to run in process")
+
+        sharded_engine = MessageRelationships(df_data, n_workers=2, min_parallel_messages=0)
+        try:
+            output_sharded = sharded_engine.create_author_features()
+            executor = sharded_engine.executor
+            sharded_engine.df = df_data.copy()
+            output_resharded = sharded_engine.create_author_features()
+            self.assertIs(sharded_engine.executor, executor)
+        finally:
+            sharded_engine.close()
+        self.assertIsNotNone(executor)
+        pd.testing.assert_frame_equal(output_sharded, engine.create_author_features())
+        pd.testing.assert_frame_equal(output_resharded, engine.create_author_features())
@@ -0,0 +1,67 @@
+import unittest
+from data_processing.multi_chat_processing import MultiChatProcessor
+from data_processing.chat_processing import ChatDataProcessor
+from cleaners.author_aliases import AuthorAliasResolver
+import pandas as pd
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["author"] = df["author"].fillna("")
+    return df
+
+class TestMultiChatProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.chat_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        self.other_chat_data = self.chat_data[self.chat_data.author != "Ezmay"].assign(
+            author = lambda x: x.author.replace({"tom": "Tom Smith"})
+        )
+        self.processor = MultiChatProcessor(
+            resolver = AuthorAliasResolver({"tom": ["Tom Smith"]})
+        ).add_chat("first", self.chat_data).add_chat("second", self.other_chat_data)
+
+    def test_shared_author_dimension(self):
+        """ 
+        tests that authors in several chats are added to the dimension once and the fact tables hold integer ids
+        """
+        self.assertEqual(sorted(self.processor.author_table().author), ["Caroline", "Ezmay", "tom"])
+        self.assertEqual(str(self.processor.facts("second").author_id.dtype), "int32")
+
+    def test_timeseries_matches_single_chat(self):
+        """ 
+        tests that the timeseries of each chat matches ChatDataProcessor and the chats sum across authors
+        """
+        output = self.processor.timeseries("d", by_chat=True)
+        expected = ChatDataProcessor(self.chat_data).group_by_ts_freq("d")
+        pd.testing.assert_frame_equal(output.loc["first"], expected, check_dtype=False)
+
+        output_total = self.processor.timeseries("y")
+        self.assertEqual(output_total.loc[("tom", 2021), "message_count"], 6)
+        self.assertEqual(output_total.loc[("Ezmay", 2021), "message_count"], 1)
+
+    def test_timeseries_without_chats(self):
+        """ 
+        tests that the timeseries of a processor with no chats is empty with the usual index names
+        """
+        output = MultiChatProcessor().timeseries("d")
+        self.assertEqual(len(output), 0)
+        self.assertEqual(list(output.index.names), ["author", "date"])
+        self.assertEqual(list(output.columns), ["event_count", "message_count"])
+
+        output_by_chat = MultiChatProcessor().timeseries("w", by_chat=True)
+        self.assertEqual(list(output_by_chat.index.names), ["chat_id", "author", "year", "isoweek"])
+
+    def test_co_membership_and_author_activity(self):
+        """ 
+        tests the shared chat counts of each pair of authors and the activity of each author across chats
+        """
+        output = self.processor.co_membership().set_index(["author", "other_author"]).shared_chats
+        self.assertEqual(output[("tom", "Caroline")], 2)
+        self.assertEqual(output[("Ezmay", "tom")], 1)
+        self.assertNotIn(("tom", "tom"), output.index)
+
+        output_activity = self.processor.author_activity()
+        self.assertEqual(output_activity.loc["tom", "chat_count"], 2)
+        self.assertEqual(output_activity.loc["Ezmay", "chat_count"], 1)
+        self.assertEqual(output_activity.loc["tom", "message_count"], 6)
@@ -0,0 +1,77 @@
+import os
+import tempfile
+import unittest
+from data_processing.chat_processing import ChatDataProcessor
+import pandas as pd
+try:
+    from storage.parquet_export import ParquetChatExporter
+except ImportError:
+    ParquetChatExporter = None
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+@unittest.skipIf(ParquetChatExporter is None, "pyarrow is not installed")
+class TestParquetChatExporter(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_dir = tempfile.TemporaryDirectory()
+        self.dataset_loc = self.dataset_dir.name
+        self.exporter = ParquetChatExporter(self.dataset_loc)
+        self.processor = ChatDataProcessor(read_csv_with_timestamps("tests/test_data/clean_chat_test.csv"))
+
+    def tearDown(self):
+        self.dataset_dir.cleanup()
+
+    def test_write_timeseries_partitions(self):
+        """ 
+        tests that a daily timeseries is partitioned by chat, year and month
+        """
+        self.exporter.write_timeseries(self.processor.make_timeseries("d"), "test", "d")
+
+        output = sorted(os.listdir(os.path.join(self.dataset_loc, "timeseries_d", "chat_id=test", "year=2021")))
+        self.assertEqual(output, ["month=10"])
+
+    def test_write_hourly_timeseries(self):
+        """ 
+        tests that a real hourly timeseries is exported and read back with its timestamps
+        """
+        timeseries = self.processor.make_timeseries("H")
+        self.exporter.write_timeseries(timeseries, "test", "H")
+
+        output = self.exporter.read_timeseries("H", filters=[("chat_id", "=", "test")])
+        self.assertEqual(len(output), len(timeseries))
+        self.assertEqual(output.message_count.sum(), timeseries.message_count.sum())
+        self.assertEqual(output.timestamp.min(), timeseries.index.get_level_values("timestamp").min())
+
+    def test_read_timeseries_filters_and_projects(self):
+        """ 
+        tests that only the requested partitions and columns are read back
+        """
+        timeseries = self.processor.make_timeseries("d")
+        self.exporter.write_timeseries(timeseries, "test", "d")
+        self.exporter.write_timeseries(timeseries, "other", "d")
+
+        output = self.exporter.read_timeseries(
+            "d",
+            columns = ["author", "date", "message_count"],
+            filters = [("chat_id", "=", "test"), ("year", "=", 2021), ("month", "=", 10)]
+        )
+        expected = timeseries.reset_index()
+        expected = expected[pd.to_datetime(expected.date).dt.strftime("%Y-%m") == "2021-10"]
+        self.assertEqual(list(output.columns), ["author", "date", "message_count"])
+        self.assertEqual(len(output), len(expected))
+        self.assertEqual(output.message_count.sum(), expected.message_count.sum())
+
+    def test_rewrite_replaces_chat(self):
+        """ 
+        tests that writing the same chat twice does not duplicate it
+        """
+        grouped_chat = self.processor.group_messages()
+        self.exporter.write_grouped_chat(grouped_chat, "test")
+        self.exporter.write_grouped_chat(grouped_chat, "test")
+
+        output = self.exporter.read_grouped_chats()
+        self.assertEqual(len(output), len(grouped_chat))
@@ -0,0 +1,141 @@
+import os
+import gc
+import json
+import time
+import random
+import datetime
+import tracemalloc
+import unittest
+import pytest
+from cleaners.chat_cleaner import RawChatCleaner
+from feature_engineering.message_relationship import MessageRelationships
+from data_processing.chat_processing import ChatDataProcessor
+
+BASELINE_LOC = os.path.join(os.path.dirname(__file__), "performance_baseline.json")
+
+def generate_chat_text(n_messages=20000, n_authors=12, seed=0):
+    """
+    generates a whatsapp export with bursts of messages from the same author, multi line messages, emojis, media omitted messages, mentions and events spread over a year
+    """
+    rng = random.Random(seed)
+    authors = [f"author {i}" for i in range(n_authors)]
+    words = ["where", "are", "you", "guys", "heading", "with", "haste", "tonight", "maybe", "lol", "8:30", "btw", "@5678"]
+    timestamp = datetime.datetime(2021, 9, 27, 8, 54)
+    lines = []
+    author = authors[0]
+    for _ in range(n_messages):
+        timestamp += datetime.timedelta(minutes=rng.choice([0, 0, 1, 1, 2, 5, 30, 240]))
+        if rng.random() < 0.4:
+            author = rng.choice(authors)
+        ts = f"{timestamp.day}/{timestamp.month:02d}/{timestamp.year}, {timestamp.hour:02d}:{timestamp.minute:02d}"
+        roll = rng.random()
+        if roll < 0.02:
+            lines.append(f"{ts} - {author} added {rng.choice(authors)}")
+        elif roll < 0.07:
+            lines.append(f"{ts} - {author}: <Media omitted>")
+        else:
+            message = " ".join(rng.choice(words) for _ in range(rng.randint(1, 15)))
+            if rng.random() < 0.1:
+                message += " \U0001F62D"
+            if rng.random() < 0.1:
+                message += "\n" + " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+            lines.append(f"{ts} - {author}: {message}")
+    return "\n".join(lines)
+
+
+@pytest.mark.performance
+class TestPerformance(unittest.TestCase):
+
+    tolerance = 0.5
+    update_baseline = False
+    # very short runs are dominated by noise, so every budget allows at least this much over its baseline
+    minimum_slack = {"seconds": 0.05, "peak_mb": 1.0}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.chat_text = generate_chat_text()
+        cls.cleaned_chat = RawChatCleaner.from_text(cls.chat_text).clean()
+        cls.measurements = {}
+        if os.path.exists(BASELINE_LOC):
+            with open(BASELINE_LOC, "r") as baseline_file:
+                cls.baseline = json.load(baseline_file)
+        else:
+            cls.baseline = {}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.update_baseline and len(cls.measurements) > 0:
+            with open(BASELINE_LOC, "w") as baseline_file:
+                json.dump(dict(cls.baseline, **cls.measurements), baseline_file, indent=2, sort_keys=True)
+
+    def measure(self, run, repeats=3):
+        """
+        the fastest of repeats runs on a monotonic clock, and the peak memory of a separate run traced with tracemalloc as tracing slows the run down
+
+        return dict (seconds, peak_mb)
+        """
+        timings = []
+        for _ in range(repeats):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+
+        gc.collect()
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {"seconds": round(min(timings), 4), "peak_mb": round(peak / 2**20, 2)}
+
+    def assert_within_budget(self, name, run):
+        measurement = self.measure(run)
+        self.measurements[name] = measurement
+        if self.update_baseline:
+            return
+        if name not in self.baseline:
+            self.skipTest(f"no baseline for {name}, run with --update-performance-baseline to record one")
+        for metric, value in measurement.items():
+            budget = max(self.baseline[name][metric] * (1 + self.tolerance), self.baseline[name][metric] + self.minimum_slack[metric])
+            self.assertLessEqual(
+                value,
+                budget,
+                f"{name} {metric} of {value:.3f} is over its budget of {budget:.3f} (baseline {self.baseline[name][metric]:.3f}, tolerance {self.tolerance:.0%})"
+            )
+
+    def test_clean(self):
+        self.assert_within_budget(
+            "clean",
+            lambda: RawChatCleaner.from_text(self.chat_text).clean()
+        )
+
+    def test_create_message_group_id(self):
+        self.assert_within_budget(
+            "create_message_group_id",
+            lambda: MessageRelationships(self.cleaned_chat.copy()).create_message_group_id()
+        )
+
+    def test_group_messages(self):
+        self.assert_within_budget(
+            "group_messages",
+            lambda: ChatDataProcessor(self.cleaned_chat).group_messages()
+        )
+
+    def test_make_timeseries(self):
+        for freq in ["d", "w", "H"]:
+            self.assert_within_budget(
+                f"make_timeseries_{freq}",
+                lambda: ChatDataProcessor(self.cleaned_chat).make_timeseries(freq)
+            )
+
+    def test_make_sparse_timeseries(self):
+        self.assert_within_budget(
+            "make_sparse_timeseries_H",
+            lambda: ChatDataProcessor(self.cleaned_chat).make_sparse_timeseries("H")
+        )
+
+    def test_approximate_timeseries(self):
+        self.assert_within_budget(
+            "approximate_timeseries_m",
+            lambda: ChatDataProcessor(self.cleaned_chat).approximate_timeseries("m")
+        )
@@ -0,0 +1,60 @@
+import unittest
+from streaming.reservoir_sampler import ReservoirTimeseriesSampler
+from data_processing.chat_processing import ChatDataProcessor
+import pandas as pd
+import numpy as np
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+class TestReservoirTimeseriesSampler(unittest.TestCase):
+
+    def test_small_periods_are_exact(self):
+        """ 
+        tests that periods with fewer messages than the reservoir size are counted exactly and events are skipped
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        message_counts = ChatDataProcessor(df_data).make_timeseries("d").message_count
+
+        output = ReservoirTimeseriesSampler("d", size=100).update_stream(df_data.itertuples(index=False)).estimate()
+        pd.testing.assert_series_equal(output.message_count, message_counts[message_counts > 0], check_dtype=False)
+        pd.testing.assert_series_equal(output.message_count_upper, output.message_count_lower, check_names=False)
+
+    def test_reservoir_bounds_cover_counts(self):
+        """ 
+        tests that a reservoir keeps at most size messages per period and its bounds cover the real counts
+        """
+        rng = np.random.default_rng(2)
+        df_data = pd.DataFrame(
+            {
+                "timestamp": pd.Timestamp("2021-09-27") + pd.to_timedelta(np.sort(rng.integers(0, 60*24*60, 5000)), unit="m"),
+                "author": rng.choice(["tom", "Caroline", "mo"], 5000, p=[0.5, 0.3, 0.2]),
+                "is_event": False,
+                "message": "Where tho?"
+            }
+        )
+        message_counts = ChatDataProcessor(df_data).make_timeseries("m").message_count
+
+        sampler = ReservoirTimeseriesSampler("m", size=200).update_stream(df_data.itertuples(index=False))
+        self.assertTrue(all(len(reservoir) <= 200 for reservoir in sampler.reservoirs.values()))
+        self.assertEqual(sum(sampler.seen.values()), 5000)
+
+        output = sampler.estimate()
+        real_counts = message_counts.loc[output.index]
+        self.assertTrue(((output.message_count_lower <= real_counts) & (real_counts <= output.message_count_upper)).all())
+        self.assertEqual(list(sampler.top_authors(n=1).index.get_level_values("author")), ["tom"]*3)
+
+    def test_period_key_matches_create_period_keys(self):
+        """ 
+        tests that the scalar period key the sampler gives each message is the key ChatDataProcessor.create_period_keys gives it
+        """
+        timestamps = pd.to_datetime(["1969-12-31 23:59", "2020-12-31 10:05", "2021-01-03 00:00", "2024-12-31 23:59", "2021-10-01 13:45"])
+        for freq in ["h", "H", "T", "d", "w", "m", "y"]:
+            output = [ChatDataProcessor.create_period_key(ts.to_pydatetime(), freq) for ts in timestamps]
+            expected = list(ChatDataProcessor.create_period_keys(timestamps.to_numpy(), freq))
+            self.assertEqual(output, expected, freq)
+
+        sampler = ReservoirTimeseriesSampler(freq="w").update_stream([(ts, "tom", False, "hi") for ts in timestamps])
+        self.assertEqual(sorted(sampler.seen), sorted(ChatDataProcessor.create_period_keys(timestamps.to_numpy(), "w")))
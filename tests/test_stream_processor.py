@@ -0,0 +1,94 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from streaming.stream_processor import StreamingChatProcessor, StreamingChatParser
+from streaming.chat_sources import FileTailSource, SocketSource
+from cleaners.chat_cleaner import RawChatCleaner
+from feature_engineering.message_relationship import MessageRelationships
+from data_processing.chat_processing import ChatDataProcessor
+import pandas as pd
+
+class TestStreamingChatProcessor(unittest.TestCase):
+
+    def setUp(self):
+        self.chat_loc = "tests/test_data/txt_chat_test.txt"
+        with open(self.chat_loc, "r") as chat_file:
+            self.lines = chat_file.readlines()
+        self.cleaned_chat = RawChatCleaner(self.chat_loc).clean()
+
+    def test_parser_matches_cleaner(self):
+        """ 
+        tests that feeding the export a line at a time parses the same messages as RawChatCleaner
+        """
+        parser = StreamingChatParser()
+        messages = []
+        for line in self.lines:
+            messages.extend(parser.feed(line))
+        messages.extend(parser.flush())
+
+        output = pd.DataFrame(messages, columns=self.cleaned_chat.columns)
+        pd.testing.assert_frame_equal(output, self.cleaned_chat)
+
+    def test_features_groups_and_counts_match_batch(self):
+        """ 
+        tests that the streamed features, closed message groups and counters match the batch versions and no future leaking feature is produced
+        """
+        processor = StreamingChatProcessor(windows=["1h"])
+        output = list(processor.run(self.lines))
+        messages = pd.DataFrame([record for kind, record in output if kind == "message"])
+        groups = pd.DataFrame([record for kind, record in output if kind == "group"])
+
+        feature_engine = MessageRelationships(self.cleaned_chat.copy())
+        for feature in ["message_group_id", "session_id", "reply_to_author", "author_messages_past_hour"]:
+            feature_engine.build_required_features([feature])
+            expected = feature_engine.df[feature]
+            streamed = messages[feature if feature != "author_messages_past_hour" else "author_messages_past_1h"]
+            self.assertTrue(((streamed == expected) | (streamed.isnull() & expected.isnull())).all(), feature)
+        for feature in feature_engine.future_data_leak_features:
+            self.assertNotIn(feature, messages.columns)
+
+        expected_groups = ChatDataProcessor(self.cleaned_chat).group_messages()
+        self.assertEqual(list(groups.message), list(expected_groups.message))
+        self.assertEqual(list(groups.message_count), list(expected_groups.message_count))
+
+        pd.testing.assert_frame_equal(
+            processor.counts(),
+            ChatDataProcessor(self.cleaned_chat).group_by_ts_freq("d"),
+            check_dtype = False
+        )
+
+    def test_file_tail_source(self):
+        """ 
+        tests that the tail source yields the lines of the file, including lines appended while following it
+        """
+        with tempfile.TemporaryDirectory() as chat_dir:
+            chat_loc = os.path.join(chat_dir, "chat.txt")
+            with open(chat_loc, "w") as chat_file:
+                chat_file.writelines(self.lines[:2])
+
+            source = iter(FileTailSource(chat_loc, poll_interval=0.01, idle_timeout=0.2))
+            self.assertEqual([next(source), next(source)], self.lines[:2])
+            with open(chat_loc, "a") as chat_file:
+                chat_file.writelines(self.lines[2:])
+            self.assertEqual(list(source), self.lines[2:])
+
+    def test_socket_source(self):
+        """ 
+        tests that the socket source yields the lines sent over a local connection
+        """
+        server = socket.create_server(("127.0.0.1", 0))
+        port = server.getsockname()[1]
+
+        def send_chat():
+            connection, _ = server.accept()
+            with connection:
+                connection.sendall("".join(self.lines).encode("utf-8"))
+            server.close()
+
+        sender = threading.Thread(target=send_chat)
+        sender.start()
+        output = [record for kind, record in StreamingChatProcessor().run(SocketSource("127.0.0.1", port)) if kind == "message"]
+        sender.join()
+        self.assertEqual(len(output), len(self.cleaned_chat))
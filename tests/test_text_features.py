@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from feature_engineering.text_features import MessageTextFeatures, compute_text_features
+from data_processing.chat_processing import ChatDataProcessor
+import pandas as pd
+
+def read_csv_with_timestamps(df_loc):
+    df = pd.read_csv(df_loc)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+def length_sentiment():
+    return lambda message: (len(message) / 100, 0.5)
+
+class TestMessageTextFeatures(unittest.TestCase):
+
+    def test_compute_text_features(self):
+        """ 
+        tests the word and emoji counts and the url and media flags of a message
+        """
+        output = compute_text_features("I'm here :grinning_face:  :red_heart:  see www.example.com/x __Media_Omitted__ 8:30")
+        self.assertEqual(output[:4], (5, 2, True, True))
+
+        output_plain = compute_text_features("Where are you guys??")
+        self.assertEqual(output_plain[:4], (4, 0, False, False))
+
+    def test_create_features_uses_cache(self):
+        """ 
+        tests that events are skipped, repeated messages are scored once and a second run reads the cache
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_loc = os.path.join(cache_dir, "text_features.db")
+            text_features = MessageTextFeatures(cache_loc=cache_loc, sentiment_factory=length_sentiment, sentiment_model="length")
+            output = text_features.create_features(df_data)
+            text_features.close()
+
+            self.assertEqual(list(output.index), list(df_data.index))
+            self.assertEqual(output.word_count[0], 0)
+            self.assertTrue(output.sentiment_polarity[df_data.is_event].isnull().all())
+            self.assertEqual(output.word_count[2], 4)
+            self.assertAlmostEqual(output.sentiment_polarity[2], len("Where are you guys??") / 100)
+
+            cached_features = MessageTextFeatures(cache_loc=cache_loc, sentiment_factory=length_sentiment, sentiment_model="length")
+            cached_features.run_batches = lambda batches: self.fail("cached messages should not be scored again")
+            pd.testing.assert_frame_equal(cached_features.create_features(df_data), output)
+            cached_features.close()
+
+    def test_create_features_reuses_worker_pool(self):
+        """ 
+        tests that with several workers the pool is started once, reused by later calls and shut down by close
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        text_features = MessageTextFeatures(batch_size=2, n_workers=2, sentiment_factory=length_sentiment, sentiment_model="length")
+        try:
+            output = text_features.create_features(df_data)
+            executor = text_features.pool.executor
+            text_features.create_features(pd.DataFrame({"is_event": [False], "message": ["a new message"]}))
+            executor_second = text_features.pool.executor
+        finally:
+            text_features.close()
+
+        expected = MessageTextFeatures(sentiment_factory=length_sentiment, sentiment_model="length").create_features(df_data)
+        pd.testing.assert_frame_equal(output, expected)
+        self.assertIsNotNone(executor)
+        self.assertIs(executor_second, executor)
+        self.assertIsNone(text_features.pool.executor)
+
+    def test_custom_sentiment_needs_a_model_name(self):
+        """ 
+        tests that a custom sentiment factory must be named and differently named models do not read each others cached rows
+        """
+        with self.assertRaises(ValueError):
+            MessageTextFeatures(sentiment_factory=lambda: (lambda message: (1.0, 1.0)))
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_loc = os.path.join(cache_dir, "text_features.db")
+            chat = pd.DataFrame({"is_event": [False], "message": ["hello"]})
+            positive = MessageTextFeatures(cache_loc=cache_loc, sentiment_factory=lambda: (lambda message: (1.0, 1.0)), sentiment_model="positive")
+            negative = MessageTextFeatures(cache_loc=cache_loc, sentiment_factory=lambda: (lambda message: (-1.0, 1.0)), sentiment_model="negative")
+            self.assertEqual(positive.create_features(chat).sentiment_polarity[0], 1.0)
+            self.assertEqual(negative.create_features(chat).sentiment_polarity[0], -1.0)
+            positive.close()
+            negative.close()
+
+    def test_make_timeseries_string_agg(self):
+        """ 
+        tests that the text features are summed by make_timeseries through a string agg and match a lambda agg
+        """
+        df_data = read_csv_with_timestamps("tests/test_data/clean_chat_test.csv")
+        chat_with_features = MessageTextFeatures(sentiment_factory=None).add_features(df_data)
+        processor = ChatDataProcessor(chat_with_features)
+
+        output = processor.make_timeseries("d", agg={"word_count": "sum", "has_media": "sum"})
+        expected = processor.make_timeseries(
+            "d",
+            agg = {
+                "word_count": lambda x: x.word_count.sum(),
+                "has_media": lambda x: x.has_media.sum()
+            }
+        )
+        pd.testing.assert_frame_equal(output, expected, check_dtype=False)
+        self.assertEqual(output.has_media.sum(), 1)
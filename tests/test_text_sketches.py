@@ -0,0 +1,72 @@
+import unittest
+import pandas as pd
+from feature_engineering.text_sketches import CountMinSketch, SpaceSaving, AuthorTokenSketches
+from cleaners.chat_cleaner import RawChatCleaner
+
+class TestTextSketches(unittest.TestCase):
+
+    def test_count_min_sketch_never_undercounts(self):
+        """ 
+        tests that estimates are at least the true count and merging adds the counts
+        """
+        first, second = CountMinSketch(width=16, depth=3), CountMinSketch(width=16, depth=3)
+        for i in range(100):
+            first.add(f"token{i % 10}")
+        second.add("token1", 5)
+
+        self.assertGreaterEqual(first.estimate("token1"), 10)
+        first.merge(second)
+        self.assertGreaterEqual(first.estimate("token1"), 15)
+        self.assertEqual(first.total, 105)
+
+    def test_space_saving_keeps_heavy_hitters(self):
+        """ 
+        tests that frequent tokens are kept when the summary is full
+        """
+        summary = SpaceSaving(k=3)
+        for token in ["a"]*10 + ["b"]*6 + list("cdefgh") + ["a"]*2:
+            summary.add(token)
+
+        output = [token for token, _, _ in summary.top(2)]
+        self.assertEqual(output, ["a", "b"])
+        token, count, error = summary.top(1)[0]
+        self.assertTrue(count - error <= 12 <= count)
+
+    def test_tokenize_keeps_emojis(self):
+        """ 
+        tests that demojized emojis are single tokens alongside words and n-grams
+        """
+        sketches = AuthorTokenSketches(ngram_range=(1, 2))
+
+        output = sketches.tokenize("Okkk ahahaha  :grimacing_face: ")
+        expected = ["okkk", "ahahaha", ":grimacing_face:", "okkk ahahaha", "ahahaha :grimacing_face:"]
+        self.assertEqual(output, expected)
+
+    def test_update_stream_from_cleaner(self):
+        """ 
+        tests that the sketches can be fed from the RawChatCleaner message stream and split by period
+        """
+        cleaner = RawChatCleaner("tests/test_data/txt_chat_test.txt")
+        sketches = AuthorTokenSketches(freq="m", ngram_range=(1, 1)).update_stream(cleaner.iter_messages())
+
+        self.assertEqual(sketches.estimate("tom", "where"), 1)
+        self.assertEqual(sketches.estimate("tom", "where", period="2021-10"), 1)
+        self.assertEqual(sketches.estimate("tom", "media_omitted"), 0)
+        self.assertIn(("caroline", "2021-10"), [(a.lower(), p) for a, p in sketches.summaries])
+
+        other = AuthorTokenSketches(freq="m", ngram_range=(1, 1)).update_stream(cleaner.iter_messages())
+        sketches.merge(other)
+        self.assertEqual(sketches.top_k("Ezmay", k=1)[0][1], 2)
+
+    def test_weeks_use_calendar_year(self):
+        """ 
+        tests that weekly periods are labelled with the calendar year like ChatDataProcessor.create_period_keys, and that every author shares one fixed size sketch
+        """
+        sketches = AuthorTokenSketches(freq="w", ngram_range=(1, 1), width=256, depth=2)
+        sketches.update(pd.Timestamp("2024-12-31 10:00"), "tom", "hello")
+        sketches.update(pd.Timestamp("2025-01-01 10:00"), "ezmay", "hello there")
+
+        self.assertEqual(sorted(sketches.summaries), [("ezmay", "2025-W01"), ("tom", "2024-W01")])
+        self.assertEqual(sketches.estimate("tom", "hello", period="2024-W01"), 1)
+        self.assertEqual(sketches.estimate("ezmay", "hello"), 1)
+        self.assertEqual(sketches.count_min.table.shape, (2, 256))